@@ -104,6 +104,7 @@ $$;
 CREATE TABLE IF NOT EXISTS imprese (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     ragione_sociale VARCHAR(255) NOT NULL,
+    provincia_sede VARCHAR(50),
     attestazioni_soa JSONB DEFAULT '[]',
     certificazioni_possedute JSONB DEFAULT '[]',
     regioni_operative JSONB DEFAULT '[]',
@@ -116,8 +117,43 @@ CREATE TABLE IF NOT EXISTS imprese (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
--- View bandi attivi
-CREATE OR REPLACE VIEW bandi_attivi AS
+-- Sede impresa (scoring per distanza, ricerca per raggio)
+ALTER TABLE imprese ADD COLUMN IF NOT EXISTS provincia_sede VARCHAR(50);
+
+-- Ricerche salvate (alert sui nuovi bandi)
+CREATE TABLE IF NOT EXISTS sottoscrizioni (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    impresa_id UUID REFERENCES imprese(id) ON DELETE CASCADE,
+    categorie JSONB DEFAULT '[]',
+    regioni JSONB DEFAULT '[]',
+    importo_min NUMERIC(15, 2),
+    importo_max NUMERIC(15, 2),
+    copertura_minima NUMERIC(4, 3) DEFAULT 1.0,
+    attiva BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Coda notifiche (una per sottoscrizione e bando)
+CREATE TABLE IF NOT EXISTS notifiche (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    sottoscrizione_id UUID REFERENCES sottoscrizioni(id) ON DELETE CASCADE,
+    impresa_id UUID REFERENCES imprese(id) ON DELETE CASCADE,
+    bando_id UUID REFERENCES bandi(id) ON DELETE CASCADE,
+    cig VARCHAR(10),
+    copertura NUMERIC(4, 3),
+    stato VARCHAR(20) DEFAULT 'in_coda',
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (sottoscrizione_id, bando_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_notifiche_stato ON notifiche(stato, created_at);
+
+-- Bando PNRR (matching inverso: certificazioni richieste)
+ALTER TABLE bandi ADD COLUMN IF NOT EXISTS pnrr BOOLEAN DEFAULT FALSE;
+
+-- View bandi attivi (ricreata: b.* include le colonne aggiunte)
+DROP VIEW IF EXISTS bandi_attivi;
+CREATE VIEW bandi_attivi AS
 SELECT 
     b.*,
     CASE 
@@ -138,12 +174,9 @@ def print_schema():
     print(SCHEMA_SQL)
     print("\n" + "="*80)
 
-def insert_bando(metadata: Dict) -> Optional[str]:
-    """Inserisce bando."""
-    if not supabase:
-        return None
-    
-    data = {
+def _riga_bando(metadata: Dict) -> Dict:
+    """Riga della tabella bandi dai metadati estratti."""
+    return {
         "cig": metadata["cig"],
         "titolo": metadata.get("titolo", "Bando senza titolo"),
         "stazione_appaltante": metadata.get("stazione_appaltante"),
@@ -164,13 +197,65 @@ def insert_bando(metadata: Dict) -> Optional[str]:
         "peso_tecnica": metadata.get("criterio_aggiudicazione", {}).get("peso_tecnica"),
         "peso_economica": metadata.get("criterio_aggiudicazione", {}).get("peso_economica"),
     }
+
+def insert_bando(metadata: Dict) -> Optional[str]:
+    """Inserisce bando."""
+    if not supabase:
+        return None
+    
+    data = _riga_bando(metadata)
     
     try:
-        result = supabase.table("bandi").upsert(data).execute()
-        return result.data[0]["id"]
+        result = supabase.table("bandi").upsert(data, on_conflict="cig").execute()
+        bando_id = result.data[0]["id"]
     except Exception as e:
         print(f"❌ Errore insert: {e}")
         return None
+    
+    _notifica_alert(bando_id, data)
+    return bando_id
+
+def insert_bandi(metadati: List[Dict]) -> List[Optional[str]]:
+    """
+    Inserisce più bandi con un solo upsert (chiave: CIG).
+    
+    Se il batch fallisce si riprova bando per bando, così una riga
+    non valida non fa perdere le altre. Restituisce gli id nello stesso
+    ordine dei metadati (None per i bandi non salvati).
+    """
+    if not supabase or not metadati:
+        return [None] * len(metadati)
+    
+    # Un upsert non può toccare due volte la stessa riga: per CIG vince l'ultimo
+    righe = {}
+    for metadata in metadati:
+        righe[metadata["cig"]] = _riga_bando(metadata)
+    
+    try:
+        result = supabase.table("bandi").upsert(list(righe.values()), on_conflict="cig").execute()
+    except Exception as e:
+        print(f"⚠️  Batch di {len(righe)} bandi non inserito ({e}), riprovo uno per uno")
+        return [insert_bando(metadata) for metadata in metadati]
+    
+    ids = {riga["cig"]: riga["id"] for riga in result.data}
+    for cig, data in righe.items():
+        if cig in ids:
+            _notifica_alert(ids[cig], data)
+    return [ids.get(metadata["cig"]) for metadata in metadati]
+
+_alert = None
+
+def _notifica_alert(bando_id: str, data: Dict) -> None:
+    """Accoda le notifiche delle ricerche salvate (errori non bloccanti)."""
+    global _alert
+    try:
+        from core.matching.alerts import MotoreAlert
+        from core.matching.rules import RequisitiBando
+        if _alert is None:
+            _alert = MotoreAlert(supabase)
+        _alert.notifica_bando(bando_id, data["cig"], RequisitiBando.da_dict(data))
+    except Exception as e:
+        print(f"⚠️  Alert non elaborati: {e}")
 
 def get_bandi_attivi(limit: int = 50) -> List[Dict]:
     """Recupera bandi attivi."""
@@ -7,13 +7,32 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent))
 from config import *
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.parsers.scanner_campi import CampiTrovati, ScannerCampi
 
-def extract_cig(text: str) -> Optional[str]:
-    match = REGEX_CIG.search(text)
-    return match.group(1) if match else None
+# Campi dei metadati, compilati una volta e condivisi dagli estrattori (vedi scanner_campi)
+SCANNER_METADATI = ScannerCampi({
+    'cig': REGEX_CIG.pattern,
+    'cpv': REGEX_CPV.pattern,
+    # Come REGEX_IMPORTO, ma senza attraversare l'a capo (importi cercati per riga);
+    # maiuscole esplicite invece di IGNORECASE: stesse occorrenze, ricerca più veloce
+    'importo': r'(?-i:(€|[Ee][Uu][Rr][Oo]?)[^\S\n]*([\d.,]+))',
+    'categoria': REGEX_CATEGORIA_SOA.pattern,
+    'mesi': r"(\d+)\s*mes[ei]",
+    'anni': r"(\d+)\s*ann[oi]",
+    'stazione_appaltante': r"Stazione\s+[Aa]ppaltante[:\s]+([^\n]+)",
+    'amministrazione': r"Amministrazione\s+aggiudicatrice[:\s]+([^\n]+)",
+    'ente': r"Ente[:\s]+([^\n]+)",
+}, tutti=('cpv', 'importo', 'categoria'))
 
-def extract_cpv_codes(text: str) -> List[str]:
-    return list(set(REGEX_CPV.findall(text)))
+def _campi(text: str, campi: Optional[CampiTrovati]) -> CampiTrovati:
+    return campi if campi is not None else SCANNER_METADATI.scansiona(text)
+
+def extract_cig(text: str, campi: Optional[CampiTrovati] = None) -> Optional[str]:
+    return _campi(text, campi).valore('cig')
+
+def extract_cpv_codes(text: str, campi: Optional[CampiTrovati] = None) -> List[str]:
+    return list({o.gruppi[0] for o in _campi(text, campi).get('cpv', [])})
 
 def parse_importo(text: str) -> Optional[float]:
     try:
@@ -22,47 +41,54 @@ def parse_importo(text: str) -> Optional[float]:
     except:
         return None
 
-def extract_importi(text: str) -> Dict[str, Optional[float]]:
+def extract_importi(text: str, campi: Optional[CampiTrovati] = None) -> Dict[str, Optional[float]]:
     importi = {"base_gara": None, "oneri_sicurezza": None, "complessivo": None}
+    campi = _campi(text, campi)
     lines = text.split("\n")
     
-    for i, line in enumerate(lines):
-        line_lower = line.lower()
+    # Primo importo di ogni riga; le altre righe non possono dare risultati
+    primo_importo = {}
+    riga, pos = 0, 0
+    for o in campi.get('importo', []):
+        riga += text.count("\n", pos, o.inizio)
+        pos = o.inizio
+        primo_importo.setdefault(riga, o.gruppi[1])
+    
+    candidate = sorted({i for r in primo_importo for i in range(max(0, r-2), min(len(lines), r+3))})
+    for i in candidate:
+        line_lower = lines[i].lower()
         
         if any(k in line_lower for k in ["base di gara", "base d'asta", "importo a base"]):
             for j in range(max(0, i-2), min(len(lines), i+3)):
-                match = REGEX_IMPORTO.search(lines[j])
-                if match:
-                    importi["base_gara"] = parse_importo(match.group(2))
+                if j in primo_importo:
+                    importi["base_gara"] = parse_importo(primo_importo[j])
                     break
         
+        if i not in primo_importo:
+            continue
+        
         if "oneri" in line_lower and "sicurezza" in line_lower:
-            match = REGEX_IMPORTO.search(line)
-            if match:
-                importi["oneri_sicurezza"] = parse_importo(match.group(2))
+            importi["oneri_sicurezza"] = parse_importo(primo_importo[i])
         
         if "complessivo" in line_lower or ("totale" in line_lower and "importo" in line_lower):
-            match = REGEX_IMPORTO.search(line)
-            if match:
-                importi["complessivo"] = parse_importo(match.group(2))
+            importi["complessivo"] = parse_importo(primo_importo[i])
     
     return importi
 
-def extract_categorie_soa(text: str) -> List[Dict]:
+def extract_categorie_soa(text: str, campi: Optional[CampiTrovati] = None) -> List[Dict]:
     categorie = []
     seen = set()
     
-    for match in REGEX_CATEGORIA_SOA.finditer(text):
-        tipo = match.group(1)
-        numero = match.group(2)
-        suffisso = match.group(3) or ""
+    for match in _campi(text, campi).get('categoria', []):
+        tipo, numero, suffisso = match.gruppi
+        suffisso = suffisso or ""
         cod = f"{tipo}{numero}{'-' + suffisso if suffisso else ''}"
         
         if cod in seen:
             continue
         seen.add(cod)
         
-        context = text[max(0, match.start()-150):min(len(text), match.end()+150)]
+        context = text[max(0, match.inizio-150):min(len(text), match.fine+150)]
         classe_match = REGEX_CLASSE.search(context)
         
         categorie.append({
@@ -73,34 +99,31 @@ def extract_categorie_soa(text: str) -> List[Dict]:
     
     return categorie
 
-def extract_certificazioni(text: str) -> List[str]:
+def extract_certificazioni(text: str, campi: Optional[CampiTrovati] = None) -> List[str]:
     found = set()
-    text_lower = text.lower()
+    text_lower = _campi(text, campi).minuscolo
     for cert in CERTIFICAZIONI_RILEVANTI:
         if cert.lower() in text_lower:
             found.add(cert)
     return list(found)
 
-def extract_durata(text: str) -> Optional[int]:
-    mesi = re.search(r"(\d+)\s*mes[ei]", text, re.IGNORECASE)
+def extract_durata(text: str, campi: Optional[CampiTrovati] = None) -> Optional[int]:
+    campi = _campi(text, campi)
+    mesi = campi.valore('mesi')
     if mesi:
-        return int(mesi.group(1))
-    anni = re.search(r"(\d+)\s*ann[oi]", text, re.IGNORECASE)
+        return int(mesi)
+    anni = campi.valore('anni')
     if anni:
-        return int(anni.group(1)) * 12
+        return int(anni) * 12
     return None
 
-def extract_stazione_appaltante(text: str) -> Optional[str]:
+def extract_stazione_appaltante(text: str, campi: Optional[CampiTrovati] = None) -> Optional[str]:
     """Estrae nome stazione appaltante."""
-    patterns = [
-        r"Stazione\s+[Aa]ppaltante[:\s]+([^\n]+)",
-        r"Amministrazione\s+aggiudicatrice[:\s]+([^\n]+)",
-        r"Ente[:\s]+([^\n]+)"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
+    campi = _campi(text, campi)
+    for nome in ('stazione_appaltante', 'amministrazione', 'ente'):
+        valore = campi.valore(nome)
+        if valore:
+            return valore.strip()
     return None
 
 def extract_titolo(text: str) -> Optional[str]:
@@ -114,19 +137,20 @@ def extract_titolo(text: str) -> Optional[str]:
     return None
 
 def extract_metadata_completo(text: str) -> Dict:
-    """Estrazione completa."""
+    """Estrazione completa (campi e testo minuscolo calcolati una volta e condivisi)."""
+    campi = SCANNER_METADATI.scansiona(text)
     return {
-        "cig": extract_cig(text),
+        "cig": extract_cig(text, campi),
         "titolo": extract_titolo(text),
-        "stazione_appaltante": extract_stazione_appaltante(text),
-        "cpv_codes": extract_cpv_codes(text),
-        "importi": extract_importi(text),
-        "categorie_soa": extract_categorie_soa(text),
-        "certificazioni_richieste": extract_certificazioni(text),
-        "durata_mesi": extract_durata(text),
-        "revisione_prezzi": "revisione prezzi" in text.lower(),
+        "stazione_appaltante": extract_stazione_appaltante(text, campi),
+        "cpv_codes": extract_cpv_codes(text, campi),
+        "importi": extract_importi(text, campi),
+        "categorie_soa": extract_categorie_soa(text, campi),
+        "certificazioni_richieste": extract_certificazioni(text, campi),
+        "durata_mesi": extract_durata(text, campi),
+        "revisione_prezzi": "revisione prezzi" in campi.minuscolo,
         "criterio_aggiudicazione": {
-            "tipo": "OEPV" if "economicamente" in text.lower() else "prezzo",
+            "tipo": "OEPV" if "economicamente" in campi.minuscolo else "prezzo",
             "peso_tecnica": None,
             "peso_economica": None
         }
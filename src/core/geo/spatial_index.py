@@ -0,0 +1,134 @@
+"""
+Indice spaziale sulle province italiane
+
+- distanze tra capoluoghi (haversine) da data/province_italia.py
+- griglia regolare lat/lon per le query di raggio: solo le celle che
+  intersecano il cerchio vengono visitate, non tutte le province/imprese
+"""
+import math
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from data.province_italia import PROVINCE_ITALIA
+
+RAGGIO_TERRA_KM = 6371.0088
+KM_PER_GRADO = math.pi * RAGGIO_TERRA_KM / 180
+
+# Province in ordine fisso (l'indice serve alle viste colonnari)
+PROVINCE = sorted(PROVINCE_ITALIA)
+INDICE_PROVINCE: Dict[str, int] = {nome: i for i, nome in enumerate(PROVINCE)}
+
+_ALIAS: Dict[str, str] = {}
+for _nome, _dati in PROVINCE_ITALIA.items():
+    _ALIAS[_nome.upper()] = _nome
+    _ALIAS[_dati['sigla'].upper()] = _nome
+
+
+def normalizza_provincia(provincia: Optional[str]) -> Optional[str]:
+    """Nome canonico da nome o sigla ('pc', 'Piacenza' -> 'Piacenza'); None se sconosciuta"""
+    if not provincia:
+        return None
+    return _ALIAS.get(str(provincia).strip().upper())
+
+
+def coordinate_provincia(provincia: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(lat, lon) del capoluogo"""
+    nome = normalizza_provincia(provincia)
+    if nome is None:
+        return None
+    dati = PROVINCE_ITALIA[nome]
+    return dati['lat'], dati['lon']
+
+
+def distanza_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distanza ortodromica (haversine) in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAGGIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+@lru_cache(maxsize=None)
+def _distanza_province(a: str, b: str) -> float:
+    (lat1, lon1), (lat2, lon2) = coordinate_provincia(a), coordinate_provincia(b)
+    return distanza_km(lat1, lon1, lat2, lon2)
+
+
+def distanza_province(a: Optional[str], b: Optional[str]) -> Optional[float]:
+    """Distanza in km tra due province (None se una è sconosciuta)"""
+    a, b = normalizza_provincia(a), normalizza_provincia(b)
+    if a is None or b is None:
+        return None
+    return _distanza_province(*sorted((a, b)))
+
+
+class GrigliaSpaziale:
+    """
+    Griglia regolare in gradi per query "punti entro R km"
+
+    Ogni punto (chiave, lat, lon) finisce in una cella; la query visita solo
+    le celle nel rettangolo che contiene il cerchio e calcola la distanza
+    esatta solo per i punti in quelle celle.
+    """
+
+    def __init__(self, cella_km: float = 50.0):
+        self.passo = cella_km / KM_PER_GRADO
+        self.celle: Dict[Tuple[int, int], List[Tuple[Hashable, float, float]]] = defaultdict(list)
+        self.n = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _cella(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.passo), math.floor(lon / self.passo)
+
+    def aggiungi(self, chiave: Hashable, lat: float, lon: float) -> None:
+        self.celle[self._cella(lat, lon)].append((chiave, lat, lon))
+        self.n += 1
+
+    def entro(self, lat: float, lon: float, raggio_km: float) -> List[Tuple[Hashable, float]]:
+        """
+        Punti entro `raggio_km` da (lat, lon)
+
+        Returns:
+            Lista (chiave, distanza km) ordinata per distanza
+        """
+        dlat = raggio_km / KM_PER_GRADO
+        # Ampiezza in longitudine calcolata alla latitudine più lontana dall'equatore
+        lat_estrema = min(89.0, abs(lat) + dlat)
+        dlon = raggio_km / (KM_PER_GRADO * math.cos(math.radians(lat_estrema)))
+
+        i0, j0 = self._cella(lat - dlat, lon - dlon)
+        i1, j1 = self._cella(lat + dlat, lon + dlon)
+
+        trovati = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for chiave, p_lat, p_lon in self.celle.get((i, j), ()):
+                    km = distanza_km(lat, lon, p_lat, p_lon)
+                    if km <= raggio_km:
+                        trovati.append((chiave, km))
+
+        trovati.sort(key=lambda x: x[1])
+        return trovati
+
+
+_GRIGLIA_PROVINCE: Optional[GrigliaSpaziale] = None
+
+
+def province_entro(provincia: str, raggio_km: float) -> List[Tuple[str, float]]:
+    """Province entro `raggio_km` dal capoluogo indicato (compresa se stessa)"""
+    global _GRIGLIA_PROVINCE
+    coordinate = coordinate_provincia(provincia)
+    if coordinate is None:
+        return []
+
+    if _GRIGLIA_PROVINCE is None:
+        griglia = GrigliaSpaziale()
+        for nome in PROVINCE:
+            griglia.aggiungi(nome, *coordinate_provincia(nome))
+        _GRIGLIA_PROVINCE = griglia
+
+    return _GRIGLIA_PROVINCE.entro(*coordinate, raggio_km)
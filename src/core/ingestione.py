@@ -0,0 +1,240 @@
+"""
+Ingestione in batch di una cartella di bandi PDF
+
+I PDF vengono analizzati in un pool di processi (parse + estrazione
+metadati, il lavoro CPU-bound) mentre il processo principale raccoglie i
+risultati e li scrive su Supabase a blocchi (un upsert per blocco).
+Lo stato di ogni file è registrato in un manifest JSON nella cartella:
+se l'esecuzione si interrompe, la successiva salta i file già salvati
+(stesso path, dimensione e data di modifica) e riprende dagli altri.
+Nel pool ci sono al più 2 file per worker: su Ctrl+C i file in coda
+vengono annullati e i bandi già analizzati salvati prima di uscire.
+Più file con lo stesso CIG finiscono sulla stessa riga (upsert per CIG):
+vince l'ultimo salvato, i precedenti restano nel manifest come
+'duplicato' con il file che li ha sostituiti.
+"""
+import json
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.database import insert_bandi
+from core.extraction import extract_metadata_completo
+from core.parser import parse_pdf
+
+NOME_MANIFEST = ".edilmind_manifest.json"
+
+
+def _firma(pdf_path: Path) -> Dict:
+    """Dimensione e mtime: se cambiano il file va rielaborato"""
+    stat = pdf_path.stat()
+    return {'dimensione': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _estrai_bando(pdf_path: str) -> Tuple[str, Optional[Dict], Optional[str]]:
+    """
+    Parse + metadati di un PDF (eseguita nei worker)
+
+    Returns:
+        (path, metadati o None, errore o None)
+    """
+    try:
+        text = parse_pdf(Path(pdf_path))
+        if not text:
+            return pdf_path, None, "Errore parsing PDF"
+
+        metadata = extract_metadata_completo(text)
+        if not metadata.get("cig"):
+            metadata["cig"] = str(uuid.uuid4())[:10].upper()
+        return pdf_path, metadata, None
+
+    except Exception as e:
+        return pdf_path, None, str(e)
+
+
+class Manifest:
+    """
+    Stato per file (path relativo alla cartella) salvato su disco
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.voci: Dict[str, Dict] = {}
+        if path.exists():
+            try:
+                self.voci = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                print(f"⚠️  Manifest illeggibile, riparto da zero: {path}")
+
+    def completato(self, chiave: str, firma: Dict) -> bool:
+        voce = self.voci.get(chiave)
+        return (
+            bool(voce)
+            and voce.get('stato') in ('ok', 'duplicato')
+            and all(voce.get(k) == v for k, v in firma.items())
+        )
+
+    def proprietari(self) -> Dict[str, str]:
+        """CIG -> file la cui riga è quella salvata"""
+        return {voce['cig']: chiave for chiave, voce in self.voci.items() if voce.get('stato') == 'ok' and voce.get('cig')}
+
+    def segna_duplicato(self, chiave: str, duplicato_di: str) -> None:
+        voce = self.voci.get(chiave)
+        if voce is not None:
+            voce['stato'] = 'duplicato'
+            voce['duplicato_di'] = duplicato_di
+
+    def registra(self, chiave: str, firma: Dict, stato: str, **dati) -> None:
+        self.voci[chiave] = {**firma, 'stato': stato, **dati}
+
+    def salva(self) -> None:
+        """Scrittura atomica (un'interruzione non lascia il manifest a metà)"""
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.voci, ensure_ascii=False, indent=1), encoding='utf-8')
+        tmp.replace(self.path)
+
+    def svuota(self) -> None:
+        self.voci = {}
+        self.path.unlink(missing_ok=True)
+
+
+def processa_cartella(
+    cartella: Path,
+    n_workers: Optional[int] = None,
+    dimensione_batch: int = 50,
+    metadata_extra: Optional[Dict] = None,
+    ricomincia: bool = False
+) -> Dict[str, int]:
+    """
+    Processa tutti i PDF della cartella (ricorsivamente)
+
+    Args:
+        cartella: Cartella dei bandi
+        n_workers: Processi di parsing (default: CPU disponibili)
+        dimensione_batch: Bandi per ogni upsert su Supabase
+        metadata_extra: Metadati aggiunti a ogni bando (es. regione)
+        ricomincia: Ignora il manifest e rielabora tutti i file
+
+    Returns:
+        Conteggi: ok, errori, saltati, duplicati
+    """
+    cartella = Path(cartella)
+    manifest = Manifest(cartella / NOME_MANIFEST)
+    if ricomincia:
+        manifest.svuota()
+
+    pdf_files = sorted(p for p in cartella.rglob("*") if p.suffix.lower() == ".pdf" and p.is_file())
+    firme = {p: _firma(p) for p in pdf_files}
+    chiavi = {p: p.relative_to(cartella).as_posix() for p in pdf_files}
+    da_fare = [p for p in pdf_files if not manifest.completato(chiavi[p], firme[p])]
+    conteggi = {'ok': 0, 'errori': 0, 'saltati': len(pdf_files) - len(da_fare), 'duplicati': 0}
+    saltati = {chiavi[p] for p in pdf_files} - {chiavi[p] for p in da_fare}
+    salvati = set()
+    proprietari = manifest.proprietari()
+
+    print(f"\n{'='*80}")
+    print(f"🚀 PROCESSING CARTELLA: {cartella}")
+    print(f"{'='*80}")
+    print(f"📄 {len(pdf_files)} PDF, {conteggi['saltati']} già salvati, {len(da_fare)} da elaborare\n")
+
+    if not da_fare:
+        return conteggi
+
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(da_fare)))
+    batch: List[Tuple[Path, Dict]] = []
+    t0 = time.perf_counter()
+
+    def sostituisci(cig: str, chiave: str) -> None:
+        """`chiave` ha appena scritto la riga del CIG: il file precedente diventa un duplicato"""
+        precedente = proprietari.get(cig)
+        proprietari[cig] = chiave
+        if precedente is None or precedente == chiave:
+            return
+        manifest.segna_duplicato(precedente, chiave)
+        conteggi['duplicati'] += 1
+        if precedente in salvati:
+            salvati.discard(precedente)
+            conteggi['ok'] -= 1
+        elif precedente in saltati:
+            saltati.discard(precedente)
+            conteggi['saltati'] -= 1
+        print(f"♻️  CIG {cig}: {precedente} sostituito da {chiave}")
+
+    def scrivi_batch() -> None:
+        ids = insert_bandi([metadata for _, metadata in batch])
+        for (pdf_path, metadata), bando_id in zip(batch, ids):
+            if bando_id:
+                chiave = chiavi[pdf_path]
+                manifest.registra(chiave, firme[pdf_path], 'ok', cig=metadata['cig'], bando_id=bando_id)
+                salvati.add(chiave)
+                conteggi['ok'] += 1
+                sostituisci(metadata['cig'], chiave)
+            else:
+                manifest.registra(chiavi[pdf_path], firme[pdf_path], 'errore', cig=metadata['cig'], errore="Insert fallito")
+                conteggi['errori'] += 1
+        manifest.salva()
+        print(f"💾 Salvati {sum(1 for i in ids if i)}/{len(batch)} bandi")
+        batch.clear()
+
+    executor = ProcessPoolExecutor(max_workers=n_workers)
+    da_inviare = iter(da_fare)
+    in_corso = set()
+    n = 0
+    try:
+        while True:
+            for p in islice(da_inviare, 2 * n_workers - len(in_corso)):
+                in_corso.add(executor.submit(_estrai_bando, str(p)))
+            if not in_corso:
+                break
+            pronti, in_corso = wait(in_corso, return_when=FIRST_COMPLETED)
+
+            for future in pronti:
+                n += 1
+                path, metadata, errore = future.result()
+                pdf_path = Path(path)
+
+                if metadata is None:
+                    manifest.registra(chiavi[pdf_path], firme[pdf_path], 'errore', errore=errore)
+                    conteggi['errori'] += 1
+                    esito = f"❌ {pdf_path.name}: {errore}"
+                else:
+                    if metadata_extra:
+                        metadata.update(metadata_extra)
+                    batch.append((pdf_path, metadata))
+                    esito = f"✅ {pdf_path.name} (CIG {metadata['cig']})"
+
+                elapsed = time.perf_counter() - t0
+                velocita = n / elapsed if elapsed > 0 else 0.0
+                eta = (len(da_fare) - n) / velocita if velocita > 0 else 0.0
+                print(f"[{n}/{len(da_fare)}] {esito} - {velocita:.2f} file/s, ETA {eta:.0f}s")
+
+                if len(batch) >= dimensione_batch:
+                    scrivi_batch()
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Interrotto dopo {n}/{len(da_fare)} file: salvo i risultati, la prossima esecuzione riprende da qui")
+        raise
+    finally:
+        # Anche su Ctrl+C o errore: niente PDF in coda, e quanto già analizzato resta nel manifest
+        executor.shutdown(cancel_futures=True)
+        if batch:
+            scrivi_batch()
+        else:
+            manifest.salva()
+
+    elapsed = time.perf_counter() - t0
+    print(f"\n{'='*80}")
+    print("📊 RIEPILOGO")
+    print(f"{'='*80}")
+    print(f"Salvati:          {conteggi['ok']}")
+    print(f"Errori:           {conteggi['errori']}")
+    print(f"Già salvati:      {conteggi['saltati']}")
+    print(f"Duplicati (CIG):  {conteggi['duplicati']}")
+    print(f"Tempo:            {elapsed:.1f}s ({len(da_fare) / elapsed:.2f} file/s, {n_workers} worker)")
+    print(f"Manifest:         {manifest.path}")
+    print(f"{'='*80}\n")
+
+    return conteggi
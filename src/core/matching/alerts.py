@@ -0,0 +1,212 @@
+"""
+Ricerche salvate (alert) sui nuovi bandi, in stile percolator
+
+Ogni sottoscrizione (categorie SOA, regioni, range di importo) è una
+query permanente indicizzata per (categoria, classifica) e regione:
+quando un bando viene salvato si cercano le sottoscrizioni che lo
+soddisfano con un lookup sull'indice, senza riscorrere le imprese.
+Le corrispondenze finiscono nella coda `notifiche` su Supabase.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.matching.rules import (
+    ORDINE_CLASSI, RequisitiBando, chiavi_impresa, IMPORTO_MIN_DEFAULT, IMPORTO_MAX_DEFAULT
+)
+
+
+def sottoscrizione_da_impresa(impresa: Dict) -> Dict:
+    """Sottoscrizione con i requisiti del profilo impresa (attestazioni, regioni, importi)"""
+    return {
+        'impresa_id': impresa['id'],
+        'categorie': impresa.get('attestazioni_soa') or [],
+        'regioni': impresa.get('regioni_operative') or [],
+        'importo_min': impresa.get('importo_min_interesse'),
+        'importo_max': impresa.get('importo_max_capacita'),
+        'copertura_minima': 1.0,
+        'attiva': True,
+    }
+
+
+def _chiavi_sottoscrizione(sottoscrizione: Dict) -> Set[Tuple[str, str]]:
+    """Coppie (codice, classe) coperte; una categoria senza classe vale per tutte le classi"""
+    categorie = [
+        cat if cat.get('classe') else dict(cat, classe=ORDINE_CLASSI[-1])
+        for cat in sottoscrizione.get('categorie') or []
+        if isinstance(cat, dict) and cat.get('codice')
+    ]
+    return chiavi_impresa({'attestazioni_soa': categorie})
+
+
+class IndiceSottoscrizioni:
+    """
+    Indice delle sottoscrizioni attive
+
+    - per_categoria: (categoria, classifica) -> sottoscrizioni che la coprono
+    - per_regione: regione -> sottoscrizioni (tutte_regioni: senza filtro)
+    """
+
+    def __init__(self):
+        self.sottoscrizioni: Dict[str, Dict] = {}
+        self.per_categoria: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self.senza_categorie: Set[str] = set()
+        self.per_regione: Dict[str, Set[str]] = defaultdict(set)
+        self.tutte_regioni: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.sottoscrizioni)
+
+    def aggiungi(self, sottoscrizione: Dict) -> None:
+        """Aggiunge (o sostituisce) una sottoscrizione"""
+        sid = sottoscrizione['id']
+        self.rimuovi(sid)
+        if not sottoscrizione.get('attiva', True):
+            return
+
+        self.sottoscrizioni[sid] = sottoscrizione
+        chiavi = _chiavi_sottoscrizione(sottoscrizione)
+        for chiave in chiavi:
+            self.per_categoria[chiave].add(sid)
+        if not chiavi:
+            self.senza_categorie.add(sid)
+
+        regioni = sottoscrizione.get('regioni') or []
+        for regione in regioni:
+            self.per_regione[regione].add(sid)
+        if not regioni:
+            self.tutte_regioni.add(sid)
+
+    def rimuovi(self, sid: str) -> None:
+        sottoscrizione = self.sottoscrizioni.pop(sid, None)
+        if sottoscrizione is None:
+            return
+        for chiave in _chiavi_sottoscrizione(sottoscrizione):
+            self.per_categoria[chiave].discard(sid)
+        self.senza_categorie.discard(sid)
+        for regione in sottoscrizione.get('regioni') or []:
+            self.per_regione[regione].discard(sid)
+        self.tutte_regioni.discard(sid)
+
+    def percola(self, requisiti: RequisitiBando) -> List[Tuple[Dict, float]]:
+        """
+        Sottoscrizioni soddisfatte dal bando
+
+        Una sottoscrizione corrisponde se copre almeno `copertura_minima`
+        delle categorie richieste, include la regione del bando (o non
+        filtra per regione) e l'importo è nel suo range.
+
+        Returns:
+            Lista (sottoscrizione, copertura) per copertura decrescente
+        """
+        richieste = {(codice, classe) for codice, classe, _ in requisiti.categorie}
+        in_regione = self.per_regione.get(requisiti.regione, set()) | self.tutte_regioni
+
+        if richieste:
+            conteggi: Dict[str, int] = defaultdict(int)
+            for chiave in richieste:
+                for sid in self.per_categoria.get(chiave, ()):
+                    if sid in in_regione:
+                        conteggi[sid] += 1
+            coperture = {sid: n / len(richieste) for sid, n in conteggi.items()}
+            coperture.update((sid, 1.0) for sid in self.senza_categorie & in_regione)
+        else:
+            coperture = {sid: 1.0 for sid in in_regione}
+
+        risultati = []
+        for sid, copertura in coperture.items():
+            sottoscrizione = self.sottoscrizioni[sid]
+            minima = sottoscrizione.get('copertura_minima')
+            if copertura < (1.0 if minima is None else float(minima)):
+                continue
+            importo_min = sottoscrizione.get('importo_min')
+            importo_max = sottoscrizione.get('importo_max')
+            importo_min = IMPORTO_MIN_DEFAULT if importo_min is None else float(importo_min)
+            importo_max = IMPORTO_MAX_DEFAULT if importo_max is None else float(importo_max)
+            if importo_min <= requisiti.importo <= importo_max:
+                risultati.append((sottoscrizione, copertura))
+
+        risultati.sort(key=lambda x: (-x[1], str(x[0]['id'])))
+        return risultati
+
+
+class MotoreAlert:
+    """
+    Sottoscrizioni (tabella `sottoscrizioni`) e coda di notifiche (tabella `notifiche`)
+    """
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self._indice: Optional[IndiceSottoscrizioni] = None
+
+    def carica(self, refresh: bool = False) -> IndiceSottoscrizioni:
+        """Carica le sottoscrizioni attive e costruisce l'indice (una sola volta)"""
+        if self._indice is None or refresh:
+            result = self.supabase.table('sottoscrizioni').select('*').eq('attiva', True).execute()
+            indice = IndiceSottoscrizioni()
+            for riga in result.data:
+                indice.aggiungi(riga)
+            self._indice = indice
+            print(f"  🔔 Indice sottoscrizioni costruito ({len(indice)} attive)")
+        return self._indice
+
+    def iscrivi(self, sottoscrizione: Dict) -> str:
+        """Salva una sottoscrizione e la aggiunge all'indice"""
+        result = self.supabase.table('sottoscrizioni').insert(sottoscrizione).execute()
+        riga = result.data[0]
+        if self._indice is not None:
+            self._indice.aggiungi(riga)
+        return riga['id']
+
+    def iscrivi_impresa(self, impresa: Dict) -> str:
+        """Sottoscrizione con i requisiti del profilo impresa"""
+        return self.iscrivi(sottoscrizione_da_impresa(impresa))
+
+    def notifica_bando(self, bando_id: str, cig: Optional[str], requisiti: RequisitiBando) -> List[Dict]:
+        """
+        Percola il bando sulle sottoscrizioni e accoda le notifiche
+
+        Una sottoscrizione riceve una sola notifica per bando (anche se
+        il bando viene salvato di nuovo).
+
+        Returns:
+            Notifiche accodate
+        """
+        corrispondenze = self.carica().percola(requisiti)
+        notifiche = [
+            {
+                'sottoscrizione_id': sottoscrizione['id'],
+                'impresa_id': sottoscrizione.get('impresa_id'),
+                'bando_id': bando_id,
+                'cig': cig,
+                'copertura': round(copertura, 3),
+                'stato': 'in_coda',
+            }
+            for sottoscrizione, copertura in corrispondenze
+        ]
+
+        if notifiche:
+            self.supabase.table('notifiche').upsert(
+                notifiche,
+                on_conflict='sottoscrizione_id,bando_id',
+                ignore_duplicates=True
+            ).execute()
+            print(f"  🔔 {len(notifiche)} notifiche in coda per il bando {cig}")
+
+        return notifiche
+
+    def da_inviare(self, limit: int = 100) -> List[Dict]:
+        """Notifiche in coda, le più vecchie per prime"""
+        result = (
+            self.supabase.table('notifiche')
+            .select('*')
+            .eq('stato', 'in_coda')
+            .order('created_at')
+            .limit(limit)
+            .execute()
+        )
+        return result.data
+
+    def segna_inviate(self, ids: List[str]) -> None:
+        """Marca le notifiche come inviate"""
+        if ids:
+            self.supabase.table('notifiche').update({'stato': 'inviata'}).in_('id', ids).execute()
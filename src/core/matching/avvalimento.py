@@ -0,0 +1,109 @@
+"""
+Ricerca di imprese ausiliarie per l'avvalimento
+
+Per ogni categoria/classifica richiesta dal bando che l'impresa non
+possiede si cercano le imprese che la possiedono con sede vicina al
+luogo del bando. Nessuna scansione del registro: le province sono
+visitate per distanza crescente (griglia spaziale) e in ciascuna si
+intersecano le imprese della sede con quelle della categoria (indice
+inverso); la visita si ferma appena le prime K sono trovate.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from core.geo.spatial_index import province_entro
+from core.matching.engine import MatchEngine
+from core.matching.rules import RAGGIO_MASSIMO_KM, chiavi_bando, chiavi_impresa, ordinale_classe
+
+
+class RicercaAvvalimento:
+    """
+    Ricerca ausiliarie sull'indice e sulla vista colonnare di un MatchEngine
+    """
+
+    def __init__(self, engine: MatchEngine):
+        self.engine = engine
+
+    def cerca(
+        self,
+        bando,
+        impresa: Dict,
+        top_k: int = 5,
+        raggio_km: float = RAGGIO_MASSIMO_KM
+    ) -> List[Dict]:
+        """
+        Ausiliarie per le categorie del bando che mancano all'impresa
+
+        Args:
+            bando: Bando parsed
+            impresa: Impresa concorrente (dict come in Supabase)
+            top_k: Ausiliarie per categoria mancante
+            raggio_km: Distanza massima della sede dalla provincia del bando;
+                se la provincia del bando non è nota si usa la regione
+
+        Returns:
+            Lista per categoria mancante: categoria, classifica e ausiliarie
+            (per distanza, poi capacità decrescente)
+        """
+        mancanti = sorted(chiavi_bando(bando) - chiavi_impresa(impresa))
+        esclusa = self.engine.posizioni.get(impresa.get('id'))
+
+        risultati = []
+        for codice, classe in mancanti:
+            trovate = self._ausiliarie((codice, classe), bando, esclusa, top_k, raggio_km)
+            risultati.append({
+                'categoria': codice,
+                'classifica': classe,
+                'ausiliarie': [self._descrivi(pos, codice, km) for pos, km in trovate],
+            })
+        return risultati
+
+    def _ausiliarie(
+        self,
+        chiave: Tuple[str, str],
+        bando,
+        esclusa: Optional[int],
+        top_k: int,
+        raggio_km: float
+    ) -> List[Tuple[int, Optional[float]]]:
+        """Prime K posizioni che possiedono la chiave, con la distanza della sede"""
+        index = self.engine.index
+        possiedono = index.per_categoria.get(chiave, set())
+        if not possiedono or top_k <= 0:
+            return []
+
+        province = province_entro(bando.localizzazione.provincia, raggio_km)
+        if not province:
+            # Provincia del bando sconosciuta: imprese operative nella regione
+            vicine = possiedono & index.per_regione.get(bando.localizzazione.regione, set())
+            return [(pos, None) for pos in self._per_capacita(vicine, esclusa)[:top_k]]
+
+        trovate: List[Tuple[int, Optional[float]]] = []
+        for sede, km in province:
+            in_sede = possiedono & index.per_provincia.get(sede, set())
+            trovate.extend((pos, km) for pos in self._per_capacita(in_sede, esclusa))
+            if len(trovate) >= top_k:
+                break
+        return trovate[:top_k]
+
+    def _per_capacita(self, posizioni, esclusa: Optional[int]) -> List[int]:
+        importo_max = self.engine.matrix.importo_max
+        return sorted(
+            (pos for pos in posizioni if pos != esclusa),
+            key=lambda pos: (-importo_max[pos], pos)
+        )
+
+    def _descrivi(self, pos: int, codice: str, km: Optional[float]) -> Dict:
+        impresa = self.engine.imprese[pos]
+        # Classifica posseduta sulla categoria (la più alta)
+        classi = [
+            att['classe'] for att in impresa.get('attestazioni_soa') or []
+            if isinstance(att, dict) and att.get('codice') == codice and att.get('classe')
+        ]
+        return {
+            'impresa_id': impresa['id'],
+            'ragione_sociale': impresa['ragione_sociale'],
+            'provincia_sede': impresa.get('provincia_sede'),
+            'classifica_posseduta': max(classi, key=ordinale_classe) if classi else None,
+            'distanza_km': round(km, 1) if km is not None else None,
+            'capacita': float(self.engine.matrix.importo_max[pos]),
+        }
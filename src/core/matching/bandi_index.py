@@ -0,0 +1,178 @@
+"""
+Indice sui bandi attivi per il matching inverso (impresa -> bandi)
+"""
+import bisect
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.matching.rules import (
+    chiavi_bando, chiavi_impresa, punti_sede, CERTIFICAZIONI_PNRR, IMPORTO_MIN_DEFAULT, IMPORTO_MAX_DEFAULT,
+    PUNTI_CATEGORIE, PUNTI_REGIONE, PUNTI_IMPORTO, PUNTI_CERTIFICAZIONI
+)
+
+
+def bando_da_riga(riga: Dict):
+    """
+    Adatta una riga della tabella `bandi` all'interfaccia di BandoStrutturato
+    usata dallo scoring (categorie, localizzazione, importi, pnrr)
+    """
+    categorie = [
+        SimpleNamespace(categoria=cat.get('codice'), classifica=cat.get('classe'))
+        for cat in riga.get('categorie_soa') or []
+        if isinstance(cat, dict) and cat.get('codice')
+    ]
+    return SimpleNamespace(
+        cig=riga.get('cig'),
+        categorie=categorie,
+        localizzazione=SimpleNamespace(regione=riga.get('regione'), provincia=riga.get('provincia')),
+        importi=SimpleNamespace(totale_appalto=float(riga.get('importo_base_gara') or 0)),
+        pnrr=bool(riga.get('pnrr', False)),
+    )
+
+
+class BandiIndex:
+    """
+    Indice in memoria sui bandi attivi
+
+    - per_categoria: (categoria, classifica) -> posizioni bandi
+    - senza_categorie: bandi che non richiedono categorie SOA
+    - per_regione: regione -> posizioni bandi
+    - importi: lista ordinata (importo, posizione) per query di range
+    - per_cig: CIG -> posizione
+    """
+
+    def __init__(self):
+        self.bandi: List = []
+        self.bando_ids: List[Optional[str]] = []
+        self.posizioni: Dict[str, int] = {}
+        self.per_cig: Dict[str, int] = {}
+
+        self.per_categoria: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        self.senza_categorie: Set[int] = set()
+        self.per_regione: Dict[str, Set[int]] = defaultdict(set)
+        self.importi: List[Tuple[float, int]] = []
+        self.n_richieste: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.posizioni)
+
+    def aggiungi(self, bando_id: str, bando) -> None:
+        """Aggiunge (o sostituisce) un bando nell'indice"""
+        pos = self.posizioni.get(bando_id)
+        if pos is None:
+            pos = len(self.bandi)
+            self.bandi.append(None)
+            self.bando_ids.append(None)
+            self.n_richieste.append(0)
+            self.posizioni[bando_id] = pos
+        else:
+            self._scollega(pos)
+
+        chiavi = chiavi_bando(bando)
+        for chiave in chiavi:
+            self.per_categoria[chiave].add(pos)
+        if not chiavi:
+            self.senza_categorie.add(pos)
+        self.per_regione[bando.localizzazione.regione].add(pos)
+        bisect.insort(self.importi, (bando.importi.totale_appalto, pos))
+
+        self.bandi[pos] = bando
+        self.bando_ids[pos] = bando_id
+        if bando.cig:
+            self.per_cig[bando.cig] = pos
+        self.n_richieste[pos] = len(chiavi)
+
+    def rimuovi(self, bando_id: str) -> None:
+        """Rimuove un bando (es. scaduto) dall'indice"""
+        pos = self.posizioni.pop(bando_id, None)
+        if pos is not None:
+            self._scollega(pos)
+            self.bandi[pos] = None
+            self.bando_ids[pos] = None
+
+    def _scollega(self, pos: int) -> None:
+        """Toglie la posizione da tutte le liste dell'indice"""
+        bando = self.bandi[pos]
+        if self.per_cig.get(bando.cig) == pos:
+            del self.per_cig[bando.cig]
+        for chiave in chiavi_bando(bando):
+            self.per_categoria[chiave].discard(pos)
+        self.senza_categorie.discard(pos)
+        self.per_regione[bando.localizzazione.regione].discard(pos)
+        voce = (bando.importi.totale_appalto, pos)
+        i = bisect.bisect_left(self.importi, voce)
+        if i < len(self.importi) and self.importi[i] == voce:
+            del self.importi[i]
+
+    def bando_per_cig(self, cig: str):
+        """Bando attivo con il CIG indicato (None se assente)"""
+        pos = self.per_cig.get(cig)
+        return None if pos is None else self.bandi[pos]
+
+    def nel_range(self, importo_min: float, importo_max: float) -> Set[int]:
+        """Posizioni dei bandi con importo in [importo_min, importo_max]"""
+        inizio = bisect.bisect_left(self.importi, (importo_min, -1))
+        fine = bisect.bisect_right(self.importi, (importo_max, float('inf')))
+        return {pos for _, pos in self.importi[inizio:fine]}
+
+    def totali(
+        self,
+        impresa: Dict,
+        solo_regione: bool = False,
+        solo_importo: bool = False
+    ) -> Dict[int, int]:
+        """
+        Punteggio totale dei bandi candidati per l'impresa, calcolato dall'indice
+
+        Stesse regole di BandoMatcher._calculate_match_score: un bando è
+        candidato se l'impresa possiede almeno una categoria richiesta
+        (o se il bando non richiede categorie).
+
+        Returns:
+            Dict posizione bando -> punteggio totale
+        """
+        conteggi: Dict[int, int] = defaultdict(int)
+        for chiave in chiavi_impresa(impresa):
+            for pos in self.per_categoria.get(chiave, ()):
+                conteggi[pos] += 1
+
+        candidati = set(conteggi) | self.senza_categorie
+
+        regioni = impresa.get('regioni_operative') or []
+        in_regione: Set[int] = set()
+        for regione in regioni:
+            in_regione |= self.per_regione.get(regione, set())
+        if solo_regione:
+            candidati &= in_regione
+
+        importo_min = impresa.get('importo_min_interesse')
+        importo_max = impresa.get('importo_max_capacita')
+        importo_min = IMPORTO_MIN_DEFAULT if importo_min is None else float(importo_min)
+        importo_max = IMPORTO_MAX_DEFAULT if importo_max is None else float(importo_max)
+        if solo_importo:
+            candidati &= self.nel_range(importo_min, importo_max)
+
+        sede = impresa.get('provincia_sede')
+        cert = impresa.get('certificazioni_possedute') or []
+        certificata = any(c in cert for c in CERTIFICAZIONI_PNRR)
+
+        totali = {}
+        for pos in candidati:
+            bando = self.bandi[pos]
+            n_richieste = self.n_richieste[pos]
+            if n_richieste:
+                totale = int((conteggi.get(pos, 0) / n_richieste) * PUNTI_CATEGORIE)
+            else:
+                totale = PUNTI_CATEGORIE
+            if pos in in_regione:
+                totale += PUNTI_REGIONE
+            else:
+                totale += punti_sede(sede, bando.localizzazione.provincia)
+            if importo_min <= bando.importi.totale_appalto <= importo_max:
+                totale += PUNTI_IMPORTO
+            if certificata or not bando.pnrr:
+                totale += PUNTI_CERTIFICAZIONI
+            totali[pos] = totale
+
+        return totali
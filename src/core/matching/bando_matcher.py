@@ -5,10 +5,26 @@ Matcher Bandi-Imprese usando Supabase
 from supabase import create_client
 from dotenv import load_dotenv
 import os
-from typing import List, Dict, Optional
+import sys
+import heapq
+from pathlib import Path
+from typing import List, Dict, Optional, Union
 from datetime import datetime
 import json
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from core.matching.engine import MatchEngine, voce_match
+from core.matching.impresa_index import e_candidata
+from core.matching.parallel import ShardedMatcher
+from core.matching.bandi_index import BandiIndex, bando_da_riga
+from core.matching.rules import RequisitiBando, SOGLIA_PARTECIPAZIONE, RAGGIO_MASSIMO_KM, richiedi_categorie_complete
+from core.matching.snapshot import ImpreseSnapshot
+from core.matching.match_cache import MatchCache, hash_bando
+from core.matching.rti import RicercaRTI
+from core.matching.avvalimento import RicercaAvvalimento
+from core.matching.alerts import MotoreAlert
+from core.matching.concorrenza import ConteggiConcorrenza
+
 load_dotenv()
 
 
@@ -17,14 +33,32 @@ class BandoMatcher:
     Match bandi parsed con imprese in Supabase
     """
     
-    def __init__(self):
-        url = os.getenv('SUPABASE_URL')
-        key = os.getenv('SUPABASE_KEY')
-        
-        if not url or not key:
-            raise ValueError("SUPABASE_URL e SUPABASE_KEY devono essere in .env")
-        
-        self.supabase = create_client(url, key)
+    def __init__(self, n_workers: int = 1, supabase=None, max_delta: int = 100):
+        """
+        Args:
+            n_workers: Processi per il matching (1 = nel processo corrente)
+            supabase: Client già pronto (default: da SUPABASE_URL/SUPABASE_KEY)
+            max_delta: Oltre queste imprese modificate il motore viene ricostruito
+        """
+        if supabase is None:
+            url = os.getenv('SUPABASE_URL')
+            key = os.getenv('SUPABASE_KEY')
+            
+            if not url or not key:
+                raise ValueError("SUPABASE_URL e SUPABASE_KEY devono essere in .env")
+            
+            supabase = create_client(url, key)
+        
+        self.supabase = supabase
+        self.n_workers = n_workers
+        self.max_delta = max_delta
+        self._engine: Optional[Union[MatchEngine, ShardedMatcher]] = None
+        self.snapshot = ImpreseSnapshot(self.supabase)
+        self.cache = MatchCache()
+        self._bandi_index: Optional[BandiIndex] = None
+        self._locale: Optional[MatchEngine] = None
+        self._concorrenza: Optional[ConteggiConcorrenza] = None
+        self.alert = MotoreAlert(self.supabase)
         print("✅ Matcher connesso a Supabase")
     
     def save_bando(self, bando_strutturato) -> str:
@@ -33,9 +67,13 @@ class BandoMatcher:
         
         Returns:
             bando_id (str)
+        
+        Raises:
+            ValueError: categorie forse incomplete (parse in streaming fermato prima della fine)
         """
         
         print(f"\n💾 Salvataggio bando {bando_strutturato.cig}...")
+        richiedi_categorie_complete(bando_strutturato)
         
         # Prepara payload (solo campi esistenti)
         categorie_str = ', '.join([f"{cat.categoria} {cat.classifica}" for cat in bando_strutturato.categorie])
@@ -49,7 +87,14 @@ class BandoMatcher:
             'cpv_secondari': None,
             'tipologia': bando_strutturato.procedura.tipo,
             'regione': bando_strutturato.localizzazione.regione,
-            'provincia': bando_strutturato.localizzazione.provincia
+            'provincia': bando_strutturato.localizzazione.provincia,
+            # Campi usati dal matching inverso (load_bandi -> bando_da_riga)
+            'categorie_soa': [
+                {'codice': cat.categoria, 'classe': cat.classifica, 'prevalente': cat.prevalente, 'sios': cat.sios}
+                for cat in bando_strutturato.categorie
+            ],
+            'importo_base_gara': bando_strutturato.importi.totale_appalto,
+            'pnrr': bando_strutturato.pnrr
         }
         
         # Insert
@@ -57,139 +102,448 @@ class BandoMatcher:
             result = self.supabase.table('bandi').upsert(bando_data, on_conflict='cig').execute()
             bando_id = result.data[0]['id']
             print(f"  ✅ Bando salvato/aggiornato (ID: {bando_id})")
-            return bando_id
+            
+            if self._bandi_index is not None:
+                self._bandi_index.aggiungi(bando_id, bando_strutturato)
+            if self.cache.invalida(bando_strutturato.cig, hash_bando(bando_strutturato)):
+                print("  🧹 Match in cache invalidati (bando modificato)")
         
         except Exception as e:
             print(f"  ❌ Errore salvataggio: {e}")
             raise
+        
+        # Ricerche salvate: errori non bloccanti per il salvataggio
+        try:
+            self.alert.notifica_bando(bando_id, bando_strutturato.cig, RequisitiBando.da_bando(bando_strutturato))
+        except Exception as e:
+            print(f"  ⚠️ Alert non elaborati: {e}")
+        
+        return bando_id
+    
+    def load_imprese(self, refresh: bool = False):
+        """
+        Allinea lo snapshot imprese e prepara il motore di matching
+        
+        Lo snapshot locale (CACHE_DIR) viene aggiornato solo con le imprese
+        modificate. Poche modifiche (<= max_delta) vengono applicate al motore
+        e ai risultati in cache senza ricostruire; altrimenti il motore viene
+        ricostruito.
+        Con n_workers > 1 lo snapshot viene diviso in shard residenti
+        in processi worker separati.
+        
+        Args:
+            refresh: Controlla le modifiche su Supabase anche se il motore è pronto
+        
+        Returns:
+            MatchEngine (o ShardedMatcher) sulle imprese correnti
+        """
+        
+        if self._engine is not None and not refresh:
+            return self._engine
+        
+        versione = self.snapshot.versione
+        self.snapshot.sincronizza()
+        modifiche = self.snapshot.ultime_modifiche
+        
+        if self._engine is not None and self.snapshot.versione != versione \
+                and modifiche is not None and len(modifiche) <= self.max_delta:
+            self._applica_delta(modifiche, versione)
+        elif self._engine is None or self.snapshot.versione != versione:
+            imprese = self.snapshot.righe
+            if isinstance(self._engine, ShardedMatcher):
+                self._engine.close()
+            if self.n_workers > 1:
+                self._engine = ShardedMatcher(imprese, n_workers=self.n_workers)
+            else:
+                self._engine = MatchEngine(imprese)
+            print(f"  🗂️ Motore di matching pronto ({len(self._engine)} imprese, {self.n_workers} worker)")
+            self._locale = None
+            self._concorrenza = ConteggiConcorrenza(imprese)
+            self.cache.invalida_versione(self.snapshot.versione)
+        
+        return self._engine
+    
+    def _applica_delta(self, modifiche: List[Dict], vecchia_versione: str) -> None:
+        """
+        Applica poche imprese modificate senza ricostruire il motore
+        
+        Ogni impresa viene riscritta nel motore (indice, colonne, shard) e
+        rivalutata solo sui bandi aperti dell'indice bandi; i risultati in
+        cache calcolati sullo snapshot precedente vengono corretti sul posto
+        (rimozione/inserimento nella classifica) e portati alla nuova versione,
+        solo se il bando ricostruito dall'indice ha lo stesso hash della voce.
+        """
+        
+        modificate = {}
+        for impresa in modifiche:
+            self._engine.aggiorna(impresa)
+            self._concorrenza.aggiorna(impresa)
+            if self._locale is not None:
+                self._locale.aggiorna(impresa)
+            modificate[impresa['id']] = impresa
+        
+        index = self.load_bandi()
+        # Bandi aperti su cui ciascuna impresa è candidata (lookup sull'indice bandi)
+        candidati = {
+            impresa_id: {index.bandi[pos].cig for pos in index.totali(impresa)}
+            for impresa_id, impresa in modificate.items()
+        }
+        
+        def aggiorna(cig: str, hash_voce: str, parametri: str, risultati: List[Dict]) -> Optional[List[Dict]]:
+            bando = index.bando_per_cig(cig)
+            # La classifica va corretta sullo stesso bando su cui è stata calcolata:
+            # se la riga in DB non lo riproduce (hash diverso) si ricalcola da zero
+            if bando is None or hash_bando(bando) != hash_voce:
+                return None
+            return self._patch_risultati(bando, json.loads(parametri), risultati, modificate, candidati)
+        
+        aggiornate = self.cache.riallinea(vecchia_versione, self.snapshot.versione, aggiorna)
+        print(f"  ⚡ Delta applicato: {len(modificate)} imprese, {aggiornate} ricerche in cache aggiornate")
+    
+    def _patch_risultati(
+        self,
+        bando,
+        parametri: Dict,
+        risultati: List[Dict],
+        modificate: Dict[str, Dict],
+        candidati: Dict[str, set]
+    ) -> Optional[List[Dict]]:
+        """
+        Corregge una classifica in cache per le imprese modificate
+        
+        Returns:
+            Nuova classifica, o None se non ricostruibile senza ricalcolo
+            (un'impresa esce da un top-K pieno: manca la K+1-esima)
+        """
+        
+        top_k = parametri.get('top_k')
+        rimaste = [m for m in risultati if m['impresa_id'] not in modificate]
+        if top_k is not None and len(risultati) == top_k and len(rimaste) < len(risultati):
+            return None
+        
+        requisiti = RequisitiBando.da_bando(bando)
+        for impresa_id, impresa in modificate.items():
+            if bando.cig not in candidati[impresa_id]:
+                continue
+            if not e_candidata(bando, impresa, parametri.get('solo_regione', False), parametri.get('raggio_km')):
+                continue
+            score = requisiti.valuta(impresa)
+            if score['total'] > 0:
+                rimaste.append(voce_match(impresa, score))
+        
+        posizioni = self._engine.posizioni
+        rimaste.sort(key=lambda m: (-m['score']['total'], posizioni[m['impresa_id']]))
+        if top_k is not None:
+            rimaste = rimaste[:top_k]
+        return rimaste
+    
+    def aggiorna_impresa(self, impresa_id: str) -> List[Dict]:
+        """
+        Aggiornamento incrementale dopo la modifica di un profilo impresa
+        (es. nuove attestazioni da SOAParser.parse salvate su Supabase)
+        
+        Allinea lo snapshot (solo le righe modificate), riscrive l'impresa
+        nel motore, corregge le classifiche in cache e restituisce i bandi
+        aperti adatti all'impresa aggiornata.
+        
+        Returns:
+            Lista di bandi con match score (come find_matching_bandi)
+        """
+        
+        print(f"\n🔄 Aggiornamento impresa {impresa_id}...")
+        
+        self.load_imprese(refresh=True)
+        impresa = self.snapshot.imprese.get(impresa_id)
+        if impresa is None:
+            print("  ⚠️ Impresa non trovata")
+            return []
+        
+        return self.find_matching_bandi(impresa)
+    
+    def load_bandi(self, refresh: bool = False) -> BandiIndex:
+        """
+        Carica i bandi attivi e costruisce l'indice per il matching inverso
+        
+        I bandi sono letti a pagine con keyset pagination su id (come
+        ImpreseSnapshot): una sola select sarebbe troncata dal limite di
+        righe di PostgREST.
+        
+        Args:
+            refresh: Forza il ricaricamento da Supabase
+        
+        Returns:
+            BandiIndex sui bandi attivi
+        """
+        
+        if self._bandi_index is None or refresh:
+            index = BandiIndex()
+            for righe in self._pagine_bandi_attivi():
+                for riga in righe:
+                    index.aggiungi(riga['id'], bando_da_riga(riga))
+            self._bandi_index = index
+            print(f"  🗂️ Indice bandi costruito ({len(index)} bandi attivi)")
+        
+        return self._bandi_index
+    
+    def _pagine_bandi_attivi(self):
+        """Bandi attivi a pagine, keyset su id"""
+        pagina = self.snapshot.pagina
+        ultimo_id = None
+        while True:
+            query = self.supabase.table('bandi_attivi').select('*').order('id')
+            if ultimo_id is not None:
+                query = query.gt('id', ultimo_id)
+            righe = query.limit(pagina).execute().data
+            if not righe:
+                return
+            yield righe
+            if len(righe) < pagina:
+                return
+            ultimo_id = righe[-1]['id']
+    
+    def find_matching_bandi(
+        self,
+        impresa: Dict,
+        top_k: Optional[int] = None,
+        solo_regione: bool = False,
+        solo_importo: bool = False
+    ) -> List[Dict]:
+        """
+        Trova i bandi attivi adatti a un'impresa (matching inverso)
+        
+        Args:
+            impresa: Profilo impresa (formato tabella imprese)
+            top_k: Restituisce solo i migliori K bandi
+            solo_regione: Solo bandi nelle regioni operative dell'impresa
+            solo_importo: Solo bandi nel range di importo dell'impresa
+        
+        Returns:
+            Lista di bandi con match score (stesse regole di find_matching_imprese)
+        """
+        
+        index = self.load_bandi()
+        totali = index.totali(impresa, solo_regione=solo_regione, solo_importo=solo_importo)
+        
+        voci = [(totale, -pos) for pos, totale in totali.items() if totale > 0]
+        if top_k is not None:
+            voci = heapq.nlargest(top_k, voci)
+        else:
+            voci.sort(reverse=True)
+        
+        matches = []
+        for _, pos in voci:
+            bando = index.bandi[-pos]
+            score = self._calculate_match_score(bando, impresa)
+            matches.append({
+                'bando_id': index.bando_ids[-pos],
+                'cig': bando.cig,
+                'score': score,
+                'can_participate': score['total'] >= SOGLIA_PARTECIPAZIONE,
+                'semaforo': score['semaforo']['colore'],
+                'missing_requirements': score['missing']
+            })
+        
+        return matches
     
-    def find_matching_imprese(self, bando_strutturato) -> List[Dict]:
+    def find_matching_imprese(
+        self,
+        bando_strutturato,
+        solo_regione: bool = False,
+        top_k: Optional[int] = None,
+        raggio_km: Optional[float] = None
+    ) -> List[Dict]:
         """
         Trova imprese che possono partecipare al bando
         
+        I risultati sono in cache per (CIG, contenuto bando, versione snapshot
+        imprese): ricerche ripetute sullo stesso bando non ricalcolano il match.
+        
+        Args:
+            bando_strutturato: Bando parsed
+            solo_regione: Considera solo imprese operative nella regione del bando
+            top_k: Restituisce solo le migliori K imprese
+            raggio_km: Solo imprese con sede entro il raggio dalla provincia del bando
+        
         Returns:
             Lista di imprese con match score
         """
         
         print(f"\n🔍 Ricerca imprese per bando {bando_strutturato.cig}...")
+        # Prima della cache: un risultato salvato non rende completo questo bando
+        richiedi_categorie_complete(bando_strutturato)
+        
+        engine = self.load_imprese()
+        chiave = (
+            bando_strutturato.cig,
+            hash_bando(bando_strutturato),
+            self.snapshot.versione,
+            json.dumps({'solo_regione': solo_regione, 'top_k': top_k, 'raggio_km': raggio_km}, sort_keys=True)
+        )
+        
+        matches = self.cache.get(*chiave)
+        if matches is not None:
+            print(f"  ⚡ Match da cache: {len(matches)} imprese compatibili su {len(engine)}")
+            return matches
+        
+        matches = [
+            match for _, match
+            in engine.find(bando_strutturato, solo_regione=solo_regione, top_k=top_k, raggio_km=raggio_km)
+        ]
+        self.cache.put(*chiave, matches)
+        
+        print(f"  ✅ Match completato: {len(matches)} imprese compatibili su {len(engine)}")
         
-        # Step 1: Fetch tutte le imprese
-        result = self.supabase.table('imprese').select('*').execute()
-        imprese = result.data
+        return matches
+    
+    def find_rti(
+        self,
+        bando_strutturato,
+        top_k: int = 10,
+        max_membri: int = 3,
+        raggio_km: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Propone raggruppamenti (RTI) di 2-3 imprese che insieme coprono
+        tutte le categorie/classifiche richieste e l'importo del bando
         
-        print(f"  📋 Trovate {len(imprese)} imprese nel DB")
+        Args:
+            bando_strutturato: Bando parsed
+            top_k: Numero massimo di raggruppamenti
+            max_membri: 2 (solo coppie) o 3
+            raggio_km: Solo imprese con sede entro il raggio dalla provincia del bando
         
-        # Step 2: Match per ogni impresa
-        matches = []
+        Returns:
+            Lista di raggruppamenti (coppie prima delle terne, per qualità)
+        """
         
-        for impresa in imprese:
-            score = self._calculate_match_score(bando_strutturato, impresa)
-            
-            if score['total'] > 0:
-                matches.append({
-                    'impresa_id': impresa['id'],
-                    'ragione_sociale': impresa['ragione_sociale'],
-                    'score': score,
-                    'can_participate': score['total'] >= 70,  # Soglia 70%
-                    'missing_requirements': score['missing']
-                })
+        print(f"\n🤝 Ricerca RTI per bando {bando_strutturato.cig}...")
         
-        # Ordina per score
-        matches.sort(key=lambda x: x['score']['total'], reverse=True)
+        rti = RicercaRTI(self._motore_locale()).cerca(
+            bando_strutturato, top_k=top_k, max_membri=max_membri, raggio_km=raggio_km
+        )
         
-        print(f"  ✅ Match completato: {len(matches)} imprese compatibili")
+        print(f"  ✅ {len(rti)} raggruppamenti trovati")
         
-        return matches
+        return rti
     
-    def _calculate_match_score(self, bando, impresa) -> Dict:
+    def stima_concorrenza(self, bando_strutturato, solo_regione: bool = True) -> Dict:
         """
-        Calcola match score impresa vs bando
+        Stima dei concorrenti qualificati per un bando
         
-        Score breakdown:
-        - Categorie SOA: 50 punti
-        - Regione operativa: 20 punti
-        - Importo capacità: 20 punti
-        - Certificazioni: 10 punti
+        Usa i conteggi cumulativi per (categoria, classifica >= k, regione),
+        aggiornati a ogni import di imprese: costo O(#categorie), senza
+        scoring del registro.
+        
+        Args:
+            bando_strutturato: Bando parsed
+            solo_regione: Conta solo imprese operative nella regione del bando
+        
+        Returns:
+            Dict con qualificate (minimo sulle categorie), regione e per_categoria
         """
         
-        score = {
-            'total': 0,
-            'categorie': 0,
-            'regione': 0,
-            'importo': 0,
-            'certificazioni': 0,
-            'missing': []
-        }
+        self.load_imprese()
+        stima = self._concorrenza.stima(RequisitiBando.da_bando(bando_strutturato), solo_regione=solo_regione)
         
-        # 1. Check categorie SOA (50 punti)
-        attestazioni = impresa.get('attestazioni_soa', [])
-        if not attestazioni:
-            attestazioni = []
-        
-        # Normalizza classifica (I->I, II->II, III->III, etc)
-        def normalize_classifica(c):
-            """Converte numeri romani in uppercase"""
-            return c.upper() if c else ''
-        
-        categorie_bando = {f"{cat.categoria}_{normalize_classifica(cat.classifica)}" for cat in bando.categorie}
-        categorie_impresa = set()
-        
-        for att in attestazioni:
-            if isinstance(att, dict):
-                # Formato DB: {"codice": "OG1", "classe": "II"}
-                codice = att.get('codice', '')
-                classe = att.get('classe', '')
-                if codice and classe:
-                    categorie_impresa.add(f"{codice}_{classe}")
-        
-        if categorie_bando:
-            matched = len(categorie_bando & categorie_impresa)
-            total_required = len(categorie_bando)
-            score['categorie'] = int((matched / total_required) * 50)
-            
-            if matched < total_required:
-                missing_cat = categorie_bando - categorie_impresa
-                score['missing'].extend([f"Categoria {cat}" for cat in missing_cat])
-        else:
-            score['categorie'] = 50  # No categorie specificate = ok
+        print(f"  📊 {stima['qualificate']} imprese qualificate per il bando {bando_strutturato.cig}")
         
-        # 2. Check regione (20 punti)
-        regioni_impresa = impresa.get('regioni_operative', [])
-        if bando.localizzazione.regione in regioni_impresa:
-            score['regione'] = 20
-        else:
-            score['missing'].append(f"Opera in {bando.localizzazione.regione}")
+        return stima
+    
+    def find_avvalimento(
+        self,
+        bando_strutturato,
+        impresa: Dict,
+        top_k: int = 5,
+        raggio_km: float = RAGGIO_MASSIMO_KM
+    ) -> List[Dict]:
+        """
+        Imprese ausiliarie per le categorie del bando che mancano all'impresa
         
-        # 3. Check importo (20 punti)
-        importo_min = impresa.get('importo_min_interesse', 0)
-        importo_max = impresa.get('importo_max_capacita', 999999999)
-        importo_bando = bando.importi.totale_appalto
+        Servita dagli indici per categoria e per sede (nessuna scansione):
+        adatta a essere chiamata per ogni riga della vista di match.
         
-        if importo_min <= importo_bando <= importo_max:
-            score['importo'] = 20
-        else:
-            if importo_bando < importo_min:
-                score['missing'].append(f"Importo troppo basso (<€{importo_min:,.0f})")
-            else:
-                score['missing'].append(f"Importo troppo alto (>€{importo_max:,.0f})")
+        Args:
+            bando_strutturato: Bando parsed
+            impresa: Impresa concorrente (dict come in Supabase)
+            top_k: Ausiliarie per categoria mancante
+            raggio_km: Distanza massima della sede dalla provincia del bando
         
-        # 4. Certificazioni (10 punti bonus)
-        if bando.pnrr:
-            cert = impresa.get('certificazioni_possedute', [])
-            if 'ISO 9001' in cert or 'ISO 14001' in cert:
-                score['certificazioni'] = 10
-        else:
-            score['certificazioni'] = 10  # Non richieste
+        Returns:
+            Lista per categoria mancante con le ausiliarie più vicine
+        """
         
-        # Total
-        score['total'] = sum([
-            score['categorie'],
-            score['regione'],
-            score['importo'],
-            score['certificazioni']
-        ])
+        return RicercaAvvalimento(self._motore_locale()).cerca(
+            bando_strutturato, impresa, top_k=top_k, raggio_km=raggio_km
+        )
+    
+    def _motore_locale(self) -> MatchEngine:
+        """Motore completo nel processo corrente (con gli shard ne serve una copia locale)"""
+        engine = self.load_imprese()
+        if isinstance(engine, MatchEngine):
+            return engine
+        if self._locale is None:
+            self._locale = MatchEngine(self.snapshot.righe)
+        return self._locale
+    
+    def find_imprese_vicine(self, provincia: str, raggio_km: float) -> List[Dict]:
+        """
+        Imprese con sede entro `raggio_km` dal capoluogo di provincia
+        
+        Args:
+            provincia: Nome o sigla (es. "Cremona", "CR")
+            raggio_km: Raggio in km
+        
+        Returns:
+            Lista di imprese (impresa_id, ragione_sociale, provincia_sede, distanza_km)
+            ordinata per distanza
+        """
+        
+        engine = self.load_imprese()
+        return [voce for _, voce in engine.entro_raggio(provincia, raggio_km)]
+    
+    def match_many(self, bandi: List, top_k: int = 10, dimensione_blocco: int = 8192) -> List[List[Dict]]:
+        """
+        Match di molti bandi contro tutto il registro imprese in un solo passaggio
+        
+        Le imprese vengono caricate una volta; i punteggi bandi x imprese sono
+        calcolati come operazioni matriciali su blocchi di `dimensione_blocco`
+        imprese (memoria limitata a bandi x blocco).
+        
+        Args:
+            bandi: Lista di bandi parsed
+            top_k: Numero di imprese da restituire per bando
+            dimensione_blocco: Imprese per blocco di calcolo
+        
+        Returns:
+            Per ogni bando (stesso ordine), la lista top-K come find_matching_imprese
+        """
+        
+        print(f"\n🔍 Match batch: {len(bandi)} bandi, top {top_k}...")
+        
+        engine = self.load_imprese()
+        risultati = [
+            [match for _, match in matches]
+            for matches in engine.match_many(bandi, top_k=top_k, dimensione_blocco=dimensione_blocco)
+        ]
+        
+        print(f"  ✅ Match batch completato su {len(engine)} imprese")
+        
+        return risultati
+    
+    def _calculate_match_score(self, bando, impresa) -> Dict:
+        """
+        Calcola match score impresa vs bando
+        
+        Score breakdown:
+        - Categorie SOA: 50 punti (classifica posseduta >= richiesta)
+        - Regione operativa: 20 punti
+        - Importo capacità: 20 punti
+        - Certificazioni: 10 punti
+        
+        Include anche il semaforo legale (stesse regole di utils/semafori).
+        """
         
-        return score
+        return RequisitiBando.da_bando(bando).valuta(impresa)
 
 
 # ============================================================================
@@ -0,0 +1,228 @@
+"""
+Benchmark del matcher bandi-imprese (offline)
+
+Genera imprese e bandi sintetici (core.matching.synthetic) e misura
+find_matching_imprese e _calculate_match_score su registri di dimensione
+crescente, con un database locale al posto di Supabase: throughput,
+latenza p50/p99 e picco di memoria (tracemalloc) di caricamento + match.
+
+Uso:
+    cd src && python -m core.matching.benchmark
+    cd src && python -m core.matching.benchmark --dimensioni 1000 10000 --json bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import re
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from core.matching.bando_matcher import BandoMatcher
+from core.matching.match_cache import MatchCache
+from core.matching.snapshot import ImpreseSnapshot
+from core.matching.synthetic import genera_imprese, genera_bandi
+
+_FILTRO_SNAPSHOT = re.compile(
+    r'updated_at\.gt\."(?P<ts>[^"]*)",and\(updated_at\.eq\."[^"]*",id\.gt\."(?P<id>[^"]*)"\)'
+)
+
+
+class _QueryLocale:
+    """Sottoinsieme del query builder postgrest usato dal matcher"""
+
+    def __init__(self, righe: List[Dict]):
+        self._righe = righe
+        self._colonne: Optional[List[str]] = None
+        self._filtri: List[Callable[[Dict], bool]] = []
+        self._ordine: List[str] = []
+        self._limite: Optional[int] = None
+        self._scrittura: Optional[List[Dict]] = None
+
+    def select(self, colonne: str = '*', **kwargs):
+        if colonne != '*':
+            self._colonne = [c.strip() for c in colonne.split(',')]
+        return self
+
+    def order(self, colonna: str, **kwargs):
+        self._ordine.append(colonna)
+        return self
+
+    def eq(self, colonna: str, valore):
+        self._filtri.append(lambda r: r.get(colonna) == valore)
+        return self
+
+    def gt(self, colonna: str, valore):
+        self._filtri.append(lambda r: (r.get(colonna) or '') > valore)
+        return self
+
+    def or_(self, filtro: str):
+        # Solo il filtro keyset di ImpreseSnapshot
+        m = _FILTRO_SNAPSHOT.fullmatch(filtro)
+        if not m:
+            raise NotImplementedError(f"Filtro non supportato: {filtro}")
+        chiave = (m.group('ts'), m.group('id'))
+        self._filtri.append(lambda r: (r.get('updated_at') or '', r['id']) > chiave)
+        return self
+
+    def limit(self, n: int):
+        self._limite = n
+        return self
+
+    def upsert(self, dati: Dict, on_conflict: str = 'id', **kwargs):
+        for riga in self._righe:
+            if riga.get(on_conflict) == dati.get(on_conflict):
+                riga.update(dati)
+                self._scrittura = [riga]
+                return self
+        riga = dict(dati, id=dati.get('id') or f"{len(self._righe):08d}")
+        self._righe.append(riga)
+        self._scrittura = [riga]
+        return self
+
+    def insert(self, dati: Dict, **kwargs):
+        return self.upsert(dati)
+
+    def execute(self):
+        if self._scrittura is not None:
+            return SimpleNamespace(data=self._scrittura)
+
+        righe = [r for r in self._righe if all(f(r) for f in self._filtri)]
+        if self._ordine:
+            righe.sort(key=lambda r: tuple(r.get(c) or '' for c in self._ordine))
+        if self._limite is not None:
+            righe = righe[:self._limite]
+        if self._colonne:
+            righe = [{c: r.get(c) for c in self._colonne} for r in righe]
+        return SimpleNamespace(data=righe)
+
+
+class SupabaseLocale:
+    """Database in memoria con l'interfaccia `table(...)` del client Supabase"""
+
+    def __init__(self, tabelle: Optional[Dict[str, List[Dict]]] = None):
+        self.tabelle = tabelle or {}
+
+    def table(self, nome: str) -> _QueryLocale:
+        return _QueryLocale(self.tabelle.setdefault(nome, []))
+
+
+def _percentile(valori: List[float], p: float) -> float:
+    ordinati = sorted(valori)
+    return ordinati[min(len(ordinati) - 1, int(round(p * (len(ordinati) - 1))))]
+
+
+def _misura(nome: str, n_imprese: int, chiamate: List[Callable[[], object]], unita: int = 1) -> Dict:
+    """Esegue le chiamate una a una e riassume le latenze"""
+    tempi = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for chiamata in chiamate:
+            t0 = time.perf_counter()
+            chiamata()
+            tempi.append(time.perf_counter() - t0)
+
+    totale = sum(tempi)
+    return {
+        'scenario': nome,
+        'imprese': n_imprese,
+        'chiamate': len(tempi),
+        'throughput': len(tempi) * unita / totale if totale else float('inf'),
+        'p50_ms': _percentile(tempi, 0.50) * 1000,
+        'p99_ms': _percentile(tempi, 0.99) * 1000,
+    }
+
+
+def esegui(n_imprese: int, n_bandi: int = 30, n_coppie: int = 20_000, cartella: Optional[Path] = None) -> List[Dict]:
+    """Benchmark completo su un registro di `n_imprese` imprese"""
+    imprese = genera_imprese(n_imprese)
+    bandi = genera_bandi(n_bandi)
+    temporanea = cartella is None
+    cartella = Path(cartella or tempfile.mkdtemp(prefix="bench_matcher_"))
+
+    db = SupabaseLocale({'imprese': imprese})
+
+    def nuovo_matcher(nome: str) -> BandoMatcher:
+        matcher = BandoMatcher(supabase=db)
+        matcher.snapshot = ImpreseSnapshot(db, path=cartella / f"{nome}.jsonl.gz", pagina=10_000)
+        matcher.cache = MatchCache(cartella / f"match_{nome}")
+        return matcher
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Picco di memoria: snapshot + motore + un match completo (tracemalloc rallenta, run separato)
+        tracemalloc.start()
+        nuovo_matcher(f"picco_{n_imprese}").find_matching_imprese(bandi[0])
+        picco = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        t0 = time.perf_counter()
+        matcher = nuovo_matcher(f"imprese_{n_imprese}")
+        matcher.load_imprese()
+        caricamento = time.perf_counter() - t0
+
+    risultati = [
+        _misura(
+            "find_matching_imprese", n_imprese,
+            [lambda b=b: matcher.find_matching_imprese(b) for b in bandi]
+        ),
+        _misura(
+            "find_matching_imprese top_k=20", n_imprese,
+            [lambda b=b: matcher.find_matching_imprese(b, top_k=20) for b in bandi]
+        ),
+        _misura(
+            "find_matching_imprese (cache)", n_imprese,
+            [lambda b=b: matcher.find_matching_imprese(b) for b in bandi]
+        ),
+    ]
+
+    coppie = [(bandi[i % n_bandi], imprese[(i * 7919) % n_imprese]) for i in range(min(n_coppie, n_bandi * n_imprese))]
+    risultati.append(_misura(
+        "_calculate_match_score", n_imprese,
+        [lambda b=b, i=i: matcher._calculate_match_score(b, i) for b, i in coppie]
+    ))
+
+    for r in risultati:
+        r['caricamento_s'] = caricamento
+        r['picco_mb'] = picco / 1024 / 1024
+
+    matcher.cache.flush()
+    if temporanea:
+        shutil.rmtree(cartella, ignore_errors=True)
+    return risultati
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline del matcher")
+    parser.add_argument('--dimensioni', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="Numero di imprese per ciascun run")
+    parser.add_argument('--bandi', type=int, default=30, help="Bandi per scenario")
+    parser.add_argument('--coppie', type=int, default=20_000, help="Coppie per _calculate_match_score")
+    parser.add_argument('--json', type=Path, help="Salva i risultati in JSON (confronto tra versioni)")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("🧪 BENCHMARK MATCHER (offline, dati sintetici)")
+    print("="*70 + "\n")
+
+    tutti = []
+    for n in args.dimensioni:
+        risultati = esegui(n, n_bandi=args.bandi, n_coppie=args.coppie)
+        print(f"📊 {n:,} imprese - caricamento {risultati[0]['caricamento_s']:.2f}s - "
+              f"picco memoria {risultati[0]['picco_mb']:.1f} MB")
+        for r in risultati:
+            print(f"   {r['scenario']:<34} {r['throughput']:>12,.0f}/s   "
+                  f"p50 {r['p50_ms']:>9.3f} ms   p99 {r['p99_ms']:>9.3f} ms")
+        print()
+        tutti.extend(risultati)
+
+    if args.json:
+        args.json.write_text(json.dumps(tutti, indent=2), encoding='utf-8')
+        print(f"✅ Risultati salvati in {args.json}")
+
+
+if __name__ == "__main__":
+    main()
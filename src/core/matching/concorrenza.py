@@ -0,0 +1,107 @@
+"""
+Stima della concorrenza per bando (conteggi cumulativi)
+
+Per ogni (categoria, regione) si tiene un array di conteggi cumulativi
+sulle classifiche: conteggi[0] = imprese che possiedono la categoria,
+conteggi[k + 1] = imprese con classifica >= ORDINE_CLASSI[k].
+La stima per un bando costa O(#categorie) e non richiede lo scoring
+del registro; i conteggi si aggiornano impresa per impresa.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from core.matching.rules import ORDINE_CLASSI, RequisitiBando, ordinale_classe
+
+# Chiave regione per i conteggi nazionali
+TUTTE = '*'
+
+# Profilo di un'impresa nei conteggi: (codice -> ordinale massimo, regioni)
+Profilo = Tuple[Dict[str, int], Tuple[str, ...]]
+
+
+def _profilo(impresa: Dict) -> Profilo:
+    ordinali: Dict[str, int] = {}
+    for att in impresa.get('attestazioni_soa') or []:
+        if not isinstance(att, dict) or not (att.get('codice') and att.get('classe')):
+            continue
+        codice = att['codice']
+        ordinali[codice] = max(ordinali.get(codice, -1), ordinale_classe(att['classe']))
+    regioni = tuple(sorted(set(impresa.get('regioni_operative') or [])))
+    return ordinali, regioni
+
+
+class ConteggiConcorrenza:
+    """
+    Conteggi cumulativi imprese per (categoria, classifica >= k, regione)
+    """
+
+    def __init__(self, imprese: Optional[List[Dict]] = None):
+        self.conteggi: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0] * (len(ORDINE_CLASSI) + 1))
+        self.profili: Dict[str, Profilo] = {}
+        for impresa in imprese or []:
+            self.aggiorna(impresa)
+
+    def __len__(self) -> int:
+        return len(self.profili)
+
+    def _applica(self, profilo: Profilo, delta: int) -> None:
+        ordinali, regioni = profilo
+        for codice, ordinale in ordinali.items():
+            for regione in regioni + (TUTTE,):
+                conteggi = self.conteggi[(codice, regione)]
+                # Presenza della categoria + tutte le classifiche fino a quella posseduta
+                for k in range(ordinale + 2):
+                    conteggi[k] += delta
+
+    def aggiorna(self, impresa: Dict) -> None:
+        """Aggiunge o sostituisce un'impresa (import / modifica profilo)"""
+        self.rimuovi(impresa['id'])
+        profilo = _profilo(impresa)
+        self.profili[impresa['id']] = profilo
+        self._applica(profilo, +1)
+
+    def rimuovi(self, impresa_id: str) -> None:
+        profilo = self.profili.pop(impresa_id, None)
+        if profilo is not None:
+            self._applica(profilo, -1)
+
+    def conta(self, codice: str, classe: Optional[str], regione: Optional[str] = None) -> int:
+        """Imprese con la categoria a classifica >= classe (nella regione, se indicata)"""
+        conteggi = self.conteggi.get((codice, regione or TUTTE))
+        if conteggi is None:
+            return 0
+        return conteggi[ordinale_classe(classe) + 1]
+
+    def stima(self, requisiti: RequisitiBando, solo_regione: bool = True) -> Dict:
+        """
+        Stima dei concorrenti per un bando
+
+        `qualificate` è il minimo sulle categorie richieste: un limite
+        superiore alle imprese che coprono da sole tutte le categorie.
+
+        Returns:
+            Dict con qualificate, regione e conteggio per categoria
+        """
+        regione = requisiti.regione if solo_regione else None
+        per_categoria = [
+            {
+                'categoria': codice,
+                'classifica': classe,
+                'imprese': self.conta(codice, classe, regione),
+            }
+            for codice, classe, _ in requisiti.categorie
+        ]
+
+        if per_categoria:
+            qualificate = min(c['imprese'] for c in per_categoria)
+        else:
+            qualificate = len(self) if regione is None else self._in_regione(regione)
+
+        return {
+            'qualificate': qualificate,
+            'regione': regione,
+            'per_categoria': per_categoria,
+        }
+
+    def _in_regione(self, regione: str) -> int:
+        return sum(1 for _, regioni in self.profili.values() if regione in regioni)
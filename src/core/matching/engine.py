@@ -0,0 +1,192 @@
+"""
+Motore di matching in memoria (senza I/O)
+
+Combina indice inverso e vista colonnare di uno snapshot di imprese.
+Usato da BandoMatcher nel processo principale e dai worker del
+matching parallelo (ogni worker tiene il proprio shard).
+"""
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.matching.impresa_index import ImpreseIndex
+from core.matching.rules import (
+    RequisitiBando, SOGLIA_PARTECIPAZIONE,
+    PUNTI_REGIONE, PUNTI_IMPORTO, PUNTI_CERTIFICAZIONI
+)
+from core.matching.vector_engine import ImpreseMatrix
+
+
+def voce_match(impresa: Dict, score: Dict) -> Dict:
+    """Risultato di matching di un'impresa (formato di find_matching_imprese)"""
+    return {
+        'impresa_id': impresa['id'],
+        'ragione_sociale': impresa['ragione_sociale'],
+        'score': score,
+        'can_participate': score['total'] >= SOGLIA_PARTECIPAZIONE,
+        'semaforo': score['semaforo']['colore'],
+        'missing_requirements': score['missing']
+    }
+
+
+class MatchEngine:
+    """
+    Matching bando -> imprese su uno snapshot in memoria
+
+    I risultati sono coppie (posizione, match) dove la posizione è
+    l'indice dell'impresa nello snapshot: serve per ordinare a parità
+    di punteggio e per unire risultati di shard diversi.
+    """
+
+    def __init__(self, imprese: List[Dict]):
+        self.imprese = imprese
+        self.index = ImpreseIndex(imprese)
+        self.matrix = ImpreseMatrix(imprese)
+        self.posizioni: Dict[str, int] = {impresa['id']: pos for pos, impresa in enumerate(imprese)}
+
+    def __len__(self) -> int:
+        return len(self.imprese)
+
+    def aggiorna(self, impresa: Dict) -> int:
+        """
+        Aggiorna (o aggiunge in coda) un'impresa senza ricostruire il motore
+
+        Returns:
+            Posizione dell'impresa
+        """
+        pos = self.posizioni.setdefault(impresa['id'], len(self.imprese))
+        self.index.aggiorna(pos, impresa)
+        self.matrix.aggiorna_riga(pos, impresa)
+        return pos
+
+    def find(
+        self,
+        bando,
+        solo_regione: bool = False,
+        top_k: Optional[int] = None,
+        raggio_km: Optional[float] = None
+    ) -> List[Tuple[int, Dict]]:
+        """Imprese compatibili con il bando, ordinate per score"""
+        righe = np.asarray(
+            self.index.candidati(bando, solo_regione=solo_regione, raggio_km=raggio_km),
+            dtype=np.intp
+        )
+        if top_k is not None:
+            righe = self.top_k_righe(bando, righe, top_k)
+        return self.build_matches(bando, righe)
+
+    def match_many(
+        self,
+        bandi: List,
+        top_k: int = 10,
+        dimensione_blocco: int = 8192
+    ) -> List[List[Tuple[int, Dict]]]:
+        """
+        Top-K di molti bandi in un solo passaggio sulle imprese
+
+        I punteggi bandi x imprese sono calcolati come operazioni matriciali
+        su blocchi di `dimensione_blocco` imprese (memoria limitata a
+        bandi x blocco).
+        """
+        n = len(self.matrix)
+
+        # Migliori righe per bando: (posizioni, totali) aggiornati blocco per blocco
+        migliori = [(np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)) for _ in bandi]
+
+        for inizio in range(0, n, dimensione_blocco):
+            righe = np.arange(inizio, min(inizio + dimensione_blocco, n), dtype=np.intp)
+            totali, candidate = self.matrix.score_blocco(bandi, righe)
+            totali = np.where(candidate, totali, 0)
+
+            # Soglia K-esima per bando in un'unica partizione, poi solo le righe sopra soglia
+            if len(righe) > top_k:
+                soglie = -np.partition(-totali, top_k - 1, axis=1)[:, top_k - 1]
+                valide_blocco = (totali > 0) & (totali >= soglie[:, None])
+            else:
+                valide_blocco = totali > 0
+
+            for b in range(len(bandi)):
+                valide = valide_blocco[b]
+                posizioni = np.concatenate([migliori[b][0], righe[valide]])
+                punti = np.concatenate([migliori[b][1], totali[b][valide]])
+                scelte = np.lexsort((posizioni, -punti))[:top_k]
+                migliori[b] = (posizioni[scelte], punti[scelte])
+
+        return [
+            self.build_matches(bando, np.sort(posizioni))
+            for bando, (posizioni, _) in zip(bandi, migliori)
+        ]
+
+    def entro_raggio(self, provincia: str, raggio_km: float) -> List[Tuple[int, Dict]]:
+        """Imprese con sede entro il raggio, ordinate per distanza"""
+        distanze = {pos: round(km, 1) for pos, km in self.index.entro_raggio(provincia, raggio_km).items()}
+        return [
+            (pos, {
+                'impresa_id': self.imprese[pos]['id'],
+                'ragione_sociale': self.imprese[pos]['ragione_sociale'],
+                'provincia_sede': self.imprese[pos].get('provincia_sede'),
+                'distanza_km': km,
+            })
+            for pos, km in sorted(distanze.items(), key=lambda x: (x[1], x[0]))
+        ]
+
+    def build_matches(self, bando, righe: np.ndarray) -> List[Tuple[int, Dict]]:
+        """
+        Costruisce i risultati (ordinati per score) per le righe indicate
+
+        Lo score vettoriale seleziona le righe con punteggio > 0; breakdown,
+        requisiti mancanti e semaforo vengono dalle regole compilate.
+        """
+        totali = self.matrix.score(bando, righe)['total']
+        posizioni = [int(pos) for pos in righe[totali > 0]]
+        valutazioni = RequisitiBando.da_bando(bando).valuta_molte(self.imprese[pos] for pos in posizioni)
+        matches = []
+
+        for pos, score in zip(posizioni, valutazioni):
+            matches.append((pos, voce_match(self.imprese[pos], score)))
+
+        # Ordina per score (a parità, ordine dello snapshot)
+        matches.sort(key=lambda x: (-x[1]['score']['total'], x[0]))
+
+        return matches
+
+    def top_k_righe(self, bando, righe: np.ndarray, k: int) -> np.ndarray:
+        """
+        Seleziona le K righe migliori con heap limitato
+
+        Le righe vengono visitate per punteggio massimo raggiungibile
+        (categorie + regione 20 + importo 20 + certificazioni 10) decrescente:
+        appena il massimo raggiungibile è inferiore al K-esimo punteggio
+        nell'heap, le righe restanti vengono scartate senza calcolarle.
+
+        Returns:
+            Righe selezionate, in ordine di posizione nello snapshot
+        """
+        if k <= 0 or len(righe) == 0:
+            return righe[:0]
+
+        categorie = self.matrix.score_categorie(bando, righe)
+        massimo = categorie + PUNTI_REGIONE + PUNTI_IMPORTO + PUNTI_CERTIFICAZIONI
+
+        # Min-heap di (totale, -posizione): a parità vince la posizione minore
+        heap: List[Tuple[int, int]] = []
+
+        for livello in np.unique(massimo)[::-1]:
+            if len(heap) == k and livello < heap[0][0]:
+                break
+
+            blocco = righe[massimo == livello]
+            totali = self.matrix.score(bando, blocco)['total']
+            if len(blocco) > k:
+                migliori = np.lexsort((blocco, -totali))[:k]
+                blocco, totali = blocco[migliori], totali[migliori]
+
+            for pos, totale in zip(blocco.tolist(), totali.tolist()):
+                voce = (totale, -pos)
+                if len(heap) < k:
+                    heapq.heappush(heap, voce)
+                elif voce > heap[0]:
+                    heapq.heapreplace(heap, voce)
+
+        return np.array(sorted(-pos for _, pos in heap), dtype=np.intp)
@@ -0,0 +1,120 @@
+"""
+Indice inverso in memoria sulle imprese (categoria/classifica SOA, regione, sede)
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.geo.spatial_index import distanza_province, normalizza_provincia, province_entro
+from core.matching.rules import chiavi_bando, chiavi_impresa
+
+
+class ImpreseIndex:
+    """
+    Indice inverso sulle imprese caricate da Supabase
+
+    - per_categoria: (categoria, classifica) -> posizioni imprese
+      (un'impresa compare anche sotto le classifiche inferiori alla sua)
+    - per_regione: regione operativa -> posizioni imprese
+    - per_provincia: provincia della sede -> posizioni imprese (le query
+      di raggio passano dalla griglia spaziale delle province)
+
+    Le posizioni fanno riferimento a `self.imprese` (ordine del DB).
+    """
+
+    def __init__(self, imprese: List[Dict]):
+        self.imprese = imprese
+        self.per_categoria: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        self.per_regione: Dict[str, Set[int]] = defaultdict(set)
+        self.per_provincia: Dict[str, Set[int]] = defaultdict(set)
+
+        for pos, impresa in enumerate(imprese):
+            self._collega(pos, impresa)
+
+    def __len__(self) -> int:
+        return len(self.imprese)
+
+    def _collega(self, pos: int, impresa: Dict) -> None:
+        for chiave in chiavi_impresa(impresa):
+            self.per_categoria[chiave].add(pos)
+        for regione in impresa.get('regioni_operative') or []:
+            self.per_regione[regione].add(pos)
+        sede = normalizza_provincia(impresa.get('provincia_sede'))
+        if sede:
+            self.per_provincia[sede].add(pos)
+
+    def _scollega(self, pos: int, impresa: Dict) -> None:
+        for chiave in chiavi_impresa(impresa):
+            self.per_categoria[chiave].discard(pos)
+        for regione in impresa.get('regioni_operative') or []:
+            self.per_regione[regione].discard(pos)
+        sede = normalizza_provincia(impresa.get('provincia_sede'))
+        if sede:
+            self.per_provincia[sede].discard(pos)
+
+    def aggiorna(self, pos: int, impresa: Dict) -> None:
+        """Sostituisce l'impresa in `pos` (o la aggiunge in coda se pos == len)"""
+        if pos < len(self.imprese):
+            self._scollega(pos, self.imprese[pos])
+            self.imprese[pos] = impresa
+        else:
+            self.imprese.append(impresa)
+        self._collega(pos, impresa)
+
+    def entro_raggio(self, provincia: str, raggio_km: float) -> Dict[int, float]:
+        """
+        Imprese con sede entro `raggio_km` dal capoluogo di `provincia`
+
+        Returns:
+            Dict posizione -> distanza km
+        """
+        distanze = {}
+        for sede, km in province_entro(provincia, raggio_km):
+            for pos in self.per_provincia.get(sede, ()):
+                distanze[pos] = km
+        return distanze
+
+    def candidati(self, bando, solo_regione: bool = False, raggio_km: Optional[float] = None) -> List[int]:
+        """
+        Posizioni delle imprese da valutare per il bando
+
+        Un'impresa è candidata se possiede almeno una delle categorie
+        richieste (senza categorie il punteggio SOA non può superare
+        la soglia di partecipazione). Con `solo_regione` si interseca
+        anche con le imprese operative nella regione del bando, con
+        `raggio_km` con le imprese con sede entro il raggio dalla provincia
+        del bando.
+
+        Returns:
+            Posizioni ordinate come nel DB
+        """
+        richieste = chiavi_bando(bando)
+
+        if richieste:
+            posizioni = set()
+            for chiave in richieste:
+                posizioni |= self.per_categoria.get(chiave, set())
+        else:
+            posizioni = set(range(len(self.imprese)))
+
+        if solo_regione:
+            regione = bando.localizzazione.regione
+            posizioni &= self.per_regione.get(regione, set())
+
+        if raggio_km is not None:
+            posizioni &= self.entro_raggio(bando.localizzazione.provincia, raggio_km).keys()
+
+        return sorted(posizioni)
+
+
+def e_candidata(bando, impresa: Dict, solo_regione: bool = False, raggio_km: Optional[float] = None) -> bool:
+    """Stesso criterio di ImpreseIndex.candidati, per una singola impresa"""
+    richieste = chiavi_bando(bando)
+    if richieste and not richieste & chiavi_impresa(impresa):
+        return False
+    if solo_regione and bando.localizzazione.regione not in (impresa.get('regioni_operative') or []):
+        return False
+    if raggio_km is not None:
+        km = distanza_province(impresa.get('provincia_sede'), bando.localizzazione.provincia)
+        if km is None or km > raggio_km:
+            return False
+    return True
@@ -0,0 +1,265 @@
+"""
+Cache dei risultati di matching bando -> imprese
+
+Chiave: (CIG, hash del contenuto del bando, versione dello snapshot imprese).
+In memoria con eviction LRU; su disco in CACHE_DIR/match, un file JSON
+per CIG. Un risultato è valido solo se hash e versione coincidono:
+- un bando salvato con contenuto diverso invalida le voci del suo CIG
+- un nuovo snapshot imprese (updated_at avanzato) invalida tutte le voci
+
+La scrittura su disco di una classifica (decine di migliaia di imprese)
+non avviene nella ricerca: `put` aggiorna la memoria e accoda il file a
+un thread di scrittura, che scrive solo l'ultima versione di ogni CIG.
+`flush()` attende le scritture in coda.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core.config import CACHE_DIR
+from core.matching.rules import chiave_classe
+
+
+def hash_bando(bando) -> str:
+    """SHA-256 dei campi del bando che determinano il matching"""
+    contenuto = {
+        'cig': bando.cig,
+        'categorie': sorted(
+            [cat.categoria, chiave_classe(cat.classifica)] for cat in bando.categorie
+        ),
+        'regione': bando.localizzazione.regione,
+        'provincia': bando.localizzazione.provincia,
+        'importo': float(bando.importi.totale_appalto or 0),
+        'pnrr': bool(bando.pnrr),
+    }
+    dati = json.dumps(contenuto, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(dati.encode('utf-8')).hexdigest()
+
+
+class MatchCache:
+    """
+    Cache LRU (memoria) + persistente (disco) dei risultati per CIG
+
+    Ogni CIG conserva i risultati per parametro di ricerca
+    (es. solo_regione/top_k) calcolati sullo stesso bando e snapshot.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_voci: int = 256, scrittura_differita: bool = True):
+        """
+        Args:
+            path: Cartella dei file (default: CACHE_DIR/match)
+            max_voci: CIG tenuti in memoria
+            scrittura_differita: Scrive i file in un thread separato (False: subito)
+        """
+        self.path = Path(path) if path else CACHE_DIR / "match"
+        self.max_voci = max_voci
+        self._voci: "OrderedDict[str, Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+        # CIG -> voce da scrivere; _lock_file serializza scritture e rimozioni dei file
+        self._in_coda: Dict[str, Dict] = {}
+        self._lock_coda = threading.Lock()
+        self._lock_file = threading.Lock()
+        self._scrittore = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="match-cache") if scrittura_differita else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._voci)
+
+    def _file(self, cig: str) -> Path:
+        nome = hashlib.sha1(cig.encode('utf-8')).hexdigest()
+        return self.path / f"{nome}.json"
+
+    def _voce(self, cig: str) -> Optional[Dict]:
+        """Voce del CIG dalla memoria o, in mancanza, dal disco"""
+        voce = self._voci.get(cig)
+        if voce is not None:
+            self._voci.move_to_end(cig)
+            return voce
+
+        with self._lock_coda:
+            voce = self._in_coda.get(cig)
+        if voce is not None:
+            self._memorizza(cig, voce)
+            return voce
+
+        file = self._file(cig)
+        if not file.exists():
+            return None
+        try:
+            voce = json.loads(file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            file.unlink(missing_ok=True)
+            return None
+
+        self._memorizza(cig, voce)
+        return voce
+
+    def _memorizza(self, cig: str, voce: Dict) -> None:
+        self._voci[cig] = voce
+        self._voci.move_to_end(cig)
+        while len(self._voci) > self.max_voci:
+            self._voci.popitem(last=False)
+
+    def get(self, cig: str, hash_contenuto: str, versione: str, parametri: str) -> Optional[List[Dict]]:
+        """Risultati in cache (copia della lista), None se assenti o non più validi"""
+        voce = self._voce(cig) if cig else None
+        if voce is None or voce['hash'] != hash_contenuto or voce['versione'] != versione:
+            self.misses += 1
+            return None
+
+        risultati = voce['risultati'].get(parametri)
+        if risultati is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Chi ordina o taglia la lista non deve toccare la classifica in cache
+        return list(risultati)
+
+    def put(self, cig: str, hash_contenuto: str, versione: str, parametri: str, risultati: List[Dict]) -> None:
+        """Salva i risultati (sostituisce la voce se bando o snapshot sono cambiati)"""
+        if not cig:
+            return
+
+        voce = self._voce(cig)
+        if voce is None or voce['hash'] != hash_contenuto or voce['versione'] != versione:
+            voce = {'cig': cig, 'hash': hash_contenuto, 'versione': versione, 'risultati': {}}
+        voce['risultati'][parametri] = list(risultati)
+        self._memorizza(cig, voce)
+
+        # Copia del dict dei risultati: la voce in memoria può cambiare prima della scrittura
+        copia = {**voce, 'risultati': dict(voce['risultati'])}
+        if self._scrittore is None:
+            self._scrivi(cig, copia)
+            return
+        with self._lock_coda:
+            self._in_coda[cig] = copia
+        self._scrittore.submit(self._scrivi_in_coda, cig)
+
+    def _scrivi_in_coda(self, cig: str) -> None:
+        """Eseguita nel thread di scrittura: solo l'ultima voce accodata per il CIG"""
+        with self._lock_file:
+            with self._lock_coda:
+                voce = self._in_coda.pop(cig, None)
+            if voce is not None:
+                self._scrivi(cig, voce)
+
+    def _scrivi(self, cig: str, voce: Dict) -> None:
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            file = self._file(cig)
+            tmp = file.with_suffix('.tmp')
+            tmp.write_text(json.dumps(voce, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+            tmp.replace(file)
+        except OSError as e:
+            # La cache su disco è un'ottimizzazione: la voce resta in memoria
+            print(f"⚠️ Cache match non salvata per {cig}: {e}")
+
+    def flush(self) -> None:
+        """Attende che le voci accodate siano scritte su disco"""
+        if self._scrittore is not None:
+            self._scrittore.submit(lambda: None).result()
+
+    def invalida(self, cig: str, hash_contenuto: Optional[str] = None) -> bool:
+        """
+        Rimuove le voci del CIG (se hash_contenuto è dato, solo se diverso)
+
+        Returns:
+            True se qualcosa è stato rimosso
+        """
+        if not cig:
+            return False
+
+        voce = self._voce(cig)
+        if voce is None or (hash_contenuto is not None and voce['hash'] == hash_contenuto):
+            return False
+
+        self._voci.pop(cig, None)
+        with self._lock_file:
+            with self._lock_coda:
+                self._in_coda.pop(cig, None)
+            self._file(cig).unlink(missing_ok=True)
+        return True
+
+    def riallinea(
+        self,
+        vecchia: str,
+        nuova: str,
+        aggiorna: Callable[[str, str, str, List[Dict]], Optional[List[Dict]]]
+    ) -> int:
+        """
+        Porta le voci calcolate sullo snapshot `vecchia` alla versione `nuova`
+
+        `aggiorna(cig, hash, parametri, risultati)` restituisce i risultati
+        corretti (None se non ricostruibili: quella ricerca viene scartata);
+        `hash` è il contenuto del bando su cui la voce è stata calcolata.
+        Le voci di altre versioni vengono rimosse.
+
+        Returns:
+            Numero di ricerche aggiornate
+        """
+        aggiornate = 0
+        self.flush()
+        self._voci.clear()
+        if not self.path.exists():
+            return 0
+
+        for file in self.path.glob('*.json'):
+            try:
+                voce = json.loads(file.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                voce = None
+            if voce is None or voce.get('versione') != vecchia or not voce.get('cig'):
+                file.unlink(missing_ok=True)
+                continue
+
+            risultati = {}
+            for parametri, vecchi in voce['risultati'].items():
+                nuovi = aggiorna(voce['cig'], voce['hash'], parametri, vecchi)
+                if nuovi is not None:
+                    risultati[parametri] = nuovi
+                    aggiornate += 1
+            if not risultati:
+                file.unlink(missing_ok=True)
+                continue
+
+            voce.update(versione=nuova, risultati=risultati)
+            tmp = file.with_suffix('.tmp')
+            tmp.write_text(json.dumps(voce, ensure_ascii=False), encoding='utf-8')
+            tmp.replace(file)
+
+        return aggiornate
+
+    def invalida_versione(self, versione: str) -> int:
+        """Rimuove le voci calcolate su uno snapshot imprese diverso"""
+        rimosse = 0
+        self.flush()
+        for cig in [c for c, v in self._voci.items() if v['versione'] != versione]:
+            del self._voci[cig]
+
+        if self.path.exists():
+            for file in self.path.glob('*.json'):
+                try:
+                    voce = json.loads(file.read_text(encoding='utf-8'))
+                    valida = voce.get('versione') == versione
+                except (OSError, ValueError):
+                    valida = False
+                if not valida:
+                    file.unlink(missing_ok=True)
+                    rimosse += 1
+
+        return rimosse
+
+    def svuota(self) -> None:
+        """Svuota memoria e disco"""
+        self.flush()
+        self._voci.clear()
+        if self.path.exists():
+            for file in self.path.glob('*.json'):
+                file.unlink(missing_ok=True)
@@ -0,0 +1,181 @@
+"""
+Matching parallelo su shard di imprese (ProcessPoolExecutor)
+
+Lo snapshot viene diviso in shard contigui; ogni shard vive in un proprio
+processo worker (un executor da 1 worker per shard) che costruisce il suo
+MatchEngine all'avvio e lo mantiene tra una chiamata e l'altra.
+I top-K dei singoli shard vengono uniti nel processo principale.
+
+Benchmark: cd src && python -m core.matching.parallel [n_imprese] [n_bandi]
+"""
+import bisect
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core.matching.engine import MatchEngine
+
+# Stato del processo worker: shard residente
+_ENGINE: Optional[MatchEngine] = None
+
+
+def _init_shard(imprese: List[Dict]) -> None:
+    global _ENGINE
+    _ENGINE = MatchEngine(imprese)
+
+
+def _pronto() -> int:
+    return len(_ENGINE)
+
+
+def _find_shard(bando, solo_regione: bool, top_k: Optional[int], raggio_km: Optional[float]) -> List[Tuple[int, Dict]]:
+    return _ENGINE.find(bando, solo_regione=solo_regione, top_k=top_k, raggio_km=raggio_km)
+
+
+def _aggiorna_shard(impresa: Dict) -> int:
+    return _ENGINE.aggiorna(impresa)
+
+
+def _entro_raggio_shard(provincia: str, raggio_km: float) -> List[Tuple[int, Dict]]:
+    return _ENGINE.entro_raggio(provincia, raggio_km)
+
+
+def _match_many_shard(bandi: List, top_k: int, dimensione_blocco: int) -> List[List[Tuple[int, Dict]]]:
+    return _ENGINE.match_many(bandi, top_k=top_k, dimensione_blocco=dimensione_blocco)
+
+
+def _unisci(parziali: List[List[Tuple[int, Dict]]], offsets: List[int], top_k: Optional[int]) -> List[Tuple[int, Dict]]:
+    """Merge dei risultati ordinati degli shard (posizioni riportate allo snapshot globale)"""
+    flussi = [
+        [(offset + pos, match) for pos, match in risultati]
+        for risultati, offset in zip(parziali, offsets)
+    ]
+    uniti = heapq.merge(*flussi, key=lambda x: (-x[1]['score']['total'], x[0]))
+    if top_k is not None:
+        return [voce for _, voce in zip(range(top_k), uniti)]
+    return list(uniti)
+
+
+class ShardedMatcher:
+    """
+    Stessa interfaccia di MatchEngine, con gli shard in processi separati
+    """
+
+    def __init__(self, imprese: List[Dict], n_workers: Optional[int] = None):
+        n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(imprese) or 1))
+        dimensione = -(-len(imprese) // n_workers)
+
+        self.n = len(imprese)
+        self.posizioni: Dict[str, int] = {impresa['id']: pos for pos, impresa in enumerate(imprese)}
+        self.offsets: List[int] = []
+        self._executors: List[ProcessPoolExecutor] = []
+
+        for inizio in range(0, max(self.n, 1), max(dimensione, 1)):
+            shard = imprese[inizio:inizio + dimensione]
+            self.offsets.append(inizio)
+            self._executors.append(ProcessPoolExecutor(
+                max_workers=1,
+                initializer=_init_shard,
+                initargs=(shard,)
+            ))
+
+        # Avvia tutti i worker (costruzione degli shard in parallelo)
+        for future in [ex.submit(_pronto) for ex in self._executors]:
+            future.result()
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def n_workers(self) -> int:
+        return len(self._executors)
+
+    def find(
+        self,
+        bando,
+        solo_regione: bool = False,
+        top_k: Optional[int] = None,
+        raggio_km: Optional[float] = None
+    ) -> List[Tuple[int, Dict]]:
+        futures = [ex.submit(_find_shard, bando, solo_regione, top_k, raggio_km) for ex in self._executors]
+        return _unisci([f.result() for f in futures], self.offsets, top_k)
+
+    def entro_raggio(self, provincia: str, raggio_km: float) -> List[Tuple[int, Dict]]:
+        futures = [ex.submit(_entro_raggio_shard, provincia, raggio_km) for ex in self._executors]
+        flussi = [
+            [(offset + pos, voce) for pos, voce in f.result()]
+            for f, offset in zip(futures, self.offsets)
+        ]
+        return list(heapq.merge(*flussi, key=lambda x: (x[1]['distanza_km'], x[0])))
+
+    def match_many(
+        self,
+        bandi: List,
+        top_k: int = 10,
+        dimensione_blocco: int = 8192
+    ) -> List[List[Tuple[int, Dict]]]:
+        futures = [ex.submit(_match_many_shard, bandi, top_k, dimensione_blocco) for ex in self._executors]
+        per_shard = [f.result() for f in futures]
+        return [
+            _unisci([risultati[b] for risultati in per_shard], self.offsets, top_k)
+            for b in range(len(bandi))
+        ]
+
+    def aggiorna(self, impresa: Dict) -> int:
+        """Aggiorna l'impresa nel suo shard (le nuove vanno in coda all'ultimo)"""
+        pos = self.posizioni.get(impresa['id'])
+        if pos is None:
+            pos = self.posizioni[impresa['id']] = self.n
+            self.n += 1
+        shard = bisect.bisect_right(self.offsets, pos) - 1
+        self._executors[shard].submit(_aggiorna_shard, impresa).result()
+        return pos
+
+    def close(self) -> None:
+        for ex in self._executors:
+            ex.shutdown()
+        self._executors = []
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from core.matching.synthetic import genera_imprese, genera_bandi
+
+    print("\n" + "="*70)
+    print("🧪 BENCHMARK MATCHING PARALLELO")
+    print("="*70 + "\n")
+
+    n_imprese = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_bandi = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    imprese = genera_imprese(n_imprese)
+    bandi = genera_bandi(n_bandi)
+
+    print(f"Imprese: {n_imprese:,} - Bandi: {n_bandi} - CPU: {os.cpu_count()}\n")
+
+    n_cpu = os.cpu_count() or 1
+    livelli = sorted({2 ** i for i in range(n_cpu.bit_length()) if 2 ** i <= n_cpu} | {n_cpu})
+
+    riferimento = None
+    tempo_base = None
+    for workers in livelli:
+        matcher = ShardedMatcher(imprese, n_workers=workers)
+        matcher.match_many(bandi[:1])  # warm-up
+
+        t0 = time.perf_counter()
+        risultati = matcher.match_many(bandi, top_k=10)
+        tempo = time.perf_counter() - t0
+        matcher.close()
+
+        ids = [[m['impresa_id'] for _, m in r] for r in risultati]
+        riferimento = riferimento or ids
+        assert ids == riferimento, "risultati diversi tra numero di worker"
+
+        tempo_base = tempo_base or tempo
+        print(f"Workers {workers:3d}: {tempo*1000:9.1f} ms   speedup {tempo_base / tempo:5.2f}x")
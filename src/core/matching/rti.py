@@ -0,0 +1,282 @@
+"""
+Ricerca di raggruppamenti temporanei di imprese (RTI) per un bando
+
+Per i bandi con più categorie che nessuna impresa copre da sola si cercano
+coppie e terne di imprese che insieme coprono ogni categoria/classifica
+richiesta (RTI di tipo verticale: ogni categoria coperta da un membro con
+classifica sufficiente) e l'importo (somma delle capacità).
+
+Set-cover su bitset:
+- ogni impresa è ridotta a una maschera di bit delle categorie richieste
+  che copre; le imprese con la stessa maschera sono intercambiabili e
+  vengono raggruppate, ordinate per qualità (regione/distanza +
+  certificazioni, come nello scoring)
+- si enumerano le combinazioni di maschere (2 o 3) la cui unione è
+  completa e in cui ogni membro porta almeno una categoria
+- branch-and-bound: combinazioni e membri sono visitati per qualità
+  massima raggiungibile decrescente e scartati appena non possono
+  superare il K-esimo raggruppamento già trovato
+
+Benchmark: cd src && python -m core.matching.rti [n_imprese]
+"""
+import heapq
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.matching.engine import MatchEngine
+from core.matching.rules import chiavi_bando, chiave_classe
+
+# Voce di un gruppo: (qualità, capacità, posizione)
+Voce = Tuple[int, float, int]
+
+
+class RicercaRTI:
+    """
+    Ricerca RTI sull'indice e sulla vista colonnare di un MatchEngine
+    """
+
+    def __init__(self, engine: MatchEngine, max_per_maschera: int = 200):
+        self.engine = engine
+        # Imprese considerate per maschera (le migliori per qualità/capacità)
+        self.max_per_maschera = max_per_maschera
+
+    def cerca(
+        self,
+        bando,
+        top_k: int = 10,
+        max_membri: int = 3,
+        raggio_km: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Migliori raggruppamenti che coprono tutte le categorie del bando
+
+        Le coppie precedono le terne; a parità di membri vince la qualità
+        media più alta.
+
+        Args:
+            bando: Bando parsed
+            top_k: Numero massimo di raggruppamenti
+            max_membri: 2 (solo coppie) o 3
+            raggio_km: Solo imprese con sede entro il raggio dalla provincia del bando
+
+        Returns:
+            Lista di raggruppamenti (membri con ruolo e categorie coperte)
+        """
+        richieste = sorted(chiavi_bando(bando))
+        if len(richieste) < 2 or top_k <= 0:
+            return []
+
+        completa = (1 << len(richieste)) - 1
+        gruppi = self._gruppi(bando, richieste, raggio_km)
+        importo = bando.importi.totale_appalto or 0
+
+        trovati: List[Tuple[int, Tuple[int, ...]]] = []
+        for n_membri in range(2, max(2, min(max_membri, 3)) + 1):
+            mancano = top_k - len(trovati)
+            if mancano <= 0:
+                break
+            trovati.extend(self._combinazioni(gruppi, completa, n_membri, importo, mancano))
+
+        return [self._descrivi(bando, richieste, posizioni, qualita) for qualita, posizioni in trovati]
+
+    def _gruppi(self, bando, richieste: List[Tuple[str, str]], raggio_km: Optional[float]) -> Dict[int, List[Voce]]:
+        """Imprese raggruppate per maschera di copertura (escluse quelle che coprono tutto)"""
+        index = self.engine.index
+        maschere: Dict[int, int] = defaultdict(int)
+        for bit, chiave in enumerate(richieste):
+            for pos in index.per_categoria.get(chiave, ()):
+                maschere[pos] |= 1 << bit
+
+        if raggio_km is not None:
+            vicine = index.entro_raggio(bando.localizzazione.provincia, raggio_km)
+            maschere = {pos: m for pos, m in maschere.items() if pos in vicine}
+
+        completa = (1 << len(richieste)) - 1
+        posizioni = np.fromiter((p for p, m in maschere.items() if m != completa), dtype=np.intp)
+        if len(posizioni) == 0:
+            return {}
+
+        matrix = self.engine.matrix
+        componenti = matrix.score(bando, posizioni)
+        qualita = (componenti['regione'] + componenti['certificazioni']).tolist()
+        capacita = matrix.importo_max[posizioni].tolist()
+
+        gruppi: Dict[int, List[Voce]] = defaultdict(list)
+        for pos, q, cap in zip(posizioni.tolist(), qualita, capacita):
+            gruppi[maschere[pos]].append((q, cap, pos))
+
+        for maschera, voci in gruppi.items():
+            voci.sort(key=lambda v: (-v[0], -v[1], v[2]))
+            del voci[self.max_per_maschera:]
+        return gruppi
+
+    def _combinazioni(
+        self,
+        gruppi: Dict[int, List[Voce]],
+        completa: int,
+        n_membri: int,
+        importo: float,
+        k: int
+    ) -> List[Tuple[int, Tuple[int, ...]]]:
+        """
+        Top-K raggruppamenti di `n_membri` imprese (branch-and-bound)
+
+        Returns:
+            Lista (qualità totale, posizioni) ordinata per qualità decrescente
+        """
+        maschere = sorted(gruppi)
+        migliore = {m: gruppi[m][0][0] for m in maschere}
+        capienza = {m: max(v[1] for v in gruppi[m]) for m in maschere}
+
+        # Combinazioni di maschere che coprono tutto, con ogni membro necessario:
+        # l'ultima maschera si sceglie solo tra quelle che contengono i bit mancanti
+        sovrainsiemi: Dict[int, List[int]] = {}
+
+        def coprono(mancanti: int) -> List[int]:
+            if mancanti not in sovrainsiemi:
+                sovrainsiemi[mancanti] = [m for m in maschere if m & mancanti == mancanti]
+            return sovrainsiemi[mancanti]
+
+        candidate = []
+        for prefisso in combinations(maschere, n_membri - 1):
+            unione = 0
+            for m in prefisso:
+                unione |= m
+            for ultima in coprono(completa & ~unione):
+                combo = prefisso + (ultima,)
+                if ultima <= prefisso[-1] or not _minimale(combo):
+                    continue
+                if sum(capienza[m] for m in combo) < importo:
+                    continue
+                candidate.append((sum(migliore[m] for m in combo), combo))
+        candidate.sort(key=lambda x: -x[0])
+
+        # Min-heap di (qualità, -posizioni): a parità vincono le posizioni minori
+        heap: List[Tuple[int, Tuple[int, ...]]] = []
+
+        def soglia() -> float:
+            return heap[0][0] if len(heap) == k else -1
+
+        def registra(qualita: int, posizioni: Tuple[int, ...]) -> None:
+            voce = (qualita, tuple(-p for p in sorted(posizioni)))
+            if len(heap) < k:
+                heapq.heappush(heap, voce)
+            elif voce > heap[0]:
+                heapq.heapreplace(heap, voce)
+
+        # Potature: qualità massima raggiungibile <= soglia, oppure capacità
+        # massima raggiungibile < importo
+        def visita(combo: Tuple[int, ...], livello: int, qualita: int, capacita: float, posizioni: Tuple[int, ...]) -> None:
+            voci = gruppi[combo[livello]]
+            resto = sum(migliore[m] for m in combo[livello + 1:])
+            capienza_resto = sum(capienza[m] for m in combo[livello + 1:])
+            ultimo = livello == len(combo) - 1
+            for q, cap, pos in voci:
+                if qualita + q + resto <= soglia():
+                    break
+                if capacita + cap + capienza_resto < importo:
+                    continue
+                if ultimo:
+                    if capacita + cap >= importo:
+                        registra(qualita + q, posizioni + (pos,))
+                else:
+                    visita(combo, livello + 1, qualita + q, capacita + cap, posizioni + (pos,))
+
+        for massimo, combo in candidate:
+            if massimo <= soglia():
+                break
+            visita(combo, 0, 0, 0.0, ())
+
+        risultati = sorted(heap, reverse=True)
+        return [(qualita, tuple(sorted(-p for p in neg))) for qualita, neg in risultati]
+
+    def _descrivi(self, bando, richieste: List[Tuple[str, str]], posizioni: Tuple[int, ...], qualita: int) -> Dict:
+        """Raggruppamento con ruoli (mandataria sulla categoria prevalente) e coperture"""
+        imprese = self.engine.imprese
+        matrix = self.engine.matrix
+        index = self.engine.index
+
+        prevalente = next(
+            (cat for cat in bando.categorie if getattr(cat, 'prevalente', False)),
+            bando.categorie[0]
+        )
+        chiave_prevalente = (prevalente.categoria, chiave_classe(prevalente.classifica))
+
+        membri = []
+        for pos in posizioni:
+            coperte = [c for c in richieste if pos in index.per_categoria.get(c, ())]
+            membri.append({
+                'impresa_id': imprese[pos]['id'],
+                'ragione_sociale': imprese[pos]['ragione_sociale'],
+                'categorie_coperte': [f"{codice} {classe}".strip() for codice, classe in coperte],
+                'capacita': float(matrix.importo_max[pos]),
+                'prevalente': chiave_prevalente in coperte,
+            })
+
+        # Mandataria: chi copre la prevalente con la capacità maggiore
+        mandataria = max(membri, key=lambda m: (m['prevalente'], m['capacita']))
+        for membro in membri:
+            membro['ruolo'] = 'mandataria' if membro is mandataria else 'mandante'
+            del membro['prevalente']
+        membri.sort(key=lambda m: m['ruolo'] != 'mandataria')
+
+        return {
+            'membri': membri,
+            'n_membri': len(membri),
+            'qualita_media': round(qualita / len(membri), 1),
+            'importo_coperto': sum(m['capacita'] for m in membri),
+        }
+
+
+def _minimale(combo: Tuple[int, ...]) -> bool:
+    """Ogni maschera porta almeno un bit non coperto dalle altre"""
+    for i, m in enumerate(combo):
+        altre = 0
+        for j, altra in enumerate(combo):
+            if j != i:
+                altre |= altra
+        if m & ~altre == 0:
+            return False
+    return True
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from types import SimpleNamespace
+
+    from core.matching.synthetic import genera_imprese
+
+    print("\n" + "="*70)
+    print("🧪 BENCHMARK RICERCA RTI")
+    print("="*70 + "\n")
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    engine = MatchEngine(genera_imprese(n))
+    ricerca = RicercaRTI(engine)
+
+    richieste = [('OG1', 'IV'), ('OG11', 'III'), ('OS30', 'II'), ('OS28', 'II'), ('OG3', 'I')]
+    for n_categorie in range(2, len(richieste) + 1):
+        bando = SimpleNamespace(
+            cig=f"RTI{n_categorie}",
+            categorie=[SimpleNamespace(categoria=c, classifica=k) for c, k in richieste[:n_categorie]],
+            localizzazione=SimpleNamespace(regione='Lombardia', provincia='Cremona'),
+            importi=SimpleNamespace(totale_appalto=4_000_000.0),
+            pnrr=True,
+        )
+        t0 = time.perf_counter()
+        rti = ricerca.cerca(bando, top_k=10)
+        tempo = time.perf_counter() - t0
+        migliore = rti[0] if rti else None
+        descrizione = (
+            " + ".join(f"{m['ragione_sociale']} ({', '.join(m['categorie_coperte'])})" for m in migliore['membri'])
+            if migliore else "nessun RTI"
+        )
+        print(f"{n_categorie} categorie: {len(rti):2d} RTI in {tempo*1000:7.1f} ms - {descrizione}")
@@ -0,0 +1,261 @@
+"""
+Motore unico di ammissibilità bando/impresa
+
+Le regole di BandoMatcher (punteggio) e di utils/semafori (semaforo legale)
+vengono compilate una volta per bando:
+- categorie richieste -> (codice, ordinale classe)
+- importo del bando -> ordinale minimo di classe (da CLASSI_IMPORTI_MAX)
+- provincia del bando -> distanza dalla sede dell'impresa (punteggio regione)
+
+e valutate sulle imprese in un solo passaggio, che restituisce sia il
+punteggio sia il semaforo (ROSSO/GIALLO/VERDE).
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.config import CLASSI_IMPORTI_MAX
+from core.geo.spatial_index import distanza_province
+
+# Classifiche SOA in ordine crescente
+ORDINE_CLASSI = ["I", "II", "III", "III-bis", "IV", "IV-bis", "V", "VI", "VII", "VIII"]
+_ORDINALI = {classe.upper(): i for i, classe in enumerate(ORDINE_CLASSI)}
+
+# Punteggio
+PUNTI_CATEGORIE = 50
+PUNTI_REGIONE = 20
+PUNTI_IMPORTO = 20
+PUNTI_CERTIFICAZIONI = 10
+SOGLIA_PARTECIPAZIONE = 70
+
+# Prossimità della sede (fuori dalle regioni operative): punteggio regione
+# pieno entro RAGGIO_PIENO_KM, decrescente fino a 0 a RAGGIO_MASSIMO_KM
+RAGGIO_PIENO_KM = 50
+RAGGIO_MASSIMO_KM = 150
+
+IMPORTO_MIN_DEFAULT = 0
+IMPORTO_MAX_DEFAULT = 999999999
+CERTIFICAZIONI_PNRR = ('ISO 9001', 'ISO 14001')
+
+
+def ordinale_classe(classe: Optional[str]) -> int:
+    """Ordinale della classifica SOA (-1 se assente o non riconosciuta)"""
+    if not classe:
+        return -1
+    return _ORDINALI.get(str(classe).strip().upper(), -1)
+
+
+def chiave_classe(classe: Optional[str]) -> str:
+    """Forma canonica della classifica ('iii-BIS' -> 'III-bis', None -> '')"""
+    ordinale = ordinale_classe(classe)
+    if ordinale >= 0:
+        return ORDINE_CLASSI[ordinale]
+    return str(classe).strip().upper() if classe else ''
+
+
+def ordinale_per_importo(importo: float) -> int:
+    """Classifica minima (ordinale) che copre l'importo; -1 se nessun vincolo"""
+    if not importo or importo <= 0:
+        return -1
+    for ordinale, classe in enumerate(ORDINE_CLASSI):
+        if CLASSI_IMPORTI_MAX.get(classe, 0) >= importo:
+            return ordinale
+    return len(ORDINE_CLASSI)
+
+
+def punti_distanza(km: Optional[float]) -> int:
+    """Punti regione per una sede a `km` dal luogo di esecuzione"""
+    if km is None or km >= RAGGIO_MASSIMO_KM:
+        return 0
+    if km <= RAGGIO_PIENO_KM:
+        return PUNTI_REGIONE
+    return int(PUNTI_REGIONE * (RAGGIO_MASSIMO_KM - km) / (RAGGIO_MASSIMO_KM - RAGGIO_PIENO_KM))
+
+
+def punti_sede(provincia_sede: Optional[str], provincia_bando: Optional[str]) -> int:
+    """Punti regione per la distanza sede impresa -> provincia del bando"""
+    return punti_distanza(distanza_province(provincia_sede, provincia_bando))
+
+
+def richiedi_categorie_complete(bando) -> None:
+    """
+    Rifiuta un bando con elenco categorie forse troncato (parse in streaming
+    fermato prima della fine): i requisiti risulterebbero sottostimati
+    """
+    if not getattr(bando, 'categorie_complete', True):
+        raise ValueError(
+            f"Bando {bando.cig}: categorie SOA forse incomplete (parse in streaming), "
+            f"rieseguire il parse completo (streaming=False)"
+        )
+
+
+def chiavi_bando(bando) -> Set[Tuple[str, str]]:
+    """Coppie (categoria, classifica canonica) richieste da un BandoStrutturato"""
+    richiedi_categorie_complete(bando)
+    return {(cat.categoria, chiave_classe(cat.classifica)) for cat in bando.categorie}
+
+
+def chiavi_impresa(impresa: Dict) -> Set[Tuple[str, str]]:
+    """
+    Coppie (codice, classe) soddisfatte dall'impresa
+
+    Una classifica copre anche tutte quelle inferiori (OG1 IV soddisfa
+    OG1 I..IV); la coppia (codice, '') indica il solo possesso della categoria.
+    """
+    chiavi = set()
+    for att in impresa.get('attestazioni_soa') or []:
+        if not isinstance(att, dict):
+            continue
+        # Formato DB: {"codice": "OG1", "classe": "II"}
+        codice = att.get('codice', '')
+        classe = att.get('classe', '')
+        if not (codice and classe):
+            continue
+        chiavi.add((codice, ''))
+        ordinale = ordinale_classe(classe)
+        if ordinale >= 0:
+            chiavi.update((codice, c) for c in ORDINE_CLASSI[:ordinale + 1])
+        else:
+            chiavi.add((codice, chiave_classe(classe)))
+    return chiavi
+
+
+def ordinale_massimo_impresa(impresa: Dict) -> int:
+    """Classifica più alta posseduta (su qualsiasi categoria)"""
+    attestazioni = impresa.get('attestazioni_soa', [{'classe': 'I'}]) or []
+    return max(
+        (ordinale_classe(att.get('classe')) for att in attestazioni if isinstance(att, dict)),
+        default=-1
+    )
+
+
+def _numero(valore, default: float) -> float:
+    return default if valore is None else valore
+
+
+class RequisitiBando:
+    """
+    Requisiti di un bando compilati per la valutazione delle imprese
+    """
+
+    def __init__(
+        self,
+        categorie: Iterable[Tuple[str, Optional[str]]],
+        regione: Optional[str],
+        importo: float,
+        pnrr: bool = False,
+        certificazioni_richieste: Iterable[str] = (),
+        provincia: Optional[str] = None
+    ):
+        # Categorie distinte: (codice, classe canonica, ordinale)
+        self.categorie: List[Tuple[str, str, int]] = []
+        for codice, classe in categorie:
+            voce = (codice, chiave_classe(classe), ordinale_classe(classe))
+            if voce not in self.categorie:
+                self.categorie.append(voce)
+
+        self.regione = regione
+        self.provincia = provincia
+        self.importo = importo or 0
+        self.pnrr = pnrr
+        self.certificazioni_richieste = list(certificazioni_richieste)
+        self.ordinale_importo = ordinale_per_importo(self.importo)
+
+    @classmethod
+    def da_bando(cls, bando) -> "RequisitiBando":
+        """Da BandoStrutturato (parser)"""
+        richiedi_categorie_complete(bando)
+        return cls(
+            categorie=[(cat.categoria, cat.classifica) for cat in bando.categorie],
+            regione=bando.localizzazione.regione,
+            importo=bando.importi.totale_appalto,
+            pnrr=bando.pnrr,
+            provincia=bando.localizzazione.provincia,
+        )
+
+    @classmethod
+    def da_dict(cls, bando: Dict) -> "RequisitiBando":
+        """Da dict bando (formato tabella bandi / extraction)"""
+        return cls(
+            categorie=[(cat['codice'], cat.get('classe')) for cat in bando.get('categorie_soa') or []],
+            regione=bando.get('regione'),
+            importo=bando.get('importo_base_gara') or 0,
+            pnrr=bando.get('pnrr', False),
+            certificazioni_richieste=bando.get('certificazioni_richieste') or [],
+            provincia=bando.get('provincia'),
+        )
+
+    def valuta(self, impresa: Dict) -> Dict:
+        """
+        Valuta un'impresa: punteggio (categorie 50, regione 20, importo 20,
+        certificazioni 10), requisiti mancanti e semaforo legale
+        """
+        score = {
+            'total': 0,
+            'categorie': 0,
+            'regione': 0,
+            'importo': 0,
+            'certificazioni': 0,
+            'missing': [],
+        }
+        issues = []
+
+        # 1. Categorie SOA (50 punti)
+        chiavi = chiavi_impresa(impresa)
+        mancanti = [(codice, classe) for codice, classe, _ in self.categorie if (codice, classe) not in chiavi]
+        if self.categorie:
+            matched = len(self.categorie) - len(mancanti)
+            score['categorie'] = int((matched / len(self.categorie)) * PUNTI_CATEGORIE)
+            score['missing'].extend(f"Categoria {codice}_{classe}" for codice, classe in mancanti)
+        else:
+            score['categorie'] = PUNTI_CATEGORIE  # No categorie specificate = ok
+
+        if mancanti:
+            issues.append("SOA insufficiente - Richiede avvalimento/RTI")
+
+        # 2. Regione (20 punti; fuori regione in base alla distanza della sede)
+        if self.regione in (impresa.get('regioni_operative') or []):
+            score['regione'] = PUNTI_REGIONE
+        else:
+            score['regione'] = punti_sede(impresa.get('provincia_sede'), self.provincia)
+            if score['regione'] < PUNTI_REGIONE:
+                score['missing'].append(f"Opera in {self.regione}")
+
+        # 3. Importo (20 punti)
+        importo_min = _numero(impresa.get('importo_min_interesse'), IMPORTO_MIN_DEFAULT)
+        importo_max = _numero(impresa.get('importo_max_capacita'), IMPORTO_MAX_DEFAULT)
+        if importo_min <= self.importo <= importo_max:
+            score['importo'] = PUNTI_IMPORTO
+        elif self.importo < importo_min:
+            score['missing'].append(f"Importo troppo basso (<€{importo_min:,.0f})")
+        else:
+            score['missing'].append(f"Importo troppo alto (>€{importo_max:,.0f})")
+
+        # 4. Certificazioni (10 punti)
+        cert = impresa.get('certificazioni_possedute') or []
+        if not self.pnrr or any(c in cert for c in CERTIFICAZIONI_PNRR):
+            score['certificazioni'] = PUNTI_CERTIFICAZIONI
+
+        cert_mancanti = [c for c in self.certificazioni_richieste if c not in cert]
+        if cert_mancanti:
+            issues.append(f"Certificazioni mancanti: {', '.join(cert_mancanti)}")
+
+        score['total'] = sum([
+            score['categorie'],
+            score['regione'],
+            score['importo'],
+            score['certificazioni']
+        ])
+
+        # Semaforo legale
+        if ordinale_massimo_impresa(impresa) < self.ordinale_importo:
+            issues.append("Importo supera capacità SOA")
+            score['semaforo'] = {'colore': "ROSSO", 'messaggio': "; ".join(issues)}
+        elif issues:
+            score['semaforo'] = {'colore': "GIALLO", 'messaggio': "; ".join(issues)}
+        else:
+            score['semaforo'] = {'colore': "VERDE", 'messaggio': "Tutti requisiti soddisfatti"}
+
+        return score
+
+    def valuta_molte(self, imprese: Iterable[Dict]) -> List[Dict]:
+        """Valutazione in blocco (stessi requisiti compilati per tutte)"""
+        return [self.valuta(impresa) for impresa in imprese]
@@ -0,0 +1,185 @@
+"""
+Snapshot locale delle imprese per il matcher
+
+Le imprese vengono lette da Supabase a pagine con keyset pagination
+(niente offset, niente limite di righe PostgREST) selezionando solo le
+colonne usate dal matcher. Lo snapshot è salvato in CACHE_DIR come JSON
+lines compresso; le esecuzioni successive scaricano solo le righe con
+updated_at > last_sync.
+"""
+import gzip
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from core.config import CACHE_DIR
+
+COLONNE_MATCHER = [
+    'id',
+    'ragione_sociale',
+    'provincia_sede',
+    'attestazioni_soa',
+    'regioni_operative',
+    'importo_min_interesse',
+    'importo_max_capacita',
+    'certificazioni_possedute',
+    'updated_at',
+]
+
+
+class ImpreseSnapshot:
+    """
+    Snapshot incrementale della tabella imprese
+
+    Nota: le cancellazioni non sono visibili con updated_at;
+    usare ricostruisci() per un riallineamento completo.
+    """
+
+    def __init__(
+        self,
+        supabase,
+        path: Optional[Path] = None,
+        pagina: int = 1000,
+        colonne: Optional[List[str]] = None
+    ):
+        self.supabase = supabase
+        self.path = Path(path) if path else CACHE_DIR / "imprese_snapshot.jsonl.gz"
+        self.pagina = pagina
+        self.colonne = colonne or COLONNE_MATCHER
+
+        self.imprese: Dict[str, Dict] = {}
+        self.last_sync: Optional[str] = None
+        self.last_id: Optional[str] = None
+        # Righe scaricate dall'ultima sincronizza() (None dopo un download completo)
+        self.ultime_modifiche: Optional[List[Dict]] = None
+
+    def __len__(self) -> int:
+        return len(self.imprese)
+
+    @property
+    def righe(self) -> List[Dict]:
+        """Imprese in ordine di id"""
+        return [self.imprese[k] for k in sorted(self.imprese)]
+
+    @property
+    def versione(self) -> str:
+        """Identifica lo stato dello snapshot (cambia quando cambiano le imprese)"""
+        return f"{self.last_sync or '-'}|{self.last_id or '-'}|{len(self.imprese)}"
+
+    # ------------------------------------------------------------------
+    # Lettura Supabase
+    # ------------------------------------------------------------------
+
+    def _pagine_complete(self) -> Iterator[List[Dict]]:
+        """Tutte le imprese, keyset su id"""
+        ultimo_id = None
+        while True:
+            query = self.supabase.table('imprese').select(','.join(self.colonne)).order('id')
+            if ultimo_id is not None:
+                query = query.gt('id', ultimo_id)
+            righe = query.limit(self.pagina).execute().data
+            if not righe:
+                return
+            yield righe
+            if len(righe) < self.pagina:
+                return
+            ultimo_id = righe[-1]['id']
+
+    def _pagine_modificate(self) -> Iterator[List[Dict]]:
+        """Imprese con (updated_at, id) > (last_sync, last_id)"""
+        ts, ultimo_id = self.last_sync, self.last_id or ''
+        while True:
+            righe = (
+                self.supabase.table('imprese')
+                .select(','.join(self.colonne))
+                .or_(f'updated_at.gt."{ts}",and(updated_at.eq."{ts}",id.gt."{ultimo_id}")')
+                .order('updated_at')
+                .order('id')
+                .limit(self.pagina)
+                .execute()
+                .data
+            )
+            if not righe:
+                return
+            yield righe
+            if len(righe) < self.pagina:
+                return
+            ts, ultimo_id = righe[-1]['updated_at'], righe[-1]['id']
+
+    def _registra(self, righe: List[Dict]) -> None:
+        for riga in righe:
+            self.imprese[riga['id']] = riga
+            chiave = (riga.get('updated_at') or '', riga['id'])
+            if chiave > (self.last_sync or '', self.last_id or ''):
+                self.last_sync, self.last_id = chiave
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def sincronizza(self) -> int:
+        """
+        Allinea lo snapshot: file locale + sole modifiche da Supabase
+
+        Returns:
+            Numero di righe scaricate
+        """
+        if not self.imprese:
+            self.carica()
+
+        if self.last_sync is None:
+            return self.ricostruisci()
+
+        self.ultime_modifiche = []
+        for righe in self._pagine_modificate():
+            self._registra(righe)
+            self.ultime_modifiche.extend(righe)
+
+        scaricate = len(self.ultime_modifiche)
+        if scaricate:
+            self.salva()
+            print(f"  🔄 Snapshot imprese: {scaricate} righe aggiornate (totale {len(self)})")
+        return scaricate
+
+    def ricostruisci(self) -> int:
+        """Download completo a pagine e sostituzione dello snapshot"""
+        self.imprese = {}
+        self.last_sync = self.last_id = None
+        self.ultime_modifiche = None
+
+        for righe in self._pagine_complete():
+            self._registra(righe)
+
+        self.salva()
+        print(f"  📥 Snapshot imprese completo: {len(self)} righe")
+        return len(self)
+
+    def carica(self) -> bool:
+        """Carica lo snapshot da disco (False se assente o illeggibile)"""
+        if not self.path.exists():
+            return False
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                imprese = {}
+                for line in f:
+                    riga = json.loads(line)
+                    imprese[riga['id']] = riga
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Snapshot imprese non leggibile ({e}), verrà ricostruito")
+            return False
+
+        self.imprese = imprese
+        self.last_sync = header.get('last_sync')
+        self.last_id = header.get('last_id')
+        return True
+
+    def salva(self) -> None:
+        """Scrive lo snapshot su disco (scrittura atomica)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'last_sync': self.last_sync, 'last_id': self.last_id}) + '\n')
+            for riga in self.righe:
+                f.write(json.dumps(riga, ensure_ascii=False, separators=(',', ':')) + '\n')
+        tmp.replace(self.path)
@@ -0,0 +1,107 @@
+"""
+Generatore di imprese e bandi sintetici per benchmark del matcher
+
+Distribuzioni plausibili costruite sui dati reali del progetto:
+- categorie da CATEGORIE_SOA (le OG generali più frequenti delle OS)
+- classifiche da CLASSI_IMPORTI_MAX (le classi basse più frequenti),
+  con capacità d'importo coerente con la classe massima posseduta
+- sedi e localizzazioni da data/province_italia.py
+"""
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List
+
+from core.config import CATEGORIE_SOA, CLASSI_IMPORTI_MAX
+from core.matching.rules import ORDINE_CLASSI, ordinale_per_importo
+from data.province_italia import PROVINCE_ITALIA
+
+CATEGORIE = list(CATEGORIE_SOA)
+PESI_CATEGORIE = [
+    12 if c in ('OG1', 'OG3', 'OG11') else 4 if c.startswith('OG') else 1
+    for c in CATEGORIE
+]
+
+CLASSI = [c for c in ORDINE_CLASSI if c in CLASSI_IMPORTI_MAX]
+PESI_CLASSI = [len(CLASSI) - i for i in range(len(CLASSI))]
+
+PROVINCE = sorted(PROVINCE_ITALIA)
+REGIONI = sorted({dati['regione'] for dati in PROVINCE_ITALIA.values()})
+
+CERTIFICAZIONI = {'ISO 9001': 0.6, 'ISO 14001': 0.3, 'ISO 45001': 0.2}
+
+_INIZIO = datetime(2025, 1, 1)
+
+
+def _capacita(classe: str):
+    """Importo massimo della classifica (None per la VIII, senza limite)"""
+    importo = CLASSI_IMPORTI_MAX[classe]
+    return None if importo == float('inf') else importo
+
+
+def genera_imprese(n: int, seed: int = 42) -> List[Dict]:
+    """Imprese nel formato della tabella `imprese`"""
+    rng = random.Random(seed)
+    imprese = []
+
+    for i in range(n):
+        sede = rng.choice(PROVINCE)
+        regione = PROVINCE_ITALIA[sede]['regione']
+        regioni = [regione] + [r for r in rng.sample(REGIONI, rng.randint(0, 2)) if r != regione]
+
+        categorie = set(rng.choices(CATEGORIE, weights=PESI_CATEGORIE, k=rng.randint(1, 4)))
+        attestazioni = [
+            {'codice': codice, 'classe': rng.choices(CLASSI, weights=PESI_CLASSI)[0]}
+            for codice in sorted(categorie)
+        ]
+        classe_max = max((att['classe'] for att in attestazioni), key=CLASSI.index)
+
+        imprese.append({
+            'id': f"{i:08d}",
+            'ragione_sociale': f"Impresa {i}",
+            'provincia_sede': sede,
+            'attestazioni_soa': attestazioni,
+            'regioni_operative': regioni,
+            'importo_min_interesse': rng.choice([0, 40_000, 150_000]),
+            'importo_max_capacita': _capacita(classe_max),
+            'certificazioni_possedute': [c for c, p in CERTIFICAZIONI.items() if rng.random() < p],
+            'updated_at': (_INIZIO + timedelta(minutes=i)).isoformat(),
+        })
+
+    return imprese
+
+
+def genera_bandi(n: int, seed: int = 7) -> List:
+    """Bandi con la stessa interfaccia di BandoStrutturato usata dal matcher"""
+    rng = random.Random(seed)
+    bandi = []
+
+    for i in range(n):
+        provincia = rng.choice(PROVINCE)
+        # Importo dentro il range di una classifica (le basse più frequenti)
+        classe = rng.choices(CLASSI[:-1], weights=PESI_CLASSI[:-1])[0]
+        pos = CLASSI.index(classe)
+        minimo = CLASSI_IMPORTI_MAX[CLASSI[pos - 1]] if pos else 40_000
+        importo = float(rng.randint(int(minimo), int(CLASSI_IMPORTI_MAX[classe])))
+        classifica = ORDINE_CLASSI[ordinale_per_importo(importo)]
+
+        categorie = sorted(set(rng.choices(CATEGORIE, weights=PESI_CATEGORIE, k=rng.randint(1, 3))))
+        bandi.append(SimpleNamespace(
+            cig=f"{i:010d}",
+            # Prevalente sull'importo intero, scorporabili una classe sotto
+            categorie=[
+                SimpleNamespace(
+                    categoria=codice,
+                    classifica=classifica if j == 0 else CLASSI[max(0, CLASSI.index(classifica) - 1)]
+                )
+                for j, codice in enumerate(categorie)
+            ],
+            localizzazione=SimpleNamespace(
+                regione=PROVINCE_ITALIA[provincia]['regione'],
+                provincia=provincia
+            ),
+            importi=SimpleNamespace(totale_appalto=importo),
+            pnrr=rng.random() < 0.3,
+        ))
+
+    return bandi
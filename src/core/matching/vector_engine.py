@@ -0,0 +1,313 @@
+"""
+Motore di matching colonnare (NumPy)
+
+Le imprese vengono convertite una sola volta in colonne:
+- categorie SOA come bitmask (una parola uint64 ogni 64 coppie categoria/classe,
+  con le classifiche inferiori a quella posseduta già incluse)
+- regioni operative come matrice booleana imprese x regioni
+- provincia della sede come indice in core.geo.spatial_index.PROVINCE
+- importo_min / importo_max come array float
+- certificazioni ISO come array booleano
+
+Il punteggio di tutte le imprese si calcola con poche operazioni vettoriali,
+con gli stessi totali delle regole compilate in core.matching.rules.
+
+Benchmark: cd src && python -m core.matching.vector_engine [n_imprese]
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.geo.spatial_index import PROVINCE, INDICE_PROVINCE, normalizza_provincia
+from core.matching.rules import (
+    chiavi_bando, chiavi_impresa, punti_sede,
+    CERTIFICAZIONI_PNRR, IMPORTO_MIN_DEFAULT, IMPORTO_MAX_DEFAULT,
+    PUNTI_CATEGORIE, PUNTI_REGIONE, PUNTI_IMPORTO, PUNTI_CERTIFICAZIONI
+)
+
+
+class ImpreseMatrix:
+    """
+    Vista colonnare delle imprese per lo scoring vettoriale
+    """
+
+    def __init__(self, imprese: List[Dict]):
+        self.n = len(imprese)
+
+        # Vocabolari: (categoria, classe) -> bit, regione -> colonna
+        self.chiavi: Dict[Tuple[str, str], int] = {}
+        self.regioni: Dict[str, int] = {}
+
+        chiavi_righe = []
+        regioni_righe = []
+        for impresa in imprese:
+            chiavi = chiavi_impresa(impresa)
+            for chiave in chiavi:
+                self.chiavi.setdefault(chiave, len(self.chiavi))
+            chiavi_righe.append(chiavi)
+
+            regioni = impresa.get('regioni_operative') or []
+            for regione in regioni:
+                self.regioni.setdefault(regione, len(self.regioni))
+            regioni_righe.append(regioni)
+
+        # Bitmask categorie
+        n_parole = max(1, (len(self.chiavi) + 63) // 64)
+        righe = []
+        for chiavi in chiavi_righe:
+            parole = [0] * n_parole
+            for chiave in chiavi:
+                bit = self.chiavi[chiave]
+                parole[bit >> 6] |= 1 << (bit & 63)
+            righe.append(parole)
+        self.masks = np.array(righe, dtype=np.uint64).reshape(self.n, n_parole)
+
+        # Matrice regioni
+        self.regioni_matrix = np.zeros((self.n, max(1, len(self.regioni))), dtype=bool)
+        for pos, regioni in enumerate(regioni_righe):
+            for regione in regioni:
+                self.regioni_matrix[pos, self.regioni[regione]] = True
+
+        # Importi e certificazioni
+        self.importo_min = np.array(
+            [_valore(i, 'importo_min_interesse', IMPORTO_MIN_DEFAULT) for i in imprese],
+            dtype=np.float64
+        )
+        self.importo_max = np.array(
+            [_valore(i, 'importo_max_capacita', IMPORTO_MAX_DEFAULT) for i in imprese],
+            dtype=np.float64
+        )
+        # Sede (-1 = sconosciuta, punta alla colonna finale a 0 punti)
+        self.sede = np.array(
+            [INDICE_PROVINCE.get(normalizza_provincia(i.get('provincia_sede')), -1) for i in imprese],
+            dtype=np.intp
+        )
+        self.certificata = np.array(
+            [any(c in (i.get('certificazioni_possedute') or []) for c in CERTIFICAZIONI_PNRR)
+             for i in imprese],
+            dtype=bool
+        )
+
+    def __len__(self) -> int:
+        return self.n
+
+    def aggiorna_riga(self, pos: int, impresa: Dict) -> None:
+        """
+        Riscrive la riga `pos` (o ne aggiunge una in coda se pos == n)
+
+        Nuove coppie categoria/classe o regioni estendono i vocabolari
+        (e le colonne) senza ricostruire la matrice.
+        """
+        if pos == self.n:
+            self.masks = np.vstack([self.masks, np.zeros((1, self.masks.shape[1]), dtype=np.uint64)])
+            self.regioni_matrix = np.vstack([self.regioni_matrix, np.zeros((1, self.regioni_matrix.shape[1]), dtype=bool)])
+            self.importo_min = np.append(self.importo_min, 0.0)
+            self.importo_max = np.append(self.importo_max, 0.0)
+            self.sede = np.append(self.sede, -1)
+            self.certificata = np.append(self.certificata, False)
+            self.n += 1
+
+        chiavi = chiavi_impresa(impresa)
+        for chiave in chiavi:
+            self.chiavi.setdefault(chiave, len(self.chiavi))
+        n_parole = max(1, (len(self.chiavi) + 63) // 64)
+        if n_parole > self.masks.shape[1]:
+            extra = np.zeros((self.n, n_parole - self.masks.shape[1]), dtype=np.uint64)
+            self.masks = np.hstack([self.masks, extra])
+
+        parole = [0] * n_parole
+        for chiave in chiavi:
+            bit = self.chiavi[chiave]
+            parole[bit >> 6] |= 1 << (bit & 63)
+        self.masks[pos] = np.array(parole, dtype=np.uint64)
+
+        regioni = impresa.get('regioni_operative') or []
+        for regione in regioni:
+            self.regioni.setdefault(regione, len(self.regioni))
+        if len(self.regioni) > self.regioni_matrix.shape[1]:
+            extra = np.zeros((self.n, len(self.regioni) - self.regioni_matrix.shape[1]), dtype=bool)
+            self.regioni_matrix = np.hstack([self.regioni_matrix, extra])
+        self.regioni_matrix[pos] = False
+        for regione in regioni:
+            self.regioni_matrix[pos, self.regioni[regione]] = True
+
+        self.importo_min[pos] = _valore(impresa, 'importo_min_interesse', IMPORTO_MIN_DEFAULT)
+        self.importo_max[pos] = _valore(impresa, 'importo_max_capacita', IMPORTO_MAX_DEFAULT)
+        self.sede[pos] = INDICE_PROVINCE.get(normalizza_provincia(impresa.get('provincia_sede')), -1)
+        cert = impresa.get('certificazioni_possedute') or []
+        self.certificata[pos] = any(c in cert for c in CERTIFICAZIONI_PNRR)
+
+    def _bit_presente(self, chiave: Tuple[str, str], righe) -> np.ndarray:
+        """Array booleano: le righe possiedono la coppia categoria/classe?"""
+        bit = self.chiavi.get(chiave)
+        if bit is None:
+            return np.zeros(len(righe), dtype=bool)
+        parola = self.masks[righe, bit >> 6]
+        return (parola & np.uint64(1 << (bit & 63))) != 0
+
+    def punti_sede(self, bando) -> np.ndarray:
+        """Punti regione per distanza, per provincia di sede (+ 0 per sede sconosciuta)"""
+        provincia = bando.localizzazione.provincia
+        return np.array([punti_sede(p, provincia) for p in PROVINCE] + [0], dtype=np.int64)
+
+    def score_categorie(self, bando, righe: np.ndarray) -> np.ndarray:
+        """Solo la componente categorie SOA (50 punti) sulle righe indicate"""
+        righe = np.asarray(righe, dtype=np.intp)
+        richieste = chiavi_bando(bando)
+        if not richieste:
+            return np.full(len(righe), PUNTI_CATEGORIE, dtype=np.int64)
+
+        matched = np.zeros(len(righe), dtype=np.int64)
+        for chiave in richieste:
+            matched += self._bit_presente(chiave, righe)
+        return ((matched / len(richieste)) * PUNTI_CATEGORIE).astype(np.int64)
+
+    def score(self, bando, righe: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Punteggio vettoriale del bando sulle righe indicate (default: tutte)
+
+        Returns:
+            Dict di array int: total, categorie, regione, importo, certificazioni
+        """
+        if righe is None:
+            righe = np.arange(self.n)
+        righe = np.asarray(righe, dtype=np.intp)
+        m = len(righe)
+
+        # 1. Categorie SOA (50 punti)
+        categorie = self.score_categorie(bando, righe)
+
+        # 2. Regione (20 punti; fuori regione in base alla distanza della sede)
+        regione = self.punti_sede(bando)[self.sede[righe]]
+        col = self.regioni.get(bando.localizzazione.regione)
+        if col is not None:
+            regione = np.where(self.regioni_matrix[righe, col], PUNTI_REGIONE, regione)
+
+        # 3. Importo (20 punti)
+        importo_bando = bando.importi.totale_appalto
+        in_range = (self.importo_min[righe] <= importo_bando) & (importo_bando <= self.importo_max[righe])
+        importo = in_range.astype(np.int64) * PUNTI_IMPORTO
+
+        # 4. Certificazioni (10 punti)
+        if bando.pnrr:
+            certificazioni = self.certificata[righe].astype(np.int64) * PUNTI_CERTIFICAZIONI
+        else:
+            certificazioni = np.full(m, PUNTI_CERTIFICAZIONI, dtype=np.int64)
+
+        return {
+            'total': categorie + regione + importo + certificazioni,
+            'categorie': categorie,
+            'regione': regione,
+            'importo': importo,
+            'certificazioni': certificazioni,
+        }
+
+    def score_blocco(self, bandi: List, righe: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Punteggi totali di più bandi su un blocco di imprese (bandi x righe)
+
+        Le categorie vengono confrontate con un prodotto matriciale tra
+        requisiti dei bandi (bandi x chiavi) e bitmask espanse del blocco
+        (chiavi x righe).
+
+        Returns:
+            (totali, candidate): totali int16 (bandi x righe) e maschera delle
+            imprese con almeno una categoria richiesta (o bando senza categorie)
+        """
+        righe = np.asarray(righe, dtype=np.intp)
+        n_chiavi = len(self.chiavi)
+
+        # Requisiti categorie dei bandi
+        richieste = np.zeros((len(bandi), n_chiavi), dtype=np.float32)
+        n_richieste = np.zeros(len(bandi), dtype=np.float64)
+        for b, bando in enumerate(bandi):
+            chiavi = chiavi_bando(bando)
+            n_richieste[b] = len(chiavi)
+            for chiave in chiavi:
+                bit = self.chiavi.get(chiave)
+                if bit is not None:
+                    richieste[b, bit] = 1
+
+        # Bitmask del blocco espanse in una matrice 0/1 (righe x chiavi)
+        byte = self.masks[righe].astype('<u8').view(np.uint8)
+        possedute = np.unpackbits(byte, axis=1, bitorder='little')[:, :n_chiavi].astype(np.float32)
+        matched = (richieste @ possedute.T).astype(np.float64)
+
+        senza_categorie = n_richieste == 0
+        con_categorie = ~senza_categorie[:, None]
+        categorie = np.where(
+            con_categorie,
+            (matched / np.maximum(n_richieste, 1)[:, None]) * PUNTI_CATEGORIE,
+            PUNTI_CATEGORIE
+        ).astype(np.int16)
+        candidate = senza_categorie[:, None] | (matched > 0)
+
+        # Regione
+        colonne = np.array([self.regioni.get(b.localizzazione.regione, -1) for b in bandi], dtype=np.intp)
+        in_regione = self.regioni_matrix[righe][:, np.maximum(colonne, 0)].T & (colonne >= 0)[:, None]
+        vicinanza = np.stack([self.punti_sede(b) for b in bandi])[:, self.sede[righe]]
+        regione = np.where(in_regione, PUNTI_REGIONE, vicinanza).astype(np.int16)
+
+        # Importo
+        importi = np.array([b.importi.totale_appalto for b in bandi], dtype=np.float64)[:, None]
+        importo = (self.importo_min[righe][None, :] <= importi) & (importi <= self.importo_max[righe][None, :])
+
+        # Certificazioni
+        pnrr = np.array([bool(b.pnrr) for b in bandi])[:, None]
+        certificazioni = np.where(pnrr, self.certificata[righe][None, :], True)
+
+        totali = (
+            categorie
+            + regione
+            + importo.astype(np.int16) * PUNTI_IMPORTO
+            + certificazioni.astype(np.int16) * PUNTI_CERTIFICAZIONI
+        )
+        return totali, candidate
+
+
+def _valore(impresa: Dict, campo: str, default: float) -> float:
+    """Valore numerico di un campo impresa (None -> default)"""
+    valore = impresa.get(campo)
+    return default if valore is None else float(valore)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from core.matching.rules import RequisitiBando
+    from core.matching.synthetic import genera_imprese, genera_bandi
+
+    print("\n" + "="*70)
+    print("🧪 BENCHMARK SCORING VETTORIALE")
+    print("="*70 + "\n")
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    imprese = genera_imprese(n)
+    bando = genera_bandi(1)[0]
+
+    t0 = time.perf_counter()
+    requisiti = RequisitiBando.da_bando(bando)
+    scalari = requisiti.valuta_molte(imprese)
+    t_scalare = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    matrix = ImpreseMatrix(imprese)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vettoriale = matrix.score(bando)
+    t_vettoriale = time.perf_counter() - t0
+
+    for campo in ('total', 'categorie', 'regione', 'importo', 'certificazioni'):
+        assert [s[campo] for s in scalari] == vettoriale[campo].tolist(), campo
+
+    print(f"Imprese:            {n:,}")
+    print(f"Scalare:            {t_scalare*1000:10.1f} ms")
+    print(f"Build colonne:      {t_build*1000:10.1f} ms (una tantum)")
+    print(f"Vettoriale:         {t_vettoriale*1000:10.1f} ms")
+    print(f"Speedup:            {t_scalare / t_vettoriale:10.0f}x")
@@ -2,14 +2,16 @@
 Parser Universale Bandi - Auto-detection + Fallback intelligente
 """
 import re
-import fitz  # PyMuPDF
+import sys
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Iterator, Optional, List, Tuple, Union
 from pydantic import BaseModel, Field
 import json
 
-# Unstructured
-from unstructured.partition.pdf import partition_pdf
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from core.parsers.documento_pdf import DocumentoPDF
+from core.parsers.parse_cache import ParseCache
+from core.parsers.scanner_campi import CampiTrovati, ScannerCampi
 
 
 # ============================================================================
@@ -51,6 +53,11 @@ class BandoStrutturato(BaseModel):
     localizzazione: Localizzazione = Localizzazione()
     procedura: Procedura = Procedura()
     confidence_score: float = 0.0
+    # Pagine lette per l'estrazione (in streaming possono essere meno del totale)
+    pagine_lette: Optional[int] = None
+    # False se non tutte le pagine sono state lette: altre categorie possono
+    # comparire più avanti (il matcher rifiuta il bando, serve il parse completo)
+    categorie_complete: bool = True
 
 
 # ============================================================================
@@ -72,40 +79,112 @@ def normalize_italian_number(text: str) -> float:
         return 0.0
 
 
-def detect_pdf_type(pdf_path: str) -> str:
+# Sotto questa soglia di caratteri (per pagina A4) la pagina è probabilmente una scansione
+MIN_CARATTERI_PAGINA = 200
+# Frazione minima della pagina coperta da immagini per considerarla scansionata
+MIN_COPERTURA_SCANSIONE = 0.5
+# Oltre queste immagini il layout è complesso (grafici, tavole, loghi)
+MAX_IMMAGINI_TESTUALE = 5
+AREA_A4 = 595.0 * 842.0
+
+
+def classifica_pagina(documento: DocumentoPDF, numero: int) -> str:
     """
-    Rileva tipo PDF per scegliere strategy corretta
+    Tipo di una pagina (0-based) da densità del testo e immagini
     
     Returns:
-        'textual': PDF con testo estraibile (usa fast)
-        'scanned': PDF scansionato (usa hi_res + OCR)
-        'complex': Layout complesso (usa hi_res no OCR)
+        'textual': testo estraibile con PyMuPDF (anche pagine quasi vuote)
+        'scanned': poco testo e pagina coperta da immagini (serve OCR)
+        'complex': testo + molte immagini/grafici (serve hi_res)
     """
-    try:
-        doc = fitz.open(pdf_path)
-        
-        # Campiona prima pagina
-        page = doc[0]
-        text = page.get_text()
-        
-        # Check 1: È scansione? (poco testo)
-        if len(text.strip()) < 200:
-            doc.close()
+    # Caratteri riportati a una pagina A4: le tavole A3/A1 non sembrano "dense"
+    caratteri = len(documento.testo_pagina(numero).strip()) * AREA_A4 / max(documento.area_pagina(numero), 1.0)
+    immagini = documento.immagini_pagina(numero)
+    
+    if caratteri < MIN_CARATTERI_PAGINA:
+        if immagini and documento.copertura_immagini(numero) >= MIN_COPERTURA_SCANSIONE:
             return 'scanned'
-        
-        # Check 2: Layout complesso? (tante immagini/grafici)
-        images = page.get_images()
-        if len(images) > 5:
-            doc.close()
-            return 'complex'
-        
-        # Check 3: Testo pulito (default)
-        doc.close()
+        # Pagina bianca o quasi: l'OCR non troverebbe nulla
         return 'textual'
-        
+    if immagini > MAX_IMMAGINI_TESTUALE:
+        return 'complex'
+    return 'textual'
+
+
+def classifica_pagine(pdf: Union[str, DocumentoPDF]) -> List[str]:
+    """Tipo di ogni pagina (vedi classifica_pagina), in ordine"""
+    if not isinstance(pdf, DocumentoPDF):
+        with DocumentoPDF(pdf) as documento:
+            return classifica_pagine(documento)
+    
+    tipi = []
+    for numero in range(len(pdf)):
+        try:
+            tipi.append(classifica_pagina(pdf, numero))
+        except Exception as e:
+            print(f"⚠️ Errore detection pagina {numero + 1}: {e}, assumo 'textual'")
+            tipi.append('textual')
+    return tipi
+
+
+def detect_pdf_type(pdf: Union[str, DocumentoPDF]) -> str:
+    """
+    Rileva tipo PDF (riassunto della classificazione per pagina)
+    
+    Args:
+        pdf: Path del PDF o DocumentoPDF già aperto (il testo delle
+            pagine resta in cache per l'estrazione)
+    
+    Returns:
+        'textual': tutte le pagine con testo estraibile
+        'scanned': almeno una pagina scansionata (OCR su quelle pagine)
+        'complex': almeno una pagina a layout complesso (hi_res su quelle pagine)
+    """
+    try:
+        tipi = classifica_pagine(pdf)
     except Exception as e:
         print(f"⚠️ Errore detection: {e}, assumo 'textual'")
         return 'textual'
+    
+    for tipo in ('scanned', 'complex'):
+        if tipo in tipi:
+            return tipo
+    return 'textual'
+
+
+# Campi del bando: una sola passata sul testo (vedi scanner_campi)
+SCANNER_BANDO = ScannerCampi({
+    'cig': r'\bCIG[:\s]*([A-Z0-9]{10})\b',
+    'cup': r'\bCUP[:\s]*([A-Z0-9]{15})\b',
+    'pnrr': r'(?-i:PNRR|NextGeneration|Next Generation)',
+    # Totale - "ammonta a € XXX"
+    'totale': r'ammonta\s+a\s+€\s*([\d.,]+)',
+    # Lavori - pattern con a capo: "IMPORTO ESECUZ. LAVORI:\n693.820,49"
+    'lavori': r'IMPORTO\s+ESECUZ\.\s+LAVORI:\s*([\d.,]+)',
+    # Progettazione - solo l'intestazione, il valore segue (RE_VALORE_PROGETTAZIONE)
+    'progettazione': r'IMPORTO\s+PROGETTAZIONE',
+    'sicurezza': r'di\s+cui\s+oneri\s+della\s+sicurezza\s+non\s+soggetti\s+a\s+ribasso\s*([\d.,]+)',
+    'manodopera': r'di\s+cui\s+costi\s+della\s+manodopera\s*([\d.,]+)',
+    'categoria': r'\b(OG|OS|OGS)(\d+)\s+classifica\s+([IVX]+)\b',
+}, tutti=('categoria',))
+
+RE_VALORE_PROGETTAZIONE = re.compile(r'PROGETTAZ\.\s*([\d.,]+)', re.I)
+
+# Pagine candidate per i campi mancanti (passate a Unstructured)
+PATTERN_PAGINE_CAMPI = {
+    'cig': re.compile(r'\b(?:CIG|CUP)\b', re.I),
+    'importi': re.compile(r'importo|ammonta|€', re.I),
+    'categorie': re.compile(r'\b(?:OG|OS)\s?\d|categori|classific', re.I),
+}
+
+
+
+# Campi di testata (quasi sempre nelle prime pagine) e loro peso nella confidence
+CAMPI_TESTATA = ('cig', 'importi', 'categorie')
+PESI_CONFIDENCE = {'cig': 0.3, 'importi': 0.4, 'categorie': 0.3}
+
+# Caratteri della pagina precedente rianalizzati con la nuova (campi a cavallo)
+SOVRAPPOSIZIONE_PAGINE = 500
 
 
 # ============================================================================
@@ -117,8 +196,49 @@ class BandoParserUniversale:
     Parser che si adatta automaticamente al tipo di PDF
     """
     
-    def __init__(self):
+    # Da incrementare quando cambia l'output (invalida la cache di parsing)
+    VERSIONE = "6"
+    
+    def __init__(
+        self,
+        soglia_confidence: float = 0.7,
+        campi_richiesti: Tuple[str, ...] = ('categorie',),
+        max_pagine_unstructured: int = 20,
+        usa_cache: bool = True,
+        n_workers: Optional[int] = 1,
+        streaming: bool = False,
+        campi_streaming: Tuple[str, ...] = CAMPI_TESTATA
+    ):
+        """
+        Args:
+            soglia_confidence: Sotto questa confidence delle regex si usa Unstructured
+            campi_richiesti: Campi ('cig', 'importi', 'categorie') che, se mancanti,
+                attivano Unstructured anche sopra soglia
+            max_pagine_unstructured: Pagine massime passate a Unstructured
+            usa_cache: Riusa i risultati già calcolati per lo stesso PDF (CACHE_DIR/parse)
+            n_workers: Processi per l'estrazione del testo dei PDF lunghi (default 1:
+                nessun pool per richiesta; None = CPU, per elaborazioni in blocco)
+            streaming: Legge le pagine una alla volta e si ferma quando i campi
+                di testata sono completi (le altre pagine restano disponibili
+                con `pagine(pdf_path, da_pagina=bando.pagine_lette)`); se la lettura
+                si ferma prima della fine il bando ha categorie_complete=False
+            campi_streaming: Campi ('cig', 'importi', 'categorie') da trovare
+                prima di fermare la lettura in streaming
+        """
+        self.soglia_confidence = soglia_confidence
+        self.campi_richiesti = tuple(campi_richiesti)
+        self.max_pagine_unstructured = max_pagine_unstructured
+        self.n_workers = n_workers
+        self.streaming = streaming
+        self.campi_streaming = tuple(campi_streaming)
         self.tesseract_available = self._check_tesseract()
+        # La configurazione fa parte della versione: cambia il risultato
+        versione = "-".join([
+            self.VERSIONE, str(soglia_confidence), ",".join(self.campi_richiesti),
+            str(max_pagine_unstructured), "ocr" if self.tesseract_available else "no-ocr",
+            "stream:" + ",".join(self.campi_streaming) if streaming else "completo"
+        ])
+        self.cache = ParseCache("bandi", versione) if usa_cache else None
         print(f"✅ Parser Universale inizializzato")
         print(f"   Tesseract OCR: {'✅ Disponibile' if self.tesseract_available else '❌ Non disponibile (solo PDF testuali)'}")
     
@@ -130,70 +250,131 @@ class BandoParserUniversale:
     def parse(self, pdf_path: str) -> BandoStrutturato:
         """
         Parse con auto-detection
+        
+        Il PDF viene letto una sola volta (DocumentoPDF): detection,
+        estrazione testo e Unstructured lavorano sullo stesso buffer.
+        Unstructured parte solo se la confidence delle regex è sotto soglia
+        o mancano campi richiesti, e solo sulle pagine che possono contenerli;
+        OCR/hi_res solo sulle pagine scansionate o complesse.
+        Lo stesso contenuto PDF (SHA-256) viene analizzato una sola volta.
+        In streaming si leggono solo le pagine necessarie ai campi di testata.
         """
         
         print(f"\n{'='*70}")
         print(f"🔍 PARSING: {Path(pdf_path).name}")
         print(f"{'='*70}\n")
         
-        # STEP 1: Rileva tipo PDF
-        pdf_type = detect_pdf_type(pdf_path)
-        print(f"📋 Tipo PDF rilevato: {pdf_type.upper()}")
+        dati = Path(pdf_path).read_bytes()
+        if self.cache is not None:
+            salvato = self.cache.get(dati)
+            if salvato is not None:
+                bando = BandoStrutturato.model_validate(salvato)
+                print(f"⚡ Risultato da cache (confidence: {bando.confidence_score:.0%})")
+                return bando
         
-        # STEP 2: Scegli strategy
-        if pdf_type == 'scanned':
-            if not self.tesseract_available:
-                print("⚠️ PDF scansionato ma Tesseract non disponibile, provo 'fast'")
-                strategy = 'fast'
-            else:
-                strategy = 'hi_res'
-        elif pdf_type == 'complex':
-            strategy = 'hi_res' if self.tesseract_available else 'fast'
-        else:
-            strategy = 'fast'
+        with DocumentoPDF(pdf_path, dati=dati, n_workers=self.n_workers) as documento:
+            n_pagine = self._pagine_testata(documento) if self.streaming else None
+            bando = self._parse_documento(documento, n_pagine)
         
-        print(f"⚙️ Strategy Unstructured: {strategy}")
+        if self.cache is not None:
+            self.cache.put(dati, bando.model_dump())
         
-        # STEP 3A: Estrai testo grezzo con PyMuPDF (per regex precise)
-        print(f"📄 Estrazione testo grezzo (PyMuPDF)...")
-        doc = fitz.open(pdf_path)
-        raw_text = "\n".join([page.get_text() for page in doc])
-        doc.close()
-        print(f"✅ Estratti {len(raw_text)} caratteri")
+        return bando
+    
+    def pagine(self, pdf_path: str, da_pagina: int = 0) -> Iterator[Tuple[int, str]]:
+        """
+        Testo delle pagine (numero 1-based, testo), letto una pagina alla volta
         
-        # STEP 3B: Parse con Unstructured (per struttura/tabelle)
-        try:
-            print(f"📄 Unstructured partition (struttura)...")
+        Serve per le sezioni da indicizzare (RAG) dopo un parse in streaming:
+        `pagine(pdf_path, da_pagina=bando.pagine_lette)` legge solo il resto.
+        """
+        with DocumentoPDF(pdf_path) as documento:
+            for numero in range(da_pagina, len(documento)):
+                yield numero + 1, documento.testo_pagina(numero)
+    
+    def _pagine_testata(self, documento: DocumentoPDF) -> int:
+        """
+        Pagine da leggere perché i campi di testata siano completi
+        
+        Ogni pagina viene analizzata solo nella finestra nuova (coda della
+        precedente + pagina): la lettura si ferma quando i campi in
+        `campi_streaming` sono trovati, la confidence è sopra soglia e la
+        pagina appena letta non contiene nemmeno riferimenti a categorie
+        (PATTERN_PAGINE_CAMPI): una tabella SOA che prosegue con righe non
+        riconosciute dalle regex tiene aperta la lettura.
+        Categorie citate solo molto oltre la testata non vengono lette:
+        il bando risulta con categorie_complete=False e il matcher lo rifiuta.
+        """
+        trovati = set()
+        coda = ""
+        
+        for numero in range(len(documento)):
+            testo = documento.testo_pagina(numero)
+            finestra = coda + "\n" + testo if coda else testo
+            campi = SCANNER_BANDO.scansiona(finestra)
             
-            elements = partition_pdf(
-                filename=pdf_path,
-                strategy=strategy,
-                infer_table_structure=True
-            )
+            if campi.primo('cig'):
+                trovati.add('cig')
+            totale = campi.valore('totale')
+            if totale and normalize_italian_number(totale) > 0:
+                trovati.add('importi')
+            if campi.primo('categoria'):
+                trovati.add('categorie')
             
-            print(f"✅ Estratti {len(elements)} elementi strutturati")
+            confidence = sum(PESI_CONFIDENCE[c] for c in trovati)
+            if (set(self.campi_streaming) <= trovati and confidence >= self.soglia_confidence
+                    and not PATTERN_PAGINE_CAMPI['categorie'].search(testo)):
+                print(f"⚡ Streaming: campi di testata completi dopo {numero + 1}/{len(documento)} pagine "
+                      f"(categorie nelle pagine successive non analizzate)")
+                return numero + 1
             
-        except Exception as e:
-            print(f"⚠️ Unstructured fallito: {e}")
-            elements = []
-        
-        # STEP 4: Tabelle da Unstructured
-        tables = [el for el in elements if hasattr(el, 'category') and el.category == "Table"]
-        print(f"📊 Trovate {len(tables)} tabelle")
-        
-        # Usa raw_text per extraction (più affidabile)
-        full_text = raw_text
+            coda = finestra[-SOVRAPPOSIZIONE_PAGINE:]
         
-        # STEP 5: Extract dati
-        cig, cup = self._extract_cig_cup(full_text)
-        pnrr = self._extract_pnrr(full_text)
-        importi = self._extract_importi(full_text)
-        categorie = self._extract_categorie(full_text)
+        return len(documento)
+    
+    def _parse_documento(self, documento: DocumentoPDF, n_pagine: Optional[int] = None) -> BandoStrutturato:
+        # STEP 1: Estrai testo grezzo con PyMuPDF (per regex precise)
+        print(f"📄 Estrazione testo grezzo (PyMuPDF)...")
+        if n_pagine is None or n_pagine >= len(documento):
+            n_pagine = len(documento)
+            full_text = documento.testo
+        else:
+            full_text = "\n".join(documento.testo_pagina(i) for i in range(n_pagine))
+        print(f"✅ Estratti {len(full_text)} caratteri ({n_pagine}/{len(documento)} pagine)")
+        
+        # STEP 2: Extract dati (una sola passata per tutti i campi regex)
+        campi = SCANNER_BANDO.scansiona(full_text)
+        cig, cup = self._extract_cig_cup(full_text, campi)
+        pnrr = self._extract_pnrr(full_text, campi)
+        importi = self._extract_importi(full_text, campi)
+        categorie = self._extract_categorie(full_text, campi)
         localizzazione = self._extract_localizzazione(full_text)
+        # In streaming la provincia può comparire solo più avanti: si cerca nel resto
+        for numero in range(n_pagine, len(documento)):
+            if localizzazione.provincia:
+                break
+            localizzazione = self._extract_localizzazione(documento.testo_pagina(numero))
         
-        # STEP 6: Confidence
+        # STEP 3: Confidence
         confidence = self._calculate_confidence(cig, importi, categorie)
         
+        # STEP 4: Unstructured solo se le regex non bastano, sulle pagine utili
+        mancanti = self._campi_mancanti(cig, importi, categorie)
+        if confidence < self.soglia_confidence or set(mancanti) & set(self.campi_richiesti):
+            print(f"\n🔎 Confidence {confidence:.0%}, campi mancanti: {', '.join(mancanti) or 'nessuno'}")
+            tipi = classifica_pagine(documento)
+            testo_struttura = self._partition(documento, self._pagine_per_campi(documento, mancanti, tipi), tipi)
+            
+            if testo_struttura:
+                if 'cig' in mancanti:
+                    cig, cup_struttura = self._extract_cig_cup(testo_struttura)
+                    cup = cup or cup_struttura
+                if 'importi' in mancanti:
+                    importi = self._extract_importi(testo_struttura)
+                if 'categorie' in mancanti:
+                    categorie = self._extract_categorie(testo_struttura)
+                confidence = self._calculate_confidence(cig, importi, categorie)
+        
         bando = BandoStrutturato(
             cig=cig,
             cup=cup,
@@ -201,8 +382,12 @@ class BandoParserUniversale:
             importi=importi,
             categorie=categorie,
             localizzazione=localizzazione,
-            confidence_score=confidence
+            confidence_score=confidence,
+            pagine_lette=n_pagine,
+            categorie_complete=n_pagine >= len(documento)
         )
+        if not bando.categorie_complete:
+            print(f"⚠️  Categorie lette su {n_pagine}/{len(documento)} pagine: elenco forse incompleto")
         
         print(f"\n{'='*70}")
         print(f"✅ PARSING COMPLETATO (confidence: {confidence:.0%})")
@@ -210,12 +395,115 @@ class BandoParserUniversale:
         
         return bando
     
-    def _extract_cig_cup(self, text: str) -> Tuple[Optional[str], Optional[str]]:
-        cig_match = re.search(r'\bCIG[:\s]*([A-Z0-9]{10})\b', text, re.I)
-        cup_match = re.search(r'\bCUP[:\s]*([A-Z0-9]{15})\b', text, re.I)
+    def _campi_mancanti(self, cig, importi, categorie) -> List[str]:
+        mancanti = []
+        if not cig:
+            mancanti.append('cig')
+        if importi.totale_appalto <= 0:
+            mancanti.append('importi')
+        if not categorie:
+            mancanti.append('categorie')
+        return mancanti
+    
+    def _pagine_per_campi(self, documento: DocumentoPDF, campi: List[str], tipi: List[str]) -> List[int]:
+        """
+        Pagine che probabilmente contengono i campi (parole chiave nel testo
+        PyMuPDF) più quelle scansionate o complesse, dove le regex non vedono nulla
+        """
+        pattern = [PATTERN_PAGINE_CAMPI[c] for c in campi if c in PATTERN_PAGINE_CAMPI]
         
-        cig = cig_match.group(1) if cig_match else None
-        cup = cup_match.group(1) if cup_match else None
+        pagine = []
+        for numero in range(len(documento)):
+            if tipi[numero] != 'textual' or any(p.search(documento.testo_pagina(numero)) for p in pattern):
+                pagine.append(numero)
+        
+        return pagine[:self.max_pagine_unstructured]
+    
+    def _strategy(self, tipo: str) -> Optional[str]:
+        """
+        Strategy Unstructured per un tipo di pagina
+        
+        Returns:
+            None se per la pagina basta il testo PyMuPDF (già estratto)
+        """
+        if tipo == 'scanned':
+            if not self.tesseract_available:
+                return None
+            return 'hi_res'
+        if tipo == 'complex':
+            return 'hi_res' if self.tesseract_available else None
+        return None
+    
+    def _partition(self, documento: DocumentoPDF, pagine: List[int], tipi: List[str]) -> str:
+        """
+        Unstructured (OCR/struttura/tabelle) solo sulle pagine che lo richiedono
+        
+        Le pagine testuali riusano il testo PyMuPDF; quelle scansionate o
+        complesse passano a Unstructured, raggruppate per strategy.
+        
+        Returns:
+            Testo delle pagine in ordine (tabelle incluse), "" se nessuna
+            pagina richiede Unstructured o se non è disponibile
+        """
+        gruppi = {}
+        for numero in pagine:
+            strategy = self._strategy(tipi[numero])
+            if strategy:
+                gruppi.setdefault(strategy, []).append(numero)
+        
+        if 'scanned' in (tipi[n] for n in pagine) and not self.tesseract_available:
+            print("⚠️ Pagine scansionate ma Tesseract non disponibile, uso il testo PyMuPDF")
+        if not gruppi:
+            print("📋 Nessuna pagina da OCR/hi_res: il testo PyMuPDF è già stato analizzato")
+            return ""
+        
+        try:
+            # Import pesante: solo quando serve davvero
+            from unstructured.partition.pdf import partition_pdf
+        except Exception as e:
+            print(f"⚠️ Unstructured non disponibile: {e}")
+            return ""
+        
+        testi = {}
+        n_tabelle = 0
+        for strategy, gruppo in gruppi.items():
+            print(f"⚙️ Strategy Unstructured: {strategy} su {len(gruppo)}/{len(documento)} pagine")
+            try:
+                elements = partition_pdf(
+                    file=documento.stream(gruppo),
+                    metadata_filename=documento.nome,
+                    strategy=strategy,
+                    infer_table_structure=True
+                )
+            except Exception as e:
+                print(f"⚠️ Unstructured fallito: {e}")
+                continue
+            
+            print(f"✅ Estratti {len(elements)} elementi strutturati")
+            for el in elements:
+                if getattr(el, 'category', None) == "Table":
+                    n_tabelle += 1
+                if not getattr(el, 'text', None):
+                    continue
+                # page_number è relativo al PDF ridotto (1-based)
+                pagina = getattr(getattr(el, 'metadata', None), 'page_number', None) or 1
+                numero = gruppo[min(pagina, len(gruppo)) - 1]
+                testi.setdefault(numero, []).append(el.text)
+        
+        if not testi:
+            return ""
+        print(f"📊 Trovate {n_tabelle} tabelle")
+        
+        return "\n".join(
+            "\n".join(testi[numero]) if numero in testi else documento.testo_pagina(numero)
+            for numero in pagine
+        )
+    
+    def _extract_cig_cup(self, text: str, campi: Optional[CampiTrovati] = None) -> Tuple[Optional[str], Optional[str]]:
+        campi = campi if campi is not None else SCANNER_BANDO.scansiona(text)
+        
+        cig = campi.valore('cig')
+        cup = campi.valore('cup')
         
         if cig:
             print(f"  ✅ CIG: {cig}")
@@ -224,42 +512,43 @@ class BandoParserUniversale:
         
         return cig, cup
     
-    def _extract_pnrr(self, text: str) -> bool:
-        is_pnrr = 'PNRR' in text or 'NextGeneration' in text or 'Next Generation' in text
+    def _extract_pnrr(self, text: str, campi: Optional[CampiTrovati] = None) -> bool:
+        campi = campi if campi is not None else SCANNER_BANDO.scansiona(text)
+        is_pnrr = campi.primo('pnrr') is not None
         if is_pnrr:
             print(f"  ✅ PNRR: Sì 🇪🇺")
         return is_pnrr
     
-    def _extract_importi(self, text: str) -> Importi:
+    def _extract_importi(self, text: str, campi: Optional[CampiTrovati] = None) -> Importi:
         print(f"\n💰 Estrazione importi...")
+        campi = campi if campi is not None else SCANNER_BANDO.scansiona(text)
+        
+        def importo(nome: str) -> Optional[float]:
+            valore = campi.valore(nome)
+            return normalize_italian_number(valore) if valore else None
         
-        # Totale - cerca "ammonta a € XXX"
-        totale_match = re.search(r'ammonta\s+a\s+€\s*([\d.,]+)', text, re.I | re.DOTALL)
-        totale = normalize_italian_number(totale_match.group(1)) if totale_match else 0.0
+        totale = importo('totale') or 0.0
         if totale > 0:
             print(f"  ✅ Importo totale: €{totale:,.2f}")
         
-        # Lavori - pattern con a capo: "IMPORTO ESECUZ. LAVORI:\n693.820,49"
-        lavori_match = re.search(r'IMPORTO\s+ESECUZ\.\s+LAVORI:\s*([\d.,]+)', text, re.I | re.DOTALL)
-        lavori = normalize_italian_number(lavori_match.group(1)) if lavori_match else None
+        lavori = importo('lavori')
         if lavori:
             print(f"  ✅ Lavori: €{lavori:,.2f}")
         
-        # Progettazione - pattern con a capo
-        prog_match = re.search(r'IMPORTO\s+PROGETTAZIONE.*?PROGETTAZ\.\s*([\d.,]+)', text, re.I | re.DOTALL)
-        progettazione = normalize_italian_number(prog_match.group(1)) if prog_match else None
+        # Progettazione - il valore segue l'intestazione, anche dopo alcune righe
+        progettazione = None
+        intestazione = campi.primo('progettazione')
+        if intestazione:
+            prog_match = RE_VALORE_PROGETTAZIONE.search(text, intestazione.fine)
+            progettazione = normalize_italian_number(prog_match.group(1)) if prog_match else None
         if progettazione:
             print(f"  ✅ Progettazione: €{progettazione:,.2f}")
         
-        # Sicurezza
-        sic_match = re.search(r'di\s+cui\s+oneri\s+della\s+sicurezza\s+non\s+soggetti\s+a\s+ribasso\s*([\d.,]+)', text, re.I | re.DOTALL)
-        sicurezza = normalize_italian_number(sic_match.group(1)) if sic_match else None
+        sicurezza = importo('sicurezza')
         if sicurezza:
             print(f"  ✅ Sicurezza: €{sicurezza:,.2f}")
         
-        # Manodopera
-        man_match = re.search(r'di\s+cui\s+costi\s+della\s+manodopera\s*([\d.,]+)', text, re.I | re.DOTALL)
-        manodopera = normalize_italian_number(man_match.group(1)) if man_match else None
+        manodopera = importo('manodopera')
         if manodopera:
             print(f"  ✅ Manodopera: €{manodopera:,.2f}")
         
@@ -276,21 +565,19 @@ class BandoParserUniversale:
             progettazione=progettazione
         )
     
-    def _extract_categorie(self, text: str) -> List[Categoria]:
+    def _extract_categorie(self, text: str, campi: Optional[CampiTrovati] = None) -> List[Categoria]:
         print(f"\n📂 Estrazione categorie SOA...")
+        campi = campi if campi is not None else SCANNER_BANDO.scansiona(text)
         
         categorie = []
         
-        # Pattern robusto
-        pattern = r'\b(OG|OS|OGS)(\d+)\s+classifica\s+([IVX]+)\b'
-        
-        for match in re.finditer(pattern, text, re.I):
-            tipo = match.group(1).upper()
-            numero = match.group(2)
-            classifica = match.group(3).upper()
+        for occorrenza in campi.get('categoria', []):
+            tipo, numero, classifica = occorrenza.gruppi
+            tipo = tipo.upper()
+            classifica = classifica.upper()
             
             # Context analysis
-            context = text[max(0, match.start()-100):match.end()+100]
+            context = text[max(0, occorrenza.inizio-100):occorrenza.fine+100]
             
             cat = Categoria(
                 categoria=f"{tipo}{numero}",
@@ -338,11 +625,11 @@ class BandoParserUniversale:
     def _calculate_confidence(self, cig, importi, categorie) -> float:
         score = 0.0
         if cig:
-            score += 0.3
+            score += PESI_CONFIDENCE['cig']
         if importi.totale_appalto > 0:
-            score += 0.4
+            score += PESI_CONFIDENCE['importi']
         if categorie:
-            score += 0.3
+            score += PESI_CONFIDENCE['categorie']
         return min(score, 1.0)
 
 
@@ -353,14 +640,30 @@ class BandoParserUniversale:
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) < 2:
-        print("❌ Usage: python bando_parser.py <pdf_path>")
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not args:
+        print("❌ Usage: python bando_parser.py <pdf_path> [--profile] [--streaming]")
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
+    pdf_path = args[0]
+    
+    parser = BandoParserUniversale(streaming='--streaming' in sys.argv)
     
-    parser = BandoParserUniversale()
-    bando = parser.parse(pdf_path)
+    if '--profile' in sys.argv:
+        # Tempo di parse e picco di memoria (tracemalloc)
+        import time
+        import tracemalloc
+        
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        bando = parser.parse(pdf_path)
+        tempo = time.perf_counter() - t0
+        _, picco = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        print(f"\n⏱️ Parse: {tempo:.2f}s - picco memoria: {picco / 1024 / 1024:.1f} MB")
+    else:
+        bando = parser.parse(pdf_path)
     
     print(f"\n📊 JSON OUTPUT:")
     print("="*70)
@@ -0,0 +1,119 @@
+"""
+Documento PDF aperto una sola volta
+
+I byte del file vengono letti una volta e tenuti in memoria: lo stesso
+buffer serve a PyMuPDF (detection + testo) e a Unstructured (partition
+da file-like), senza riaprire il PDF da disco. Il testo di ogni pagina
+viene estratto alla prima richiesta e riusato da tutte le fasi; per i
+documenti lunghi letti da file il testo completo viene estratto in
+parallelo (core.parsers.estrazione_pagine).
+"""
+import io
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import fitz  # PyMuPDF
+
+from core.parsers.estrazione_pagine import MIN_PAGINE_PARALLELO, estrai_pagine
+
+
+class DocumentoPDF:
+    """
+    Buffer in memoria + documento PyMuPDF + testo per pagina (lazy)
+    """
+
+    def __init__(
+        self,
+        pdf: Union[str, Path, bytes],
+        nome: str = None,
+        dati: Optional[bytes] = None,
+        n_workers: Optional[int] = 1
+    ):
+        """
+        Args:
+            pdf: Path del PDF o suoi byte
+            nome: Nome del file (default: dal path)
+            dati: Byte già letti del file in `pdf` (evita una seconda lettura)
+            n_workers: Processi per l'estrazione del testo completo (None = CPU)
+        """
+        if isinstance(pdf, (bytes, bytearray)):
+            self.path = None
+            self.dati = bytes(pdf)
+        else:
+            self.path = Path(pdf)
+            self.dati = dati if dati is not None else self.path.read_bytes()
+        self.nome = nome or (self.path.name if self.path else "documento.pdf")
+        self.n_workers = n_workers
+        self.doc = fitz.open(stream=self.dati, filetype="pdf")
+        self._testi: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc)
+
+    def __enter__(self) -> "DocumentoPDF":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.doc.close()
+
+    def testo_pagina(self, numero: int) -> str:
+        """Testo della pagina (0-based), estratto una sola volta"""
+        testo = self._testi.get(numero)
+        if testo is None:
+            testo = self.doc[numero].get_text()
+            self._testi[numero] = testo
+        return testo
+
+    def testi(self) -> List[str]:
+        """Testo di tutte le pagine, in ordine"""
+        mancanti = len(self) - len(self._testi)
+        if self.path is not None and self.n_workers != 1 and mancanti >= MIN_PAGINE_PARALLELO:
+            for numero, testo in estrai_pagine(self.path, n_workers=self.n_workers):
+                self._testi.setdefault(numero - 1, testo)
+        return [self.testo_pagina(i) for i in range(len(self))]
+
+    @property
+    def testo(self) -> str:
+        """Testo completo (pagine separate da a capo)"""
+        return "\n".join(self.testi())
+
+    def immagini_pagina(self, numero: int) -> int:
+        """Numero di immagini nella pagina"""
+        return len(self.doc[numero].get_images())
+
+    def area_pagina(self, numero: int) -> float:
+        """Area della pagina in punti quadrati"""
+        rect = self.doc[numero].rect
+        return rect.width * rect.height
+
+    def copertura_immagini(self, numero: int) -> float:
+        """Frazione della pagina coperta da immagini (0-1, sovrapposizioni non sottratte)"""
+        pagina = self.doc[numero]
+        area = pagina.rect.width * pagina.rect.height
+        if area <= 0:
+            return 0.0
+        coperta = 0.0
+        for info in pagina.get_image_info():
+            bbox = fitz.Rect(info['bbox']) & pagina.rect
+            coperta += bbox.width * bbox.height
+        return min(1.0, coperta / area)
+
+    def stream(self, pagine: Optional[List[int]] = None) -> io.BytesIO:
+        """
+        Buffer file-like sui byte del PDF (per librerie che leggono da file)
+
+        Con `pagine` il buffer contiene un PDF con solo quelle pagine,
+        copiate dal documento già aperto.
+        """
+        if pagine is None or len(pagine) == len(self):
+            return io.BytesIO(self.dati)
+
+        estratto = fitz.open()
+        for numero in pagine:
+            estratto.insert_pdf(self.doc, from_page=numero, to_page=numero)
+        dati = estratto.tobytes()
+        estratto.close()
+        return io.BytesIO(dati)
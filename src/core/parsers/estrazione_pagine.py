@@ -0,0 +1,112 @@
+"""
+Estrazione testo pagina per pagina in parallelo (ProcessPoolExecutor)
+
+Le pagine del PDF vengono divise in intervalli contigui; ogni worker
+apre il documento per conto suo (niente oggetti PyMuPDF/PyPDF2 tra
+processi) ed estrae il suo intervallo. Il risultato è la lista ordinata
+(numero pagina 1-based, testo): i numeri di pagina servono alle citazioni.
+I documenti piccoli vengono estratti nel processo corrente.
+
+Benchmark: cd src && python -m core.parsers.estrazione_pagine <pdf> [n_workers]
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+# Pagina estratta: (numero 1-based, testo)
+Pagina = Tuple[int, str]
+
+# Sotto questo numero di pagine il pool costa più di quanto fa risparmiare
+MIN_PAGINE_PARALLELO = 24
+
+
+def _conta_pagine(pdf_path: str, motore: str) -> int:
+    if motore == 'pypdf2':
+        from PyPDF2 import PdfReader
+        return len(PdfReader(pdf_path).pages)
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+
+def _estrai_intervallo(pdf_path: str, inizio: int, fine: int, motore: str) -> List[Pagina]:
+    """Pagine [inizio, fine) (0-based); eseguita nel worker, che apre il PDF da sé"""
+    if motore == 'pypdf2':
+        from PyPDF2 import PdfReader
+        reader = PdfReader(pdf_path)
+        return [(n + 1, reader.pages[n].extract_text() or "") for n in range(inizio, fine)]
+
+    with fitz.open(pdf_path) as doc:
+        return [(n + 1, doc[n].get_text()) for n in range(inizio, fine)]
+
+
+def estrai_pagine(
+    pdf_path: Union[str, Path],
+    n_workers: Optional[int] = None,
+    motore: str = 'fitz',
+    min_pagine_parallelo: int = MIN_PAGINE_PARALLELO
+) -> List[Pagina]:
+    """
+    Testo di tutte le pagine, in ordine
+
+    Args:
+        pdf_path: Path del PDF
+        n_workers: Processi (default: CPU disponibili)
+        motore: 'fitz' (PyMuPDF) o 'pypdf2'
+        min_pagine_parallelo: Sotto questa soglia niente pool
+
+    Returns:
+        Lista (numero pagina 1-based, testo)
+    """
+    pdf_path = str(pdf_path)
+    n_pagine = _conta_pagine(pdf_path, motore)
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, n_pagine or 1))
+
+    if n_workers == 1 or n_pagine < min_pagine_parallelo:
+        return _estrai_intervallo(pdf_path, 0, n_pagine, motore)
+
+    # Più intervalli che worker: bilancia pagine dense e pagine vuote
+    dimensione = max(1, -(-n_pagine // (n_workers * 4)))
+    intervalli = [(i, min(i + dimensione, n_pagine)) for i in range(0, n_pagine, dimensione)]
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = [
+            executor.submit(_estrai_intervallo, pdf_path, inizio, fine, motore)
+            for inizio, fine in intervalli
+        ]
+        pagine: List[Pagina] = []
+        for future in futures:
+            pagine.extend(future.result())
+
+    return pagine
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if len(sys.argv) < 2:
+        print("❌ Usage: python -m core.parsers.estrazione_pagine <pdf_path> [n_workers]")
+        sys.exit(1)
+
+    pdf_path = sys.argv[1]
+    n_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+
+    for motore in ('fitz', 'pypdf2'):
+        t0 = time.perf_counter()
+        seriale = estrai_pagine(pdf_path, n_workers=1, motore=motore)
+        t_seriale = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        parallelo = estrai_pagine(pdf_path, n_workers=n_workers, motore=motore, min_pagine_parallelo=0)
+        t_parallelo = time.perf_counter() - t0
+
+        assert parallelo == seriale
+        print(f"{motore:7s} {len(seriale)} pagine: seriale {t_seriale:.2f}s - "
+              f"{n_workers} worker {t_parallelo:.2f}s")
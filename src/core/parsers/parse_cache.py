@@ -0,0 +1,128 @@
+"""
+Cache persistente dei risultati di parsing dei PDF
+
+Chiave: SHA-256 dei byte del PDF + versione del parser, quindi lo stesso
+file caricato più volte (anche con nomi o percorsi diversi) viene
+analizzato una sola volta; cambiando la versione del parser le voci
+vecchie non vengono più lette. Un file JSON per voce in CACHE_DIR/parse/<nome>;
+oltre `max_bytes` si eliminano le voci usate meno di recente (mtime) fino
+a tornare al 90% del limite. La cache è un'ottimizzazione: errori di
+scrittura vengono segnalati ma non interrompono il parsing.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.config import CACHE_DIR
+
+
+def hash_pdf(dati: bytes) -> str:
+    """SHA-256 dei byte del PDF"""
+    return hashlib.sha256(dati).hexdigest()
+
+
+class ParseCache:
+    """
+    Cache su disco dei risultati (dict serializzabili) per contenuto PDF
+    """
+
+    def __init__(self, nome: str, versione: str, path: Optional[Path] = None, max_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path) if path else CACHE_DIR / "parse" / nome
+        self.versione = versione
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Nel nome file la versione entra come hash (può contenere ':' e ',')
+        self._suffisso = hashlib.sha1(versione.encode('utf-8')).hexdigest()[:12]
+        # Dimensione delle voci su disco, calcolata alla prima scrittura e poi aggiornata
+        self._totale: Optional[int] = None
+
+    def _file(self, dati: bytes) -> Path:
+        return self.path / f"{hash_pdf(dati)}_{self._suffisso}.json"
+
+    def get(self, dati: bytes) -> Optional[Dict]:
+        """Risultato in cache per questi byte, None se assente"""
+        file = self._file(dati)
+        try:
+            risultato = json.loads(file.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError):
+            file.unlink(missing_ok=True)
+            self._totale = None
+            self.misses += 1
+            return None
+
+        # mtime = ultimo uso (per l'eviction); un altro processo può averla appena eliminata
+        try:
+            os.utime(file)
+        except OSError:
+            pass
+        self.hits += 1
+        return risultato
+
+    def put(self, dati: bytes, risultato: Dict) -> None:
+        """Salva il risultato e rispetta il limite di dimensione"""
+        file = self._file(dati)
+        tmp = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            if self._totale is None:
+                self._totale = self._dimensione()
+            precedente = file.stat().st_size if file.exists() else 0
+
+            # Nome temporaneo univoco: più processi possono scrivere la stessa voce
+            fd, tmp = tempfile.mkstemp(dir=self.path, prefix=file.stem + '.', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(risultato, ensure_ascii=False, default=str))
+            os.replace(tmp, file)
+            tmp = None
+
+            self._totale += file.stat().st_size - precedente
+            if self._totale > self.max_bytes:
+                self._riduci()
+        except OSError as e:
+            print(f"⚠️  Cache parsing non scritta ({file.name}): {e}")
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+
+    def _dimensione(self) -> int:
+        """Byte occupati dalle voci su disco"""
+        totale = 0
+        for file in self.path.glob('*.json'):
+            try:
+                totale += file.stat().st_size
+            except OSError:
+                continue
+        return totale
+
+    def _riduci(self) -> None:
+        """Elimina le voci usate meno di recente fino al 90% di max_bytes"""
+        voci = []
+        totale = 0
+        for file in self.path.glob('*.json'):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            voci.append((stat.st_mtime, stat.st_size, file))
+            totale += stat.st_size
+
+        voci.sort()
+        obiettivo = self.max_bytes * 9 // 10
+        for _, dimensione, file in voci:
+            if totale <= obiettivo:
+                break
+            file.unlink(missing_ok=True)
+            totale -= dimensione
+        self._totale = totale
+
+    def svuota(self) -> None:
+        if self.path.exists():
+            for file in self.path.glob('*.json'):
+                file.unlink(missing_ok=True)
+        self._totale = None
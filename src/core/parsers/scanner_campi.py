@@ -0,0 +1,146 @@
+"""
+Scanner compilato dei campi di un testo
+
+La tabella dei campi (nome -> pattern) viene compilata una sola volta a
+livello di modulo; `scansiona` restituisce una vista unica sul testo
+condivisa da tutti gli estrattori, che non rileggono più il testo per
+conto proprio. Ogni campo viene cercato alla prima richiesta e una sola
+volta: i campi di ripiego (es. 'anni' se manca 'mesi') non costano nulla
+quando non servono.
+
+Per i campi "singoli" si cerca solo la prima occorrenza (la ricerca si
+ferma lì), per i campi in `tutti` si raccolgono tutte le occorrenze.
+Ogni pattern resta una regex separata: con il motore `re` di CPython
+un'unica alternanza di tutti i pattern è risultata più lenta (perde la
+ricerca veloce sul prefisso letterale di ogni pattern e l'uscita alla
+prima occorrenza); il benchmark confronta le due varianti. Per le parole
+chiave senza maiuscole/minuscole conviene `in` su `CampiTrovati.minuscolo`.
+
+Benchmark: cd src && python -m core.parsers.scanner_campi [pdf] [n_pagine]
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Occorrenza(NamedTuple):
+    inizio: int
+    fine: int
+    gruppi: Tuple[Optional[str], ...]
+
+
+class CampiTrovati(dict):
+    """nome campo -> lista di Occorrenza (ordinate per posizione), cercate alla prima richiesta"""
+
+    def __init__(self, scanner: "ScannerCampi", text: str, inizio: int = 0):
+        super().__init__()
+        self.scanner = scanner
+        self.text = text
+        self.inizio = inizio
+        self._minuscolo: Optional[str] = None
+
+    def __missing__(self, nome: str) -> List[Occorrenza]:
+        occorrenze = self.scanner.cerca(nome, self.text, self.inizio)
+        self[nome] = occorrenze
+        return occorrenze
+
+    def get(self, nome: str, default=None):
+        if nome not in self.scanner.regex:
+            return dict.get(self, nome, default)
+        return self[nome] or default
+
+    @property
+    def minuscolo(self) -> str:
+        """Testo (da `inizio`) in minuscolo, calcolato una volta"""
+        if self._minuscolo is None:
+            self._minuscolo = self.text[self.inizio:].lower()
+        return self._minuscolo
+
+    def primo(self, nome: str) -> Optional[Occorrenza]:
+        occorrenze = self.get(nome)
+        return occorrenze[0] if occorrenze else None
+
+    def valore(self, nome: str, gruppo: int = 0) -> Optional[str]:
+        """Gruppo `gruppo` (0-based, tra quelli del campo) della prima occorrenza"""
+        occorrenza = self.primo(nome)
+        return occorrenza.gruppi[gruppo] if occorrenza else None
+
+
+class ScannerCampi:
+    """
+    Tabella di pattern compilata una volta (a livello di modulo) e riusata
+    """
+
+    def __init__(self, campi: Dict[str, str], flags: int = re.IGNORECASE, tutti: Iterable[str] = ()):
+        """
+        Args:
+            campi: nome -> pattern (i gruppi del pattern diventano Occorrenza.gruppi)
+            flags: Flag comuni (per singoli campi usare i flag inline, es. (?-i:...))
+            tutti: Campi di cui raccogliere tutte le occorrenze
+        """
+        self.campi = dict(campi)
+        self.flags = flags
+        self.tutti = frozenset(tutti)
+        self.regex = {nome: re.compile(pattern, flags) for nome, pattern in self.campi.items()}
+
+    def cerca(self, nome: str, text: str, inizio: int = 0) -> List[Occorrenza]:
+        """Occorrenze di un campo (solo la prima se il campo non è in `tutti`)"""
+        regex = self.regex[nome]
+        if nome in self.tutti:
+            return [Occorrenza(m.start(), m.end(), m.groups()) for m in regex.finditer(text, inizio)]
+        match = regex.search(text, inizio)
+        return [Occorrenza(match.start(), match.end(), match.groups())] if match else []
+
+    def scansiona(self, text: str, inizio: int = 0) -> CampiTrovati:
+        """Vista sui campi del testo (da `inizio`), condivisa tra gli estrattori"""
+        return CampiTrovati(self, text, inizio)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    from core.parsers.bando_parser import SCANNER_BANDO
+    from core.extraction import SCANNER_METADATI
+    from core.parsers.estrazione_pagine import estrai_pagine
+
+    print("\n" + "="*70)
+    print("🧪 BENCHMARK SCANNER CAMPI")
+    print("="*70 + "\n")
+
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "../data/bandi/bando_test_pnrr.pdf"
+    n_pagine = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    pagine = [testo for _, testo in estrai_pagine(pdf_path, n_workers=1)]
+    # Disciplinare sintetico: pagine del bando reale rimescolate fino a n_pagine
+    rng = random.Random(42)
+    sintetico = "\n".join(rng.choice(pagine) for _ in range(n_pagine))
+
+    def alternanza(scanner: ScannerCampi) -> re.Pattern:
+        """Variante a regex unica: ogni campo è un lookahead con gruppo nominato"""
+        return re.compile("|".join(f"(?=(?P<{nome}>{p}))" for nome, p in scanner.campi.items()), scanner.flags)
+
+    def misura(funzione, *args, ripetizioni: int = 5) -> float:
+        migliore = float('inf')
+        for _ in range(ripetizioni):
+            t0 = time.perf_counter()
+            funzione(*args)
+            migliore = min(migliore, time.perf_counter() - t0)
+        return migliore
+
+    def tutti_i_campi(scanner: ScannerCampi, text: str) -> list:
+        campi = scanner.scansiona(text)
+        return [campi[nome] for nome in scanner.campi]
+
+    for nome_testo, text in (("bando test", "\n".join(pagine)), (f"sintetico {n_pagine} pagine", sintetico)):
+        print(f"📄 {nome_testo}: {len(text):,} caratteri")
+        for nome_scanner, scanner in (("bando_parser", SCANNER_BANDO), ("extraction", SCANNER_METADATI)):
+            unica = alternanza(scanner)
+            t_scanner = misura(tutti_i_campi, scanner, text)
+            t_unica = misura(lambda t: list(unica.finditer(t)), text)
+            print(f"   {nome_scanner:12s} {len(scanner.campi):2d} campi: "
+                  f"scanner {t_scanner*1000:7.1f} ms - regex unica {t_unica*1000:7.1f} ms")
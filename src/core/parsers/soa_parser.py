@@ -1,18 +1,56 @@
 """
 SOA Parser - Estrazione dati da Attestazioni SOA PDF
 """
+import os
 import re
-import fitz  # PyMuPDF
-from typing import Dict, List, Optional, Any
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from core.parsers.parse_cache import ParseCache
+from core.parsers.estrazione_pagine import estrai_pagine
+from core.parsers.scanner_campi import CampiTrovati, ScannerCampi
+
+
+def _campi_scanner(patterns: Dict[str, List[str]]) -> Dict[str, str]:
+    """Un campo dello scanner per ogni pattern alternativo: 'partita_iva_0', 'partita_iva_1', ..."""
+    return {
+        f"{campo}_{i}": pattern
+        for campo, lista in patterns.items() if campo not in ('categoria', 'classifica')
+        for i, pattern in enumerate(lista)
+    }
+
+
+# Parser del processo worker di parse_many (uno per processo)
+_parser_worker: Optional["SOAParser"] = None
+
+
+def _init_worker(usa_cache: bool) -> None:
+    global _parser_worker
+    # Niente pool annidati: ogni worker estrae le sue pagine in serie
+    _parser_worker = SOAParser(usa_cache=usa_cache, n_workers=1, verbose=False)
+
+
+def _parse_worker(pdf_path: str) -> Tuple[str, Dict[str, Any]]:
+    try:
+        return pdf_path, _parser_worker.parse(pdf_path)
+    except Exception as e:
+        return pdf_path, {'success': False, 'error': str(e)}
+
+
 class SOAParser:
     """
     Parser per estrarre dati da PDF Attestazione SOA
     Supporta formati comuni degli organismi SOA italiani
     """
     
+    # Da incrementare quando cambia l'output (invalida la cache di parsing)
+    VERSIONE = "1"
+    
     # Pattern regex per estrazione dati
     PATTERNS = {
         'ragione_sociale': [
@@ -43,13 +81,33 @@ class SOAParser:
         ],
     }
     
-    def __init__(self):
-        """Inizializza parser"""
-        print("✅ SOA Parser inizializzato")
+    # Compilati una volta: i campi singoli in una scansione per documento
+    # (vedi scanner_campi), le categorie in una passata ciascuna e la
+    # classifica solo vicino alle categorie
+    SCANNER = ScannerCampi(_campi_scanner(PATTERNS))
+    REGEX_CATEGORIA = [re.compile(pattern, re.IGNORECASE) for pattern in PATTERNS['categoria']]
+    REGEX_CLASSIFICA = [re.compile(pattern) for pattern in PATTERNS['classifica']]
+    
+    def __init__(self, usa_cache: bool = True, n_workers: Optional[int] = 1, verbose: bool = True):
+        """
+        Inizializza parser
+        
+        Args:
+            usa_cache: Riusa i risultati già calcolati per lo stesso PDF (CACHE_DIR/parse)
+            n_workers: Processi per l'estrazione del testo dei PDF lunghi (default 1:
+                nessun pool per richiesta; None = CPU, per elaborazioni in blocco)
+            verbose: Stampa l'avanzamento di ogni file
+        """
+        self.usa_cache = usa_cache
+        self.cache = ParseCache("soa", self.VERSIONE) if usa_cache else None
+        self.n_workers = n_workers
+        self.verbose = verbose
+        if verbose:
+            print("✅ SOA Parser inizializzato")
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """
-        Estrai testo da PDF usando PyMuPDF
+        Estrai testo da PDF usando PyMuPDF (pagine in parallelo sui PDF lunghi)
         
         Args:
             pdf_path: Path del file PDF
@@ -58,16 +116,11 @@ class SOAParser:
             Testo estratto
         """
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text += page.get_text()
-            
-            doc.close()
+            pagine = estrai_pagine(pdf_path, n_workers=self.n_workers)
+            text = "".join(testo for _, testo in pagine)
             
-            print(f"📄 Estratte {len(doc)} pagine da {Path(pdf_path).name}")
+            if self.verbose:
+                print(f"📄 Estratte {len(pagine)} pagine da {Path(pdf_path).name}")
             return text
             
         except Exception as e:
@@ -86,28 +139,22 @@ class SOAParser:
         """
         categorie = []
         
-        # Trova tutte le categorie
-        cat_matches = []
-        for pattern in self.PATTERNS['categoria']:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            cat_matches.extend([(m.group(1).replace(' ', ''), m.start()) for m in matches])
-        
-        # Rimuovi duplicati mantenendo ordine
+        # Prima occorrenza di ogni categoria, senza tenere in memoria le altre
         seen = set()
         unique_cats = []
-        for cat, pos in cat_matches:
-            if cat not in seen:
-                seen.add(cat)
-                unique_cats.append((cat, pos))
+        for regex in self.REGEX_CATEGORIA:
+            for match in regex.finditer(text):
+                cat = match.group(1).replace(' ', '')
+                if cat not in seen:
+                    seen.add(cat)
+                    unique_cats.append((cat, match.start()))
         
         # Per ogni categoria, cerca classifica vicina
         for categoria, cat_pos in unique_cats:
-            # Cerca classifica nei 200 caratteri successivi
-            context = text[cat_pos:cat_pos+200]
-            
+            # Cerca classifica nei 200 caratteri successivi (senza copiarli)
             classifica = None
-            for pattern in self.PATTERNS['classifica']:
-                match = re.search(pattern, context)
+            for regex in self.REGEX_CLASSIFICA:
+                match = regex.search(text, cat_pos, cat_pos + 200)
                 if match:
                     classifica = match.group(1)
                     break
@@ -119,6 +166,14 @@ class SOAParser:
         
         return categorie
     
+    def _primo(self, campi: CampiTrovati, campo: str) -> Optional[str]:
+        """Valore del primo pattern del campo che trova qualcosa (in ordine di priorità)"""
+        for i in range(len(self.PATTERNS[campo])):
+            occorrenza = campi.primo(f"{campo}_{i}")
+            if occorrenza:
+                return occorrenza.gruppi[0]
+        return None
+    
     def parse(self, pdf_path: str) -> Dict[str, Any]:
         """
         Parsing completo di un PDF SOA
@@ -127,10 +182,36 @@ class SOAParser:
             pdf_path: Path del file PDF
         
         Returns:
-            Dict con tutti i dati estratti
+            Dict con tutti i dati estratti (da cache se lo stesso PDF è già
+            stato analizzato; file_name e parsed_at sono sempre di questa chiamata)
         """
-        print(f"\n🔍 Parsing SOA: {Path(pdf_path).name}")
+        if self.verbose:
+            print(f"\n🔍 Parsing SOA: {Path(pdf_path).name}")
+        
+        # Stesso contenuto PDF (SHA-256) già analizzato
+        dati = None
+        if self.cache is not None:
+            try:
+                dati = Path(pdf_path).read_bytes()
+            except OSError:
+                dati = None
+            salvato = self.cache.get(dati) if dati is not None else None
+            if salvato is not None:
+                if self.verbose:
+                    print("⚡ Risultato da cache")
+                salvato['file_name'] = Path(pdf_path).name
+                salvato['parsed_at'] = datetime.now().isoformat()
+                return salvato
+        
+        result = self._parse_testo(pdf_path)
         
+        # Solo i risultati validi: un errore può dipendere dal file letto male
+        if self.cache is not None and dati is not None and result.get('success'):
+            self.cache.put(dati, result)
+        
+        return result
+    
+    def _parse_testo(self, pdf_path: str) -> Dict[str, Any]:
         # Estrai testo
         text = self.extract_text_from_pdf(pdf_path)
         
@@ -147,36 +228,31 @@ class SOAParser:
             'parsed_at': datetime.now().isoformat(),
         }
         
+        # Una scansione per tutti i campi (ogni campo cercato al primo uso)
+        campi = self.SCANNER.scansiona(text)
+        
         # Ragione Sociale
-        for pattern in self.PATTERNS['ragione_sociale']:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                result['ragione_sociale'] = match.group(1).strip()
-                break
+        ragione_sociale = self._primo(campi, 'ragione_sociale')
+        if ragione_sociale is not None:
+            result['ragione_sociale'] = ragione_sociale.strip()
         
         # Partita IVA
-        for pattern in self.PATTERNS['partita_iva']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result['partita_iva'] = match.group(1)
-                break
+        partita_iva = self._primo(campi, 'partita_iva')
+        if partita_iva is not None:
+            result['partita_iva'] = partita_iva
         
         # Categorie e Classifiche
         result['categorie'] = self.extract_categorie(text)
         
         # Scadenza
-        for pattern in self.PATTERNS['scadenza']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result['scadenza'] = match.group(1)
-                break
+        scadenza = self._primo(campi, 'scadenza')
+        if scadenza is not None:
+            result['scadenza'] = scadenza
         
         # Organismo SOA
-        for pattern in self.PATTERNS['organismo_soa']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result['organismo_soa'] = match.group(1).strip()
-                break
+        organismo = self._primo(campi, 'organismo_soa')
+        if organismo is not None:
+            result['organismo_soa'] = organismo.strip()
         
         # Valida risultato
         if not result.get('ragione_sociale') and not result.get('categorie'):
@@ -185,6 +261,59 @@ class SOAParser:
         
         return result
     
+    def parse_many(
+        self,
+        paths: Iterable[str],
+        n_workers: Optional[int] = None,
+        min_file_parallelo: int = 4
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Parsing di molti PDF SOA in un pool di processi
+        
+        I risultati arrivano man mano che i file sono pronti (non nell'ordine
+        di `paths`), così migliaia di attestazioni non restano tutte in memoria:
+        in coda al pool ci sono al più 2 file per worker. Se il consumatore
+        smette di iterare, i file non ancora avviati vengono annullati.
+        
+        Args:
+            paths: Path dei PDF
+            n_workers: Processi (default: CPU disponibili)
+            min_file_parallelo: Sotto questo numero di file niente pool
+        
+        Yields:
+            (path, risultato come da parse)
+        """
+        paths = [str(p) for p in paths]
+        n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(paths) or 1))
+        
+        if n_workers == 1 or len(paths) < min_file_parallelo:
+            for pdf_path in paths:
+                try:
+                    yield pdf_path, self.parse(pdf_path)
+                except Exception as e:
+                    yield pdf_path, {'success': False, 'error': str(e)}
+            return
+        
+        executor = ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(self.usa_cache,)
+        )
+        try:
+            da_inviare = iter(paths)
+            in_corso = set()
+            while True:
+                for pdf_path in islice(da_inviare, 2 * n_workers - len(in_corso)):
+                    in_corso.add(executor.submit(_parse_worker, pdf_path))
+                if not in_corso:
+                    break
+                pronti, in_corso = wait(in_corso, return_when=FIRST_COMPLETED)
+                for future in pronti:
+                    yield future.result()
+        finally:
+            # Anche su GeneratorExit o errore: niente lavoro residuo nel pool
+            executor.shutdown(cancel_futures=True)
+    
     def format_output(self, parsed_data: Dict[str, Any]) -> str:
         """
         Formatta output per visualizzazione
@@ -238,8 +367,21 @@ if __name__ == "__main__":
     
     parser = SOAParser()
     
+    # Più file: parse_many (risultati in streaming)
+    if len(sys.argv) > 2:
+        import time
+        
+        t0 = time.perf_counter()
+        ok = 0
+        for n, (pdf_path, result) in enumerate(SOAParser(verbose=False).parse_many(sys.argv[1:]), 1):
+            ok += bool(result.get('success'))
+            stato = f"{len(result.get('categorie', []))} categorie" if result.get('success') else result.get('error')
+            print(f"[{n}/{len(sys.argv) - 1}] {Path(pdf_path).name}: {stato}")
+        elapsed = time.perf_counter() - t0
+        print(f"\n✅ {ok}/{len(sys.argv) - 1} attestazioni in {elapsed:.1f}s ({(len(sys.argv) - 1) / elapsed:.1f} file/s)")
+    
     # Test con file esempio
-    if len(sys.argv) > 1:
+    elif len(sys.argv) > 1:
         pdf_path = sys.argv[1]
         
         if Path(pdf_path).exists():
@@ -253,7 +395,7 @@ if __name__ == "__main__":
         else:
             print(f"❌ File non trovato: {pdf_path}")
     else:
-        print("💡 Uso: python soa_parser.py <path_to_soa.pdf>")
+        print("💡 Uso: python soa_parser.py <path_to_soa.pdf> [altri_pdf ...]")
         print("\nEsempio:")
         print("  python src/core/parsers/soa_parser.py attestazione_soa.pdf")
     
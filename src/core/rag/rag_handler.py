@@ -148,14 +148,11 @@ class LegalRAGHandler:
             print(f"   ⚠️ Errore parsing avanzato: {e}")
             print(f"   🔄 Fallback a parsing semplice...")
             
-            # Fallback: parsing semplice
-            from PyPDF2 import PdfReader
-            reader = PdfReader(str(pdf_path))
+            # Fallback: parsing semplice (PyPDF2, pagine in parallelo)
+            from core.parsers.estrazione_pagine import estrai_pagine
             
             chunks = []
-            for page_num, page in enumerate(reader.pages, 1):
-                text = page.extract_text()
-                
+            for page_num, text in estrai_pagine(pdf_path, motore='pypdf2'):
                 # Split in paragraphs
                 paragraphs = text.split('\n\n')
                 
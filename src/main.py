@@ -59,6 +59,9 @@ COMANDI:
   python src\main.py process <pdf_path> [--regione X]
       Processa un bando da PDF
 
+  python src\main.py process-dir <cartella> [--workers N] [--batch N] [--regione X] [--ricomincia]
+      Processa tutti i PDF di una cartella (in parallelo, riprende se interrotto)
+
   python src\main.py schema
       Mostra schema SQL per Supabase
 
@@ -90,6 +93,31 @@ COMANDI:
         
         process_bando(pdf_path, metadata_extra)
     
+    elif comando == "process-dir":
+        if len(sys.argv) < 3:
+            print("❌ Specifica la cartella")
+            return
+        
+        cartella = Path(sys.argv[2])
+        if not cartella.is_dir():
+            print(f"❌ Cartella non trovata: {cartella}")
+            return
+        
+        opzioni = {"n_workers": None, "dimensione_batch": 50, "ricomincia": "--ricomincia" in sys.argv}
+        metadata_extra = {}
+        args = [a for a in sys.argv[3:] if a != "--ricomincia"]
+        for i in range(0, len(args), 2):
+            if i+1 < len(args):
+                if args[i] == "--regione":
+                    metadata_extra["regione"] = args[i+1]
+                elif args[i] == "--workers":
+                    opzioni["n_workers"] = int(args[i+1])
+                elif args[i] == "--batch":
+                    opzioni["dimensione_batch"] = int(args[i+1])
+        
+        from core.ingestione import processa_cartella
+        processa_cartella(cartella, metadata_extra=metadata_extra, **opzioni)
+    
     elif comando == "schema":
         print_schema()
     
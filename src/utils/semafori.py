@@ -4,15 +4,19 @@ EdilMind - Sistema Semafori
 from typing import Dict, Tuple, List
 from pathlib import Path
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent / "core"))
-from config import CLASSI_IMPORTI_MAX
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.matching.rules import RequisitiBando, ordinale_classe
 
 def check_soa_compatibility(categorie_richieste: List[Dict], attestazioni: List[Dict]) -> bool:
     """Verifica compatibilità SOA."""
     if not categorie_richieste:
         return True
     
-    soa_map = {att["codice"]: att for att in attestazioni}
+    # Classifica più alta posseduta per categoria
+    soa_map = {}
+    for att in attestazioni:
+        codice = att["codice"]
+        soa_map[codice] = max(soa_map.get(codice, -1), ordinale_classe(att.get("classe")))
     
     for cat in categorie_richieste:
         codice = cat["codice"]
@@ -21,55 +25,29 @@ def check_soa_compatibility(categorie_richieste: List[Dict], attestazioni: List[
         
         classe_rich = cat.get("classe")
         if classe_rich:
-            classe_imp = soa_map[codice].get("classe")
-            if not is_classe_sufficiente(classe_imp, classe_rich):
+            ordinale_rich = ordinale_classe(classe_rich)
+            if ordinale_rich < 0 or soa_map[codice] < ordinale_rich:
                 return False
     
     return True
 
 def is_classe_sufficiente(classe_impresa: str, classe_richiesta: str) -> bool:
     """Confronta classi SOA."""
-    ordine = ["I", "II", "III", "III-bis", "IV", "IV-bis", "V", "VI", "VII", "VIII"]
-    try:
-        idx_imp = ordine.index(classe_impresa)
-        idx_rich = ordine.index(classe_richiesta)
-        return idx_imp >= idx_rich
-    except ValueError:
+    idx_imp = ordinale_classe(classe_impresa)
+    idx_rich = ordinale_classe(classe_richiesta)
+    if idx_imp < 0 or idx_rich < 0:
         return False
+    return idx_imp >= idx_rich
 
 def semaforo_legale(bando: Dict, profilo_impresa: Dict) -> Tuple[str, str]:
-    """Semaforo legale."""
-    issues = []
-    
-    soa_ok = check_soa_compatibility(
-        bando.get("categorie_soa", []),
-        profilo_impresa.get("attestazioni_soa", [])
-    )
-    
-    if not soa_ok:
-        issues.append("SOA insufficiente - Richiede avvalimento/RTI")
-    
-    cert_rich = set(bando.get("certificazioni_richieste", []))
-    cert_poss = set(profilo_impresa.get("certificazioni_possedute", []))
-    cert_mancanti = cert_rich - cert_poss
-    
-    if cert_mancanti:
-        issues.append(f"Certificazioni mancanti: {', '.join(cert_mancanti)}")
-    
-    importo = bando.get("importo_base_gara", 0)
-    max_classe = max([
-        CLASSI_IMPORTI_MAX.get(att.get("classe", "I"), 0)
-        for att in profilo_impresa.get("attestazioni_soa", [{"classe": "I"}])
-    ])
-    
-    if importo > max_classe:
-        issues.append(f"Importo supera capacità SOA")
-        return ("ROSSO", "; ".join(issues))
-    
-    if not issues:
-        return ("VERDE", "Tutti requisiti soddisfatti")
-    else:
-        return ("GIALLO", "; ".join(issues))
+    """Semaforo legale (regole compilate di core.matching.rules)."""
+    semaforo = RequisitiBando.da_dict(bando).valuta(profilo_impresa)["semaforo"]
+    return (semaforo["colore"], semaforo["messaggio"])
+
+def semafori_legali(bando: Dict, profili_imprese: List[Dict]) -> List[Tuple[str, str]]:
+    """Semaforo legale di molte imprese (requisiti del bando compilati una volta)."""
+    valutazioni = RequisitiBando.da_dict(bando).valuta_molte(profili_imprese)
+    return [(v["semaforo"]["colore"], v["semaforo"]["messaggio"]) for v in valutazioni]
 
 def semaforo_economico(bando: Dict) -> Tuple[str, str]:
     """Semaforo economico (semplificato)."""